@@ -1,19 +1,25 @@
 # -*- coding: utf-8 -*-
-from PIL import Image, ImageDraw, ImageFont
+import bisect
+import math
+import operator
 import random
 import os
-import datetime
+import sys
+
+# 共用模块在仓库根目录的 common 包中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument, lazy, pageid  # noqa: E402
+from common.page import A4_HEIGHT, A4_WIDTH  # noqa: E402
+
+# 画页面时才导入（会导入 Pillow），只出题时不加载
+fonts = lazy.module("common.fonts")
+render = lazy.module("common.render")
 
-# 设置A4纸尺寸 (2480x3508 pixels, 300dpi)
-A4_WIDTH = 2480
-A4_HEIGHT = 3508
 MARGIN = 100  # 页边距
 TABLE_SPACING = 50  # 表格之间的间距
 
-# 字体路径 (根据系统选择合适的字体路径)
-FONT_PATH = "arial.ttf"  # Windows系统
-# FONT_PATH = "/Library/Fonts/Arial.ttf"  # macOS系统
-# FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"  # Linux系统
+# 字体 (字体族名会按 common/fonts.py 中各系统的字体路径依次查找，也可以直接写字体文件路径)
+FONT_PATH = "sans"
 
 # 表格参数
 TABLE_ROWS = 3  # 减少一行，从4变为3
@@ -22,99 +28,170 @@ CELL_WIDTH = 150
 CELL_HEIGHT = 100
 FONT_SIZE = 30
 
-# 创建 images 目录（如果不存在）
-if not os.path.exists("images"):
-    os.makedirs("images")
+
+def _exact_divide(a, b):
+    """整除时返回商，不能整除时返回 None"""
+    return a // b if b and a % b == 0 else None
+
+
+OPERATIONS = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": _exact_divide,
+}
+
+SYMBOLS = {"add": "+", "subtract": "-", "multiply": "×", "divide": "÷"}
+
+# 预设的表格（与 main 中菜单的说明一致），参数见 TableSpace：
+# 加法：1~9 的数字，结果在 20 以内；减法：减数小于 19，结果在 10 以内且为正数；
+# 乘法：表内乘法；除法：两位数除以一位数，都能整除；100 以内的加减法；20 以内加减混合（第一列每行各有运算符号）
+PRESETS = {
+    "add": {"ops": ("add",), "row_values": range(1, 10), "col_values": range(1, 10), "result": (2, 20)},
+    "subtract": {"ops": ("subtract",), "row_values": range(1, 19), "col_values": range(1, 19),
+                 "result": (1, 10), "sort": True},
+    "multiply": {"ops": ("multiply",), "row_values": range(1, 10), "col_values": range(2, 10), "result": (1, 81)},
+    "divide": {"ops": ("divide",), "row_values": range(10, 100), "col_values": range(2, 10),
+               "result": (2, 49), "sort": True},
+    "add100": {"ops": ("add",), "row_values": range(10, 100), "col_values": range(10, 100), "result": (20, 100)},
+    "subtract100": {"ops": ("subtract",), "row_values": range(10, 101), "col_values": range(10, 100),
+                    "result": (0, 100), "sort": True},
+    "mixed": {"ops": ("add", "subtract"), "row_values": range(1, 21), "col_values": range(1, 10),
+              "result": (0, 20), "sort": True, "symbol": "±"},
+}
+
+
+class TableSpace:
+    """一种表格的全部合法取值
+    第一行是 cols - 1 个数字，第一列是 rows - 1 个 (运算, 数字)，空格的值为 第一行的数字 运算 第一列的数字，
+    每个空格的值都要在 result 范围内（除法还要能整除）。
+    对第一列每个可选的 (运算, 数字) 先算出第一行可用数字的位掩码，再按顺序深度优先组合第一列，
+    组合的掩码是各项掩码的与，可用数字不够 cols - 1 个时不再往下组合。
+    每种第一列组合为一组，组的权重是第一行的组合数 C(可用数字个数, cols - 1)，不需要列举第一行
+    """
+
+    def __init__(self, ops, row_values, col_values, result, rows=TABLE_ROWS, cols=TABLE_COLS, sort=False, symbol=None):
+        self.ops = tuple(ops)
+        self.result = result
+        self.rows = rows
+        self.cols = cols
+        self.sort = sort
+        self.symbol = symbol if symbol is not None else SYMBOLS[self.ops[0]] if len(self.ops) == 1 else ""
+        self.row_values = list(row_values)
+        self.terms = [(op, value) for op in self.ops for value in col_values]
+        masks = [sum(1 << i for i, row_value in enumerate(self.row_values) if self.valid(op, row_value, value))
+                 for op, value in self.terms]
+
+        self.groups, self.cumulative = [], []
+        total = 0
+        need = cols - 1
+        stack = [((), -1, (1 << len(self.row_values)) - 1)]
+        while stack:
+            chosen, last, mask = stack.pop()
+            if len(chosen) == rows - 1:
+                total += math.comb(bin(mask).count("1"), need)
+                self.groups.append((chosen, [v for i, v in enumerate(self.row_values) if mask >> i & 1]))
+                self.cumulative.append(total)
+                continue
+            for index in range(len(self.terms) - 1, last, -1):
+                new_mask = mask & masks[index]
+                if bin(new_mask).count("1") >= need:
+                    stack.append((chosen + (index,), index, new_mask))
+        if not self.groups:
+            raise ValueError("没有满足要求的表格")
+
+    @property
+    def total(self):
+        """合法表格的总数（按第一行、第一列的取值集合计）"""
+        return self.cumulative[-1]
+
+    def valid(self, op, row_value, col_value):
+        value = OPERATIONS[op](row_value, col_value)
+        return value is not None and self.result[0] <= value <= self.result[1]
+
+    def sample(self, rng=random):
+        """等概率抽取一张表格，返回 (第一行, 第一列)，第一个元素都是运算符号"""
+        chosen, row_values = self.groups[bisect.bisect_right(self.cumulative, rng.randrange(self.total))]
+        first_row = rng.sample(row_values, self.cols - 1)
+        first_col = [self.terms[index] if len(self.ops) > 1 else self.terms[index][1] for index in chosen]
+        if self.sort:
+            first_row.sort()
+        else:
+            rng.shuffle(first_col)
+        return [self.symbol] + first_row, [self.symbol] + first_col
+
+
+_table_spaces = {}
+
+
+def get_table_space(operation):
+    """operation 为预设名称（见 PRESETS）时返回缓存的 TableSpace，也可以直接传入 TableSpace"""
+    if isinstance(operation, TableSpace):
+        return operation
+    if operation not in _table_spaces:
+        _table_spaces[operation] = TableSpace(**PRESETS[operation])
+    return _table_spaces[operation]
 
 
 # 随机生成第一行和第一列的数字（不允许重复）
-def generate_table_data(operation):
-    if operation == "add":
-        # 加法：第一行和第一列的数字随机生成，范围为1到9，且不允许重复
-        first_row = random.sample(range(1, 10), TABLE_COLS - 1)
-        first_row.insert(0, "+")  # 第一列第一行是 "+"
-
-        first_col = random.sample(range(1, 10), TABLE_ROWS - 1)
-        first_col.insert(0, "+")  # 第一行第一列是 "+"
-    elif operation == "subtract":
-        # 生成足够多的数字供选择
-        all_numbers = list(range(1, 19))
-        first_row = []
-        first_col = []
-        # 先确定第一列的数字
-        first_col = random.sample(all_numbers, TABLE_ROWS - 1)
-        first_col.sort()
-        remaining_numbers = [num for num in all_numbers if num not in first_col]
-        # 为第一行选择合适的数字，确保大于等于第一列的对应数字
-        for col_index in range(TABLE_COLS - 1):
-            valid_numbers = [num for num in remaining_numbers if num >= max(first_col, default=0)]
-            if not valid_numbers:
-                # 如果没有合适的数字，重新生成
-                return generate_table_data(operation)
-            chosen_num = random.choice(valid_numbers)
-            first_row.append(chosen_num)
-            remaining_numbers.remove(chosen_num)
-        first_row.sort()
-        first_row.insert(0, "-")
-        first_col.insert(0, "-")
-
-    return first_row, first_col
+# 在所有合法的表格中等概率抽取，不需要重试
+def generate_table_data(operation, rng=random):
+    return get_table_space(operation).sample(rng)
 
 
 # 计算表格中某个空格的值
+# 加减混合等多种运算的表格中，第一列是 (运算, 数字)
 def calculate_cell_value(row, col, first_row, first_col, operation):
     if row == 0 or col == 0:  # 第一行或第一列
         return first_row[col] if row == 0 else first_col[row]
     else:  # 其他空格
-        if operation == "add":
-            return first_row[col] + first_col[row]
-        elif operation == "subtract":
-            return first_row[col] - first_col[row]
+        term = first_col[row]
+        op, value = term if isinstance(term, tuple) else (get_table_space(operation).ops[0], term)
+        return OPERATIONS[op](first_row[col], value)
+
+
+# 第一行、第一列中一格的文字
+def header_text(value):
+    if isinstance(value, tuple):
+        return SYMBOLS[value[0]] + str(value[1])
+    return str(value)
 
 
 # 绘制一个表格
-def draw_table(draw, start_x, start_y, first_row, first_col, operation):
-    font = ImageFont.truetype(FONT_PATH, FONT_SIZE)
+@instrument.timed("table.draw_table")
+def draw_table(canvas, start_x, start_y, first_row, first_col, operation):
+    font = fonts.get_font(FONT_PATH, FONT_SIZE)
 
-    for row in range(TABLE_ROWS):
-        for col in range(TABLE_COLS):
+    for row in range(len(first_col)):
+        for col in range(len(first_row)):
             # 计算单元格的坐标
             x = start_x + col * CELL_WIDTH
             y = start_y + row * CELL_HEIGHT
 
             # 绘制单元格边框
-            draw.rectangle([x, y, x + CELL_WIDTH, y + CELL_HEIGHT], outline="black")
+            canvas.rectangle([x, y, x + CELL_WIDTH, y + CELL_HEIGHT])
 
             # 如果是第一行或第一列，填充数字
             if row == 0 or col == 0:
-                cell_value = calculate_cell_value(row, col, first_row, first_col, operation)
-                text = str(cell_value) if cell_value != "+" and cell_value != "-" else cell_value
-
-                # 计算文本尺寸
-                text_bbox = font.getbbox(text)
-                text_width = text_bbox[2] - text_bbox[0]
-                text_height = text_bbox[3] - text_bbox[1]
+                text = header_text(calculate_cell_value(row, col, first_row, first_col, operation))
 
-                # 居中绘制文本
-                draw.text(
-                    (x + (CELL_WIDTH - text_width) // 2, y + (CELL_HEIGHT - text_height) // 2),
-                    text,
-                    fill="black",
-                    font=font
-                )
+                # 居中绘制
+                canvas.text_centered((x, y, CELL_WIDTH, CELL_HEIGHT), text, font)
 
 
-# 随机选择两个空格并填写答案
-def fill_example_answers(draw, start_x, start_y, first_row, first_col, operation):
-    font = ImageFont.truetype(FONT_PATH, FONT_SIZE)
-
-    # 随机选择两个空格（排除第一行和第一列）
-    example_cells = random.sample(
-        [(row, col) for row in range(1, TABLE_ROWS) for col in range(1, TABLE_COLS)],
+# 随机选择两个空格（排除第一行和第一列）作为示例答案
+def pick_example_cells(rows=TABLE_ROWS, cols=TABLE_COLS, rng=random):
+    return rng.sample(
+        [(row, col) for row in range(1, rows) for col in range(1, cols)],
         2
     )
 
-    for row, col in example_cells:
+
+# 在指定的空格中填写答案
+def fill_answers(canvas, start_x, start_y, first_row, first_col, operation, cells):
+    font = fonts.get_font(FONT_PATH, FONT_SIZE)
+
+    for row, col in cells:
         # 计算单元格的坐标
         x = start_x + col * CELL_WIDTH
         y = start_y + row * CELL_HEIGHT
@@ -123,29 +200,21 @@ def fill_example_answers(draw, start_x, start_y, first_row, first_col, operation
         cell_value = calculate_cell_value(row, col, first_row, first_col, operation)
         text = str(cell_value)
 
-        # 计算文本尺寸
-        text_bbox = font.getbbox(text)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_height = text_bbox[3] - text_bbox[1]
+        # 居中绘制
+        canvas.text_centered((x, y, CELL_WIDTH, CELL_HEIGHT), text, font)
 
-        # 居中绘制文本
-        draw.text(
-            (x + (CELL_WIDTH - text_width) // 2, y + (CELL_HEIGHT - text_height) // 2),
-            text,
-            fill="black",
-            font=font
-        )
 
+# 随机选择两个空格并填写答案
+def fill_example_answers(canvas, start_x, start_y, first_row, first_col, operation, rng=random):
+    cells = pick_example_cells(len(first_col), len(first_row), rng)
+    fill_answers(canvas, start_x, start_y, first_row, first_col, operation, cells)
 
-# 生成一页A4纸的图片
-def generate_a4_page(operation):
-    # 创建空白A4纸图片
-    image = Image.new("RGB", (A4_WIDTH, A4_HEIGHT), "white")
-    draw = ImageDraw.Draw(image)
 
+# 一页A4纸上各个表格左上角的坐标
+def table_positions(rows=TABLE_ROWS, cols=TABLE_COLS):
     # 计算每个表格的宽度和高度
-    table_width = CELL_WIDTH * TABLE_COLS
-    table_height = CELL_HEIGHT * TABLE_ROWS
+    table_width = CELL_WIDTH * cols
+    table_height = CELL_HEIGHT * rows
 
     # 计算每行和每列可以放置的表格数量
     tables_per_row = (A4_WIDTH - 2 * MARGIN) // (table_width + TABLE_SPACING)
@@ -155,41 +224,86 @@ def generate_a4_page(operation):
     start_x = (A4_WIDTH - (tables_per_row * table_width + (tables_per_row - 1) * TABLE_SPACING)) // 2
     start_y = (A4_HEIGHT - (tables_per_col * table_height + (tables_per_col - 1) * TABLE_SPACING)) // 2
 
-    # 生成并绘制多个表格
-    for i in range(tables_per_row):
-        for j in range(tables_per_col):
-            # 计算当前表格的起始坐标
-            table_start_x = start_x + i * (table_width + TABLE_SPACING)
-            table_start_y = start_y + j * (table_height + TABLE_SPACING)
-
-            # 生成表格数据
-            first_row, first_col = generate_table_data(operation)
-
-            # 绘制表格
-            draw_table(draw, table_start_x, table_start_y, first_row, first_col, operation)
-
-            # 填写两个空格的答案
-            fill_example_answers(draw, table_start_x, table_start_y, first_row, first_col, operation)
-
-    # 保存图片
-    current_time = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    image_path = os.path.join("images", f"biaogeguilv-{operation}-{current_time}.jpg")
-    image.save(image_path)
-    print(f"A4纸图片已生成：{image_path}")
+    return [(start_x + i * (table_width + TABLE_SPACING), start_y + j * (table_height + TABLE_SPACING))
+            for i in range(tables_per_row) for j in range(tables_per_col)]
+
+
+# 生成一页的表格数据：[(第一行, 第一列, 示例答案的空格), ...]
+@instrument.timed("table.generate")
+def generate_page_tables(operation, rng=random):
+    space = get_table_space(operation)
+    tables = []
+    for _ in table_positions(space.rows, space.cols):
+        first_row, first_col = space.sample(rng)
+        tables.append((first_row, first_col, pick_example_cells(space.rows, space.cols, rng)))
+    return tables
+
+
+# 在一页A4纸的画布上画出全部表格；answers 为 True 时填满所有空格（答案页），page_id 为页面编号，写在页脚
+@instrument.timed("table.draw")
+def draw_a4_page(canvas, operation, tables=None, answers=False, page_id=None):
+    if tables is None:
+        tables = generate_page_tables(operation)
+    space = get_table_space(operation)
+    all_cells = [(row, col) for row in range(1, space.rows) for col in range(1, space.cols)]
+    positions = table_positions(space.rows, space.cols)
+
+    for (table_start_x, table_start_y), (first_row, first_col, example_cells) in zip(positions, tables):
+        # 绘制表格
+        draw_table(canvas, table_start_x, table_start_y, first_row, first_col, operation)
+
+        # 填写示例答案（答案页填写全部空格）
+        cells = all_cells if answers else example_cells
+        fill_answers(canvas, table_start_x, table_start_y, first_row, first_col, operation, cells)
+
+    if page_id:
+        render.draw_footer(canvas, page_id)
+
+
+# 生成一页A4纸并保存题目页和答案页（填满全部空格），返回保存的文件路径；
+# fmt 为 jpg、png、tif（位图）或 pdf、svg（矢量），mode 为位图的颜色模式；jpg、png 时答案页文件名加 -answer
+# 不指定文件名时按时间命名，同一秒内生成的多页不会互相覆盖；随机数都取自 rng
+def generate_a4_page(operation, output_dir="images", filename=None, fmt="jpg", rng=random, page_id=None,
+                     mode="RGB"):
+    if filename is None:
+        path = render.unique_path(output_dir, f"biaogeguilv-{operation}", fmt, mode)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, filename)
+    tables = generate_page_tables(operation, rng)
+    with render.discard_on_error(path, filename is None), render.open_document(path, mode) as document:
+        document.add_page(lambda canvas: draw_a4_page(canvas, operation, tables, page_id=page_id))
+        document.add_page(lambda canvas: draw_a4_page(canvas, operation, tables, True, page_id), section="answers")
+    return tuple(document.paths)
 
 
 # 主程序
 if __name__ == "__main__":
-    # 用户选择加法或减法
+    # 用户选择运算类型
+    menu = [
+        ("add", "加法（结果在20以内）"),
+        ("subtract", "减法（减数小于19，结果在10以内且为正数）"),
+        ("multiply", "乘法（表内乘法）"),
+        ("divide", "除法（两位数除以一位数，能整除）"),
+        ("add100", "加法（结果在100以内）"),
+        ("subtract100", "减法（100以内，结果不为负数）"),
+        ("mixed", "加减混合（20以内，结果不为负数）"),
+    ]
+    choices = [str(k + 1) for k in range(len(menu))]
     print("请选择操作类型：")
-    print("1. 加法（结果在20以内）")
-    print("2. 减法（减数小于19，结果在10以内且为正数）")
-    choice = input("请输入 1 或 2：").strip()
-    while choice not in ["1", "2"]:
+    for key, (_, description) in zip(choices, menu):
+        print(f"{key}. {description}")
+    choice = input(f"请输入 1 到 {len(menu)}：").strip()
+    while choice not in choices:
         print("输入无效，请重新输入！")
-        choice = input("请输入 1 或 2：").strip()
+        choice = input(f"请输入 1 到 {len(menu)}：").strip()
+
+    operation = menu[int(choice) - 1][0]
 
-    operation = "add" if choice == "1" else "subtract"
+    # 随机选一个种子，页面编号印在页脚，之后可以用 batch.py --regenerate 编号 重新生成这一页
+    seed = random.randrange(10 ** 6)
+    page_id = pageid.format_id("biaogeguilv", operation, seed, 0)
 
     # 生成A4纸图片
-    generate_a4_page(operation)
\ No newline at end of file
+    paths = generate_a4_page(operation, rng=pageid.page_rng(seed, 0), page_id=page_id)
+    print(f"A4纸图片已生成：{', '.join(paths)}，页面编号：{page_id}")
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""表格规律出题的性能测试和分布检查
+
+用法：python benchmark.py [每项测试秒数] [每种运算的抽样次数]
+比较原来的出题（减法每次重新生成候选数字，选不出时递归重来）与按预先枚举的索引抽取
+每秒能生成的表格数，以及各预设建立索引的耗时和每秒出题数；再大量抽样，检查每张表格都满足题目要求，
+合法表格不太多的预设再用卡方检验确认所有合法表格被抽到的概率相同。
+"""
+import collections
+import math
+import random
+import sys
+import time
+
+import BiaogeGuilv
+
+
+def legacy_table_data(operation):
+    """原来的 generate_table_data"""
+    if operation == "add":
+        first_row = random.sample(range(1, 10), BiaogeGuilv.TABLE_COLS - 1)
+        first_col = random.sample(range(1, 10), BiaogeGuilv.TABLE_ROWS - 1)
+        return ["+"] + first_row, ["+"] + first_col
+    all_numbers = list(range(1, 19))
+    first_row = []
+    first_col = random.sample(all_numbers, BiaogeGuilv.TABLE_ROWS - 1)
+    first_col.sort()
+    remaining_numbers = [num for num in all_numbers if num not in first_col]
+    for _ in range(BiaogeGuilv.TABLE_COLS - 1):
+        valid_numbers = [num for num in remaining_numbers if num >= max(first_col, default=0)]
+        if not valid_numbers:
+            return legacy_table_data(operation)
+        chosen_num = random.choice(valid_numbers)
+        first_row.append(chosen_num)
+        remaining_numbers.remove(chosen_num)
+    first_row.sort()
+    return ["-"] + first_row, ["-"] + first_col
+
+
+def tables_per_second(func, operation, seconds):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            func(operation)
+        count += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def bench_generate(seconds):
+    print("== 出题（tables/sec）==")
+    print(f"{'运算':<12}{'原来':>12}{'索引抽取':>12}")
+    for operation in ("add", "subtract"):
+        legacy = tables_per_second(legacy_table_data, operation, seconds)
+        new = tables_per_second(BiaogeGuilv.generate_table_data, operation, seconds)
+        print(f"{operation:<12}{legacy:>12.0f}{new:>14.0f}  ({new / legacy:.1f}x)")
+
+    print("== 各预设（建立索引 ms，tables/sec）==")
+    print(f"{'预设':<12}{'合法表格':>16}{'建立索引':>10}{'tables/sec':>12}")
+    for operation, params in BiaogeGuilv.PRESETS.items():
+        start = time.perf_counter()
+        space = BiaogeGuilv.TableSpace(**params)
+        build = (time.perf_counter() - start) * 1000
+        rate = tables_per_second(lambda _: space.sample(), operation, seconds)
+        print(f"{operation:<12}{space.total:>20.3g}{build:>12.1f}{rate:>12.0f}")
+
+
+def violations(operation, first_row, first_col):
+    """表格中不满足题目要求的结果个数"""
+    low, high = BiaogeGuilv.get_table_space(operation).result
+    results = [BiaogeGuilv.calculate_cell_value(row, col, first_row, first_col, operation)
+               for row in range(1, len(first_col)) for col in range(1, len(first_row))]
+    return sum(value is None or not low <= value <= high for value in results)
+
+
+def check_distribution(operation, samples):
+    """抽样 samples 张表格，返回 (不合格的表格数, 抽到的表格种数, 合法表格总数, 卡方检验的 z 值)
+    表格按第一行、第一列的数字集合区分（加法的排列顺序另外随机打乱，不影响集合的分布）。
+    自由度较大时用 Wilson-Hilferty 近似把卡方值换成标准正态的 z 值，|z| < 3 即可认为是均匀分布；
+    合法表格比抽样次数的五分之一还多时不做卡方检验，z 值为 None
+    """
+    total = BiaogeGuilv.get_table_space(operation).total
+    counts = collections.Counter()
+    bad = 0
+    for _ in range(samples):
+        first_row, first_col = BiaogeGuilv.generate_table_data(operation)
+        bad += violations(operation, first_row, first_col) > 0
+        counts[(tuple(sorted(first_row[1:])), tuple(sorted(first_col[1:])))] += 1
+
+    if total * 5 > samples:
+        return bad, len(counts), total, None
+    expected = samples / total
+    chi2 = sum((counts[key] - expected) ** 2 / expected for key in counts) + (total - len(counts)) * expected
+    df = total - 1
+    z = ((chi2 / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return bad, len(counts), total, z
+
+
+def bench_distribution(samples):
+    print(f"== 分布检查（每种运算抽样 {samples} 次）==")
+    print(f"{'预设':<12}{'不合格':>8}{'抽到/合法表格':>16}{'卡方 z':>10}")
+    for operation in BiaogeGuilv.PRESETS:
+        bad, seen, total, z = check_distribution(operation, samples)
+        z = "-" if z is None else f"{z:.2f}"
+        print(f"{operation:<12}{bad:>10}{f'{seen}/{total:.3g}':>18}{z:>12}")
+
+    # 原来的减法：允许结果超过 10
+    legacy_bad = 0
+    for _ in range(samples // 10):
+        legacy_bad += violations("subtract", *legacy_table_data("subtract")) > 0
+    print(f"原来的减法 {samples // 10} 张表格中有 {legacy_bad} 张的结果超出 1~10")
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    random.seed(0)
+    bench_generate(seconds)
+    bench_distribution(samples)
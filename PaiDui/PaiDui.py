@@ -1,104 +1,195 @@
 # -*- coding: utf-8 -*-
+import collections
 import random
-from PIL import Image, ImageDraw, ImageFont
 import os
-import datetime
-import textwrap
-import platform
+import sys
+
+# 共用模块在仓库根目录的 common 包中
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import instrument, lazy, page, pageid  # noqa: E402
+
+# 画页面、排版时才导入（会导入 Pillow），只出题时不加载
+fonts = lazy.module("common.fonts")
+glyphs = lazy.module("common.glyphs")
+layout = lazy.module("common.layout")
+render = lazy.module("common.render")
 
 
 def get_font_path():
-    system_name = platform.system()
-    if system_name == "Windows":
-        font_path = "C:/Windows/Fonts/simhei.ttf"
-    elif system_name == "Linux":
-        font_path = "/usr/share/fonts/wqy-microhei/wqy-microhei.ttc"
-    elif system_name == "Darwin":
-        font_path = "/System/Library/Fonts/PingFang.ttc"
-    else:
-        raise Exception("不支持的操作系统，请手动指定字体文件路径。")
-    if not os.path.exists(font_path) or not os.access(font_path, os.R_OK):
-        raise FileNotFoundError(f"字体文件 {font_path} 不存在或不可读，请检查路径。")
-    return font_path
+    # 依次查找各系统的中文字体（Windows 黑体、Linux 文泉驿、macOS 苹方）
+    return fonts.resolve("cjk")
+
+
+# 队伍人数的默认范围
+MIN_PEOPLE = 5
+MAX_PEOPLE = 15
+
+# 一道题 text 是题目描述（不含序号和提问），answer 是队伍的总人数
+Problem = collections.namedtuple("Problem", "text answer")
+
+# 描述小明位置的说法：total 人的队伍中小明从前往后数第 position 个
+DESCRIPTIONS = {
+    "front_people": ("小明前面有{}个小朋友", lambda total, position: position - 1),
+    "back_people": ("小明后面有{}个小朋友", lambda total, position: total - position),
+    "front_order": ("从前往后数小明是第{}个", lambda total, position: position),
+    "back_order": ("从后往前数小明是第{}个", lambda total, position: total - position + 1),
+}
+
+# 各种题目用到的两种说法：知道小明前后两边的情况就能算出总人数
+PROBLEM_KINDS = {
+    "order": ("front_order", "back_order"),  # 第的题型
+    "custom": ("front_people", "back_people"),  # 有的题型
+    "mixed1": ("front_people", "back_order"),  # 混合题型1
+    "mixed2": ("front_order", "back_people"),  # 混合题型2
+}
+
+_problem_tables = {}
+
+
+def problem_table(kind, min_people=MIN_PEOPLE, max_people=MAX_PEOPLE):
+    """列举一种题目所有合法的队伍，返回 [Problem, ...]，结果按参数缓存
+    队伍有 min_people~max_people 人，小明不在最前面也不在最后面（前后都至少有 1 人），
+    每种 (总人数, 小明的位置) 对应一道题，两种说法的数字确定唯一的总人数
+    """
+    if kind not in PROBLEM_KINDS:
+        raise ValueError(f"未知的题目种类：{kind}")
+    if not 3 <= min_people <= max_people:
+        raise ValueError(f"队伍人数范围无效：{min_people}~{max_people}，至少 3 人")
+    key = (kind, min_people, max_people)
+    if key not in _problem_tables:
+        (front_text, front_value), (back_text, back_value) = (DESCRIPTIONS[name] for name in PROBLEM_KINDS[kind])
+        _problem_tables[key] = [
+            Problem(f"{front_text.format(front_value(total, position))}，"
+                    f"{back_text.format(back_value(total, position))}", total)
+            for total in range(min_people, max_people + 1) for position in range(2, total)
+        ]
+    return _problem_tables[key]
 
 
 # 生成“有的题型”题目
-def generate_custom_problem():
-    total_people = random.randint(5, 15)  # 总人数至少为5
-    target_person = random.randint(2, total_people - 1)  # 确保小明不在最前面或最后面
-    front_people = random.randint(1, max(1, target_person - 1))  # 前面至少有1人，确保范围有效
-    back_people = total_people - target_person  # 后面至少有1人
-    problem = f"小明前面有{front_people}个小朋友，后面有{back_people}个小朋友"
-    return problem
+def generate_custom_problem(rng=random):
+    return rng.choice(problem_table("custom")).text
 
 
 # 生成“第的题型”题目
-def generate_order_custom_problem():
-    total_people = random.randint(5, 15)  # 总人数至少为5
-    front_order = random.randint(2, max(2, total_people - 1))  # 前面至少第2名，确保范围有效
-    back_order = random.randint(2, max(2, total_people - front_order))  # 后面至少第2名，确保范围有效
-    problem = f"从前往后数小明前面第{front_order}个，从后往前数小明后面第{back_order}个"
-    return problem
+def generate_order_custom_problem(rng=random):
+    return rng.choice(problem_table("order")).text
 
 
 # 生成混合题型1
-def generate_mixed_problem1():
-    total_people = random.randint(5, 15)  # 总人数至少为5
-    target_person = random.randint(2, total_people - 1)  # 确保小明不在最前面或最后面
-    front_people = random.randint(1, max(1, target_person - 1))  # 前面至少有1人，确保范围有效
-    back_order = random.randint(2, max(2, total_people - target_person))  # 后面至少第2名，确保范围有效
-    problem = f"小明前面有{front_people}个小朋友，从后往前数小明是第{back_order}个"
-    return problem
+def generate_mixed_problem1(rng=random):
+    return rng.choice(problem_table("mixed1")).text
 
 
 # 生成混合题型2
-def generate_mixed_problem2():
-    total_people = random.randint(5, 15)  # 总人数至少为5
-    target_person = random.randint(2, total_people - 1)  # 确保小明不在最前面或最后面
-    front_order = random.randint(2, max(2, target_person))  # 前面至少第2名，确保范围有效
-    back_people = random.randint(1, max(1, total_people - target_person))  # 后面至少有1人，确保范围有效
-    problem = f"从前往后数小明是第{front_order}个，小明后面有{back_people}个小朋友"
-    return problem
+def generate_mixed_problem2(rng=random):
+    return rng.choice(problem_table("mixed2")).text
 
 
-# 绘制题目到图片
+# 绘制题目到图片：在能放下的范围内用尽量大的字号（不超过 font 的字号），返回题目高度
 def draw_problem(draw, font, problem, x, y, max_width, max_height):
-    parts = problem.split('\n')
-    total_height = 0
-    for part in parts:
-        available_width = max_width - x
-        char_width = font.getbbox('A')[2] - font.getbbox('A')[0]
-        num_chars = available_width // char_width
-        wrapped_part = textwrap.fill(part, width=num_chars)
-        bbox = draw.multiline_textbbox((x, y + total_height), wrapped_part, font=font)
-        text_height = bbox[3] - bbox[1]
-        if y + total_height + text_height > max_height:
-            new_font_size = font.size - 5
-            new_font = ImageFont.truetype(font.path, new_font_size)
-            return draw_problem(draw, new_font, problem, x, y, max_width, max_height)
-        draw.multiline_text((x, y + total_height), wrapped_part, fill='black', font=font)
-        total_height += text_height
-    return total_height
+    block = layout.fit_blocks([problem], font.path, font.size, max_width - x, max_height - y)[0]
+    layout.draw_block(render.RasterCanvas.wrap(draw), block, x, y)
+    return block.height
+
+
+# 排版一页题目：返回 [(纵坐标, Block), ...]
+# 所有题目按同一字号排版（二分查找能放下的最大字号，不超过 font_size），剩余高度平均分作间距
+@instrument.timed("queue.layout")
+def layout_problems(problems, font_path, font_size, x, top, max_width, max_height):
+    blocks = layout.fit_blocks(problems, font_path, font_size, max_width - x, max_height - top)
+    spacing = (max_height - top - sum(block.height for block in blocks)) / (len(blocks) + 1)
+    plan = []
+    y_position = top
+    for block in blocks:
+        plan.append((y_position, block))
+        y_position += block.height + spacing  # 增加间距
+    return plan
+
+
+# 题型名称映射
+PROBLEM_TYPES = {
+    1: "第的题型",
+    2: "有的题型",
+    3: "混合题型"
+}
+
+# 各题型包含的题目种类
+TYPE_KINDS = {
+    1: ("order",),
+    2: ("custom",),
+    3: ("mixed1", "mixed2"),
+}
+
+
+# 生成一页的题目：[Problem, ...]，text 添加了序号、“小朋友们排队” 并换行，以及在问题后添加换行和提问
+# 从列举好的合法队伍中等概率抽取，每道题都能算出唯一的答案；随机数都取自 rng
+@instrument.timed("queue.generate")
+def generate_problems(choice, num_problems=8, min_people=MIN_PEOPLE, max_people=MAX_PEOPLE, rng=random):
+    if choice not in TYPE_KINDS:
+        raise ValueError(f"未知的题型：{choice}")
+    if num_problems < 1:
+        raise ValueError(f"题目数量至少为 1：{num_problems}")
+    table = [problem for kind in TYPE_KINDS[choice] for problem in problem_table(kind, min_people, max_people)]
+    problems = []
+    for i in range(num_problems):
+        problem = rng.choice(table)
+        problems.append(Problem(f"题目{i + 1}：小朋友们排队，\n{problem.text}\n请问一共有几个小朋友？", problem.answer))
+    return problems
 
 
-# 主函数
-def main():
+# 在一页A4纸的画布上画出标题和题目，不传 problems 时随机生成；answers 为 True 时画答案页（每题后写出答案）
+# page_id 为页面编号，写在页脚（排版时总是留出页脚的高度）
+@instrument.timed("queue.draw")
+def draw_page(canvas, choice, problems=None, answers=False, page_id=None):
+    if problems is None:
+        problems = generate_problems(choice)
+    texts = [problem.text for problem in problems]
+    if answers:
+        texts = [f"{problem.text}\n答：一共有{problem.answer}个小朋友。" for problem in problems]
+
     # A4纸尺寸（像素，300dpi）
-    width, height = 2480, 3508
-    # 创建白色背景图片
-    image = Image.new('RGB', (width, height), 'white')
-    draw = ImageDraw.Draw(image)
+    width, height = page.A4_WIDTH, page.A4_HEIGHT
+
+    font_path = get_font_path()
+    # 标题字体大小设为100
+    title_font = fonts.get_font(font_path, 100)
+
+    # 标题
+    title = f"排队问题（{PROBLEM_TYPES[choice]}）" + ("答案" if answers else "")
+    title_width = glyphs.text_size(title_font, title)[0]
+    canvas.text((width / 2 - title_width / 2, 50), title, title_font)
+
+    y_position = 200
+    max_width = width - 100  # 预留左右边距各50像素
+    max_height = height - page.FOOTER_HEIGHT  # 预留页脚
+
+    # 先排版（只测量，不用画布），再照着排版结果绘制
+    for y, block in layout_problems(texts, font_path, 75, 50, y_position, max_width, max_height):
+        layout.draw_block(canvas, block, 50, y)
+
+    if page_id:
+        render.draw_footer(canvas, page_id)
 
-    try:
-        font_path = get_font_path()
-        # 标题字体大小设为100
-        title_font = ImageFont.truetype(font_path, 100)
-        # 题目字体大小设为75
-        problem_font = ImageFont.truetype(font_path, 75)
-    except FileNotFoundError as e:
-        print(e)
-        return
 
+# 生成一页排队问题和答案页并保存，返回 (题目文件路径, 答案文件路径)；fmt 为 jpg、png（位图）或 pdf、svg（矢量）
+# pdf、tiff 时题目和答案存成一份两页的文档，只返回一个路径；mode 为位图的颜色模式；随机数都取自 rng
+def generate_page(choice, output_dir="images", filename=None, fmt="jpg", rng=random, page_id=None, mode="RGB"):
+    # 不指定文件名时按时间命名，同一秒内生成的多页不会互相覆盖
+    if filename is None:
+        path = render.unique_path(output_dir, "paidui", fmt, mode)
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, filename)
+    problems = generate_problems(choice, rng=rng)
+    with render.discard_on_error(path, filename is None), render.open_document(path, mode) as document:
+        document.add_page(lambda canvas: draw_page(canvas, choice, problems, page_id=page_id))
+        document.add_page(lambda canvas: draw_page(canvas, choice, problems, True, page_id), section="answers")
+    return tuple(document.paths)
+
+
+# 主函数
+def main():
     # 让用户选择题型
     print("请选择题型：")
     print("1. 第的题型")
@@ -113,77 +204,17 @@ def main():
         print("无效选择，请输入1、2或3。")
         return
 
-    # 题型名称映射
-    problem_types = {
-        1: "第的题型",
-        2: "有的题型",
-        3: "混合题型"
-    }
-
-    # 标题
-    title = f"排队问题（{problem_types[choice]}）"
-    title_bbox = draw.textbbox((0, 0), title, font=title_font)
-    title_width = title_bbox[2] - title_bbox[0]
-    draw.text((width / 2 - title_width / 2, 50), title, fill='black', font=title_font)
-
-    # 题目生成器
-    problem_generators = {
-        1: generate_order_custom_problem,
-        2: generate_custom_problem,
-        3: lambda: random.choice([generate_mixed_problem1, generate_mixed_problem2])()
-    }
-
-    # 生成题目数量
-    num_problems = 8
-    y_position = 200
-    max_width = width - 100  # 预留左右边距各50像素
-
-    # 计算剩余高度
-    remaining_height = height - y_position
-
-    total_problem_height = 0
-    problem_heights = []
-
-    # 先计算所有题目高度
-    temp_draw = ImageDraw.Draw(Image.new('RGB', (width, height)))
-    for i in range(num_problems):
-        problem = problem_generators[choice]()
-        # 添加序号、“小朋友们排队” 并换行，以及在问题后添加换行和提问
-        numbered_problem = f"题目{i + 1}：小朋友们排队，\n{problem}\n请问一共有几个小朋友？"
-        # 计算题目高度
-        problem_height = draw_problem(temp_draw, problem_font, numbered_problem, 50, 0, max_width, height)
-        problem_heights.append(problem_height)
-        total_problem_height += problem_height
-
-    # 计算每题之间的间距
-    spacing = (remaining_height - total_problem_height) / (num_problems + 1)
-
-    y_position = 200
-    # 绘制题目
-    for i in range(num_problems):
-        problem = problem_generators[choice]()
-        # 添加序号、“小朋友们排队” 并换行，以及在问题后添加换行和提问
-        numbered_problem = f"题目{i + 1}：小朋友们排队，\n{problem}\n请问一共有几个小朋友？"
-        # 绘制题目
-        problem_height = draw_problem(draw, problem_font, numbered_problem, 50, y_position, max_width, height)
-        y_position += problem_height + spacing  # 增加间距
-
-    # 生成包含时间的文件名
-    current_time = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f"paidui-{current_time}.jpg"
-    # 保存图片到images目录
-    if not os.path.exists('images'):
-        try:
-            os.makedirs('images')
-        except OSError as e:
-            print(f"创建目录失败: {e}")
-            return
+    # 随机选一个种子，页面编号印在页脚，之后可以用 batch.py --regenerate 编号 重新生成这一页
+    seed = random.randrange(10 ** 6)
+    page_id = pageid.format_id("paidui", choice, seed, 0)
     try:
-        image.save(os.path.join('images', filename))
-        print(f"图片已保存为 {filename}")
-    except Exception as e:
+        paths = generate_page(choice, rng=pageid.page_rng(seed, 0), page_id=page_id)
+        print(f"图片已保存为 {', '.join(os.path.basename(path) for path in paths)}，页面编号：{page_id}")
+    except FileNotFoundError as e:
+        print(e)
+    except OSError as e:
         print(f"保存图片失败: {e}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
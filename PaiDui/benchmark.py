@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""排队问题排版的性能测试
+
+用法：python benchmark.py [每项测试秒数]
+比较原来的排版（临时 A4 画布测量、按 "A" 的宽度估算字数、放不下就字号减 5 重排）
+和 common.layout 的排版（按实际字宽折行、二分查找字号、只测量不画）每页的耗时。
+本机没有中文字体时用 sans 字体代替，只影响字形，不影响比较。
+"""
+import random
+import sys
+import textwrap
+import time
+
+from PIL import Image, ImageDraw
+
+import PaiDui
+from common import fonts, layout
+
+WIDTH, HEIGHT = 2480, 3508
+
+
+def _font_name():
+    try:
+        return PaiDui.get_font_path()
+    except FileNotFoundError:
+        return "sans"
+
+
+def _problems(rng_seed=0):
+    random.seed(rng_seed)
+    generators = [PaiDui.generate_order_custom_problem, PaiDui.generate_custom_problem,
+                  PaiDui.generate_mixed_problem1, PaiDui.generate_mixed_problem2]
+    return [f"题目{i + 1}：小朋友们排队，\n{random.choice(generators)()}\n请问一共有几个小朋友？"
+            for i in range(8)]
+
+
+def legacy_height(draw, font, problem, x, y, max_width, max_height):
+    """原来的 draw_problem 的测量部分"""
+    total_height = 0
+    for part in problem.split('\n'):
+        char_width = font.getbbox('A')[2] - font.getbbox('A')[0]
+        wrapped_part = textwrap.fill(part, width=(max_width - x) // char_width)
+        bbox = draw.multiline_textbbox((0, 0), wrapped_part, font=font)
+        text_height = bbox[3] - bbox[1]
+        if y + total_height + text_height > max_height:
+            return legacy_height(draw, fonts.get_font(font.path, font.size - 5), problem, x, y, max_width, max_height)
+        total_height += text_height
+    return total_height
+
+
+def legacy_layout(problems, font_name):
+    font = fonts.get_font(font_name, 75)
+    temp_draw = ImageDraw.Draw(Image.new('RGB', (WIDTH, HEIGHT)))
+    return [legacy_height(temp_draw, font, problem, 50, 0, WIDTH - 100, HEIGHT) for problem in problems]
+
+
+def new_layout(problems, font_name):
+    return PaiDui.layout_problems(problems, font_name, 75, 50, 200, WIDTH - 100, HEIGHT)
+
+
+def ms_per_page(layout_func, problems, font_name, seconds):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        layout_func(problems, font_name)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / count * 1000
+
+
+def bench_layout(seconds):
+    font_name = _font_name()
+    problems = _problems()
+    print(f"== 排版（ms/page，字体 {font_name}）==")
+    legacy = ms_per_page(legacy_layout, problems, font_name, seconds)
+    new = ms_per_page(new_layout, problems, font_name, seconds)
+    print(f"{'临时画布 + 字号减 5':<20}{legacy:>10.2f}")
+    print(f"{'按字宽折行 + 二分字号':<19}{new:>10.2f}  ({legacy / new:.1f}x)")
+
+    # 窄版面逼迫缩小字号：原来每次减 5 全部重排，二分查找只排 log2(字号范围) 次
+    print("== 放不下时缩小字号（ms/page，版面高度 1200）==")
+    narrow = ms_per_page(lambda p, f: layout.fit_blocks(p, f, 75, WIDTH - 150, 1200), problems, font_name, seconds)
+    blocks = layout.fit_blocks(problems, font_name, 75, WIDTH - 150, 1200)
+    print(f"{'二分查找字号':<20}{narrow:>10.2f}  (字号 {blocks[0].font.size})")
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    bench_layout(seconds)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""数独生成性能测试：比较不同求解引擎每秒能生成多少个棋盘，每道谜题的挖空耗时，
+难度评级速度，用对称变换派生题目时每秒得到的题目数，逐格校验与 NumPy 批量校验的速度，
+每页图片的绘制耗时，以及 12x12、16x16 和锯齿数独的生成速度（12x12 与位掩码引擎对比）
+
+用法：python benchmark.py [每个尺寸的测试秒数]
+"""
+import sys
+import time
+
+import regions
+from grader import grade_puzzle
+from ShuDu import (ENGINES, create_puzzle, create_sudoku_image, generate_puzzles, generate_sudoku,
+                   is_valid)
+
+
+def boards_per_second(size, engine, seconds=2.0, layout=None):
+    """在给定时间内反复生成棋盘，返回每秒生成的棋盘数；layout 为区域布局"""
+    count = 0
+    start = time.perf_counter()
+    while True:
+        if generate_sudoku(size, engine, regions=layout) is None:
+            raise RuntimeError(f"{engine} 引擎生成 {size}x{size} 数独失败")
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def bench_generate(seconds):
+    print("== 棋盘生成（boards/sec）==")
+    print(f"{'尺寸':<6}" + "".join(f"{engine:>12}" for engine in ENGINES))
+    for size in (4, 6, 9):
+        rates = [boards_per_second(size, engine, seconds) for engine in ENGINES]
+        print(f"{size}x{size:<4}" + "".join(f"{rate:>12.1f}" for rate in rates))
+
+
+def ms_per_puzzle(size, unique, seconds=2.0, layout=None):
+    """反复对预先生成的棋盘挖空，返回每道谜题的平均耗时（毫秒）和平均空格数"""
+    boards = [generate_sudoku(size, regions=layout) for _ in range(50)]
+    count = holes = 0
+    start = time.perf_counter()
+    while True:
+        puzzle = create_puzzle(boards[count % len(boards)], size, unique=unique, regions=layout)
+        holes += sum(row.count(0) for row in puzzle)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed * 1000 / count, holes / count
+
+
+def bench_carve(seconds):
+    print("== 挖空（ms/puzzle，平均空格数）==")
+    print(f"{'尺寸':<6}{'随机挖空':>16}{'唯一解挖空':>16}")
+    for size in (4, 6, 9):
+        cells = []
+        for unique in (False, True):
+            ms, holes = ms_per_puzzle(size, unique, seconds)
+            cells.append(f"{ms:>9.3f} ({holes:>4.1f})")
+        print(f"{size}x{size:<4}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+def puzzles_graded_per_second(size, seconds=2.0):
+    """反复给预先生成的唯一解谜题评级，返回每秒评级的谜题数"""
+    puzzles = [create_puzzle(generate_sudoku(size), size) for _ in range(50)]
+    count = 0
+    start = time.perf_counter()
+    while True:
+        grade_puzzle(puzzles[count % len(puzzles)], size)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def bench_grade(seconds):
+    print("== 难度评级（puzzles/sec）==")
+    for size in (4, 6, 9):
+        print(f"{size}x{size:<4}{puzzles_graded_per_second(size, seconds):>12.1f}")
+
+
+def puzzles_per_second(size, variants, seconds=2.0):
+    """按整页（15 道）生成唯一解谜题，返回每秒得到的谜题数"""
+    count = 0
+    start = time.perf_counter()
+    while True:
+        count += len(generate_puzzles(size, 15, variants=variants)[0])
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def bench_augment(seconds):
+    print("== 整页出题（puzzles/sec）==")
+    print(f"{'尺寸':<6}" + "".join(f"{f'派生x{v}':>12}" for v in (1, 5, 15)))
+    for size in (4, 6, 9):
+        rates = [puzzles_per_second(size, v, seconds) for v in (1, 5, 15)]
+        print(f"{size}x{size:<4}" + "".join(f"{rate:>14.1f}" for rate in rates))
+
+
+def is_valid_board(board, size):
+    """逐格用 is_valid 校验一个填满的棋盘，作为批量校验的对照"""
+    for row in range(size):
+        for col in range(size):
+            num = board[row][col]
+            board[row][col] = 0
+            valid = is_valid(board, row, col, num, size)
+            board[row][col] = num
+            if not valid:
+                return False
+    return True
+
+
+def bench_validate(seconds):
+    print("== 校验解（boards/sec）==")
+    try:
+        import board_array
+    except ImportError:
+        print("未安装 numpy，跳过批量校验测试")
+        return
+    print(f"{'尺寸':<6}{'逐格校验':>12}{'批量校验':>14}")
+    for size in (4, 6, 9):
+        boards = [generate_sudoku(size) for _ in range(1000)]
+        start = time.perf_counter()
+        rounds = 0
+        while time.perf_counter() - start < seconds:
+            assert all(is_valid_board(board, size) for board in boards[:100])
+            rounds += 1
+        list_rate = rounds * 100 / (time.perf_counter() - start)
+
+        batch = board_array.to_array(boards)
+        start = time.perf_counter()
+        rounds = 0
+        while time.perf_counter() - start < seconds:
+            assert board_array.validate_batch(batch, size).all()
+            rounds += 1
+        array_rate = rounds * len(boards) / (time.perf_counter() - start)
+        print(f"{size}x{size:<4}{list_rate:>12.1f}{array_rate:>16.1f}")
+
+
+def ms_per_page(size, seconds=2.0):
+    """交替绘制题目页和答案页，返回每页的平均绘制耗时（毫秒，不含编码保存）"""
+    puzzles, solutions = generate_puzzles(size, 15)
+    create_sudoku_image(puzzles, size)  # 预热：字体加载、网格模板等缓存
+    count = 0
+    start = time.perf_counter()
+    while True:
+        if count % 2:
+            create_sudoku_image(solutions, size, is_answer=True, original_boards=puzzles)
+        else:
+            create_sudoku_image(puzzles, size)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed * 1000 / count
+
+
+def bench_render(seconds):
+    print("== 绘制页面（ms/page）==")
+    for size in (4, 6, 9):
+        print(f"{size}x{size:<4}{ms_per_page(size, seconds):>12.1f}")
+
+
+def bench_large(seconds):
+    # 位掩码引擎在 16x16 的空棋盘上偶尔会陷入很久的搜索，回溯法更慢，所以大尺寸只有 12x12 与 DLX 对比
+    print("== 大尺寸与锯齿数独（boards/sec，唯一解挖空 ms/puzzle）==")
+    print(f"{'':<10}{'dlx':>12}{'bitmask':>12}{'挖空':>12}")
+    boards = [("12x12", 12, None), ("16x16", 16, None)]
+    boards += [(f"锯齿{size}x{size}", size, regions.jigsaw_regions(size, 1)) for size in sorted(regions.JIGSAW_LAYOUTS)]
+    for name, size, layout in boards:
+        dlx_rate = boards_per_second(size, "dlx", seconds, layout)
+        bitmask = f"{boards_per_second(size, 'bitmask', seconds, layout):>12.1f}" if size == 12 else f"{'-':>12}"
+        ms, _ = ms_per_puzzle(size, True, seconds, layout)
+        print(f"{name:<10}{dlx_rate:>12.1f}{bitmask}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    bench_large(seconds)
+    bench_generate(seconds)
+    bench_carve(seconds)
+    bench_grade(seconds)
+    bench_augment(seconds)
+    bench_validate(seconds)
+    bench_render(seconds)
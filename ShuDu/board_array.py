@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""基于 NumPy 的数独棋盘批量表示与校验
+
+一批棋盘存成形状为 (N, size, size) 的 uint8 数组，每格 1 字节（Python 列表每格是一个
+8 字节指针），批量校验、批量套用提示掩码都是整批的向量运算。
+arr[k] 是第 k 个棋盘的视图，不复制数据，可以直接传给 create_sudoku_image 等按
+board[i][j] 取值的函数；to_lists/to_array 在数组和原来的列表表示之间转换。
+
+需要安装 numpy，ShuDu.py 本身不依赖这个模块。
+"""
+import numpy as np
+
+import regions
+
+
+def to_array(boards):
+    """列表表示的一个或多个棋盘 -> uint8 数组"""
+    return np.asarray(boards, dtype=np.uint8)
+
+
+def to_lists(arr):
+    """数组 -> 列表表示，兼容原来的列表接口"""
+    return arr.tolist()
+
+
+def _units(batch, size):
+    """把 (N, size, size) 的批次整理成行、列、宫三组单元，每组形状为 (N, 单元数, 单元格数)"""
+    box_rows, box_cols = regions.BOX_SHAPES[size]
+    n = batch.shape[0]
+    rows = batch
+    cols = batch.transpose(0, 2, 1)
+    boxes = (batch.reshape(n, size // box_rows, box_rows, size // box_cols, box_cols)
+             .transpose(0, 1, 3, 2, 4)
+             .reshape(n, -1, box_rows * box_cols))
+    return rows, cols, boxes
+
+
+def _no_duplicates(units):
+    """每个单元中非零数字不重复：各格数字对应的位求和等于按位或"""
+    bits = np.where(units > 0, np.left_shift(1, units.astype(np.int32) - 1), 0)
+    return (bits.sum(axis=-1) == np.bitwise_or.reduce(bits, axis=-1)).all(axis=-1)
+
+
+def validate_batch(batch, size, complete=True):
+    """批量校验，返回形状为 (N,) 的布尔数组
+    complete 为 True 时要求棋盘填满（用于校验解），否则只检查已填数字不冲突（用于校验谜题）
+    """
+    batch = np.asarray(batch, dtype=np.uint8)
+    if batch.ndim == 2:
+        batch = batch[np.newaxis]
+    ok = ((batch >= 0) & (batch <= size)).all(axis=(1, 2))
+    if complete:
+        ok &= (batch > 0).all(axis=(1, 2))
+    for units in _units(batch, size):
+        ok &= _no_duplicates(units)
+    return ok
+
+
+def clue_masks(puzzles):
+    """谜题 -> 提示掩码（True 表示该格是给出的数字）"""
+    return np.asarray(puzzles) > 0
+
+
+def apply_masks(solutions, masks):
+    """把提示掩码套到解上，批量得到谜题"""
+    return np.where(masks, solutions, 0).astype(np.uint8)
+
+
+def random_masks(n, size, holes_range, rng=None):
+    """批量生成随机挖空掩码，每个棋盘挖掉的格数在 holes_range 范围内（不保证唯一解）"""
+    rng = rng or np.random.default_rng()
+    cells = size * size
+    holes = rng.integers(holes_range[0], holes_range[1] + 1, size=n)
+    # 每行随机排个名次，名次小于挖空数的格子挖掉
+    ranks = rng.random((n, cells)).argsort(axis=1).argsort(axis=1)
+    return (ranks >= holes[:, np.newaxis]).reshape(n, size, size)
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""预生成数独题库：紧凑的二进制存储和常数时间的随机抽题
+
+每个 (尺寸, 等级) 一个文件，例如 shudu-9-g3.bin：
+- 16 字节文件头：魔数 b"SDCP"、版本、尺寸、等级、每条记录字节数
+- 之后是定长记录，每条包含：
+  - 解：每格 4 位（存 数字-1），9x9 为 41 字节
+  - 提示掩码：每格 1 位，1 表示该格是题目给出的数字，9x9 为 11 字节
+  - 难度等级：1 字节
+记录定长，第 k 条的位置可以直接算出来，抽题时通过 mmap 只解码抽中的几条。
+
+每个数据文件旁边有一个 .keys 文件，按顺序存每条记录标准形（见 symmetry.py）的摘要，
+追加时用它去重：经过对称变换得到的同一道题只会收录一次。
+
+用法：
+    python corpus.py build --size 9 --grade 3 --count 200 [--dir corpus]
+    python corpus.py stats [--dir corpus]
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import random
+import struct
+import sys
+
+import grader
+import symmetry
+
+MAGIC = b"SDCP"
+VERSION = 2  # 2：6x6 的宫改为 2 行 3 列，旧的 6x6 题库不再适用
+HEADER = struct.Struct("<4sBBBxHxxxxxx")  # 魔数、版本、尺寸、等级、记录字节数
+KEY_BYTES = 16
+
+
+def record_size(size):
+    cells = size * size
+    return (cells + 1) // 2 + (cells + 7) // 8 + 1
+
+
+def pack_record(solution, puzzle, grade):
+    """把 (解, 谜题, 等级) 打包成一条定长记录"""
+    digits = [num - 1 for row in solution for num in row]
+    clues = [1 if num else 0 for row in puzzle for num in row]
+    if len(digits) % 2:
+        digits.append(0)
+    packed = bytes((digits[k] << 4) | digits[k + 1] for k in range(0, len(digits), 2))
+    mask = bytearray((len(clues) + 7) // 8)
+    for k, clue in enumerate(clues):
+        if clue:
+            mask[k >> 3] |= 0x80 >> (k & 7)
+    return packed + bytes(mask) + bytes([grade])
+
+
+def unpack_record(data, size):
+    """把一条记录解码为 (谜题, 解, 等级)"""
+    cells = size * size
+    digit_bytes = (cells + 1) // 2
+    digits = []
+    for byte in data[:digit_bytes]:
+        digits.append((byte >> 4) + 1)
+        digits.append((byte & 0x0F) + 1)
+    mask = data[digit_bytes:-1]
+    solution = [digits[r * size:(r + 1) * size] for r in range(size)]
+    puzzle = [[num if mask[(r * size + c) >> 3] & (0x80 >> ((r * size + c) & 7)) else 0
+               for c, num in enumerate(row)] for r, row in enumerate(solution)]
+    return puzzle, solution, data[-1]
+
+
+def canonical_key(solution, puzzle, size):
+    """标准形摘要，等价的两道题得到同一个摘要"""
+    canon, canon_puzzle = symmetry.canonical_form(solution, size, puzzle)
+    data = bytes(num for row in canon + canon_puzzle for num in row)
+    return hashlib.blake2b(data, digest_size=KEY_BYTES).digest()
+
+
+class CorpusFile:
+    """一个 (尺寸, 等级) 的数据文件，读取通过 mmap，追加时同步写 .keys
+    文件不存在时：create 为 True 则新建（只有追加题目时这样做），否则抛出 FileNotFoundError
+    """
+
+    def __init__(self, path, size, grade, create=False):
+        self.path = path
+        self.size = size
+        self.grade = grade
+        self.record_size = record_size(size)
+        self._map = None
+        self._keys = None
+        if not os.path.exists(path):
+            if not create:
+                raise FileNotFoundError(f"题库中没有 {size}x{size} 等级 {grade} 的题目：{path}")
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, size, grade, self.record_size))
+            open(self.keys_path, "wb").close()
+        else:
+            with open(path, "rb") as f:
+                magic, version, file_size, file_grade, rec = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION or (file_size, file_grade, rec) != (
+                    size, grade, self.record_size):
+                raise ValueError(f"{path} 不是有效的题库文件")
+
+    @property
+    def keys_path(self):
+        return os.path.splitext(self.path)[0] + ".keys"
+
+    def __len__(self):
+        return (os.path.getsize(self.path) - HEADER.size) // self.record_size
+
+    def _mapped(self):
+        if self._map is None and len(self):
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def get(self, index):
+        """第 index 条记录，返回 (谜题, 解, 等级)"""
+        start = HEADER.size + index * self.record_size
+        return unpack_record(self._mapped()[start:start + self.record_size], self.size)
+
+    def keys(self):
+        if self._keys is None:
+            with open(self.keys_path, "rb") as f:
+                data = f.read()
+            self._keys = {data[k:k + KEY_BYTES] for k in range(0, len(data), KEY_BYTES)}
+        return self._keys
+
+    def append(self, puzzle, solution):
+        """追加一道题，和已有的题等价时不收录并返回 False"""
+        key = canonical_key(solution, puzzle, self.size)
+        if key in self.keys():
+            return False
+        self.close()  # 文件变长后需要重新映射
+        with open(self.path, "ab") as f:
+            f.write(pack_record(solution, puzzle, self.grade))
+        with open(self.keys_path, "ab") as f:
+            f.write(key)
+        self._keys.add(key)
+        return True
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class Corpus:
+    """题库目录，按 (尺寸, 等级) 管理数据文件"""
+
+    def __init__(self, directory="corpus"):
+        self.directory = directory
+        self._files = {}
+
+    def file(self, size, grade, create=False):
+        """(尺寸, 等级) 的数据文件；只有 create 为 True（追加题目）时才创建目录和文件，
+        只读时文件不存在抛出 FileNotFoundError
+        """
+        key = (size, grade)
+        if key not in self._files:
+            if create:
+                os.makedirs(self.directory, exist_ok=True)
+            self._files[key] = CorpusFile(self._path(size, grade), size, grade, create)
+        return self._files[key]
+
+    def append(self, puzzle, solution, size, grade):
+        return self.file(size, grade, create=True).append(puzzle, solution)
+
+    def sample(self, size, k, grade=None, rng=random):
+        """随机抽取 k 道不重复的题，返回 (题目列表, 答案列表)
+        grade 为 None 时从该尺寸已有的所有等级中均匀抽取；只读取，不创建任何文件
+        题库中没有这个尺寸（或等级）的题目，或者题目不足 k 道时抛出 ValueError
+        """
+        grades = [grade] if grade is not None else list(grader.GRADES)
+        files = [self.file(size, g) for g in grades if os.path.exists(self._path(size, g))]
+        if not files:
+            level = f"等级 {grade} " if grade is not None else ""
+            raise ValueError(f"题库 {self.directory} 中没有 {size}x{size} {level}的题目，请先用 corpus.py build 生成")
+        counts = [len(f) for f in files]
+        if sum(counts) < k:
+            raise ValueError(f"题库中 {size}x{size} 的题目不足 {k} 道")
+
+        puzzles, solutions = [], []
+        for index in rng.sample(range(sum(counts)), k):
+            for f, count in zip(files, counts):
+                if index < count:
+                    puzzle, solution, _ = f.get(index)
+                    puzzles.append(puzzle)
+                    solutions.append(solution)
+                    break
+                index -= count
+        return puzzles, solutions
+
+    def _path(self, size, grade):
+        return os.path.join(self.directory, f"shudu-{size}-g{grade}.bin")
+
+    def stats(self):
+        """返回 {(尺寸, 等级): {"count": 题数, "bytes": 文件字节数, "avg_clues": 平均提示数}}"""
+        result = {}
+        if not os.path.isdir(self.directory):
+            return result
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith("shudu-") and name.endswith(".bin")):
+                continue
+            size, grade = (int(part.lstrip("g")) for part in name[len("shudu-"):-len(".bin")].split("-"))
+            f = self.file(size, grade)
+            count = len(f)
+            clues = sum(sum(1 for row in f.get(k)[0] for num in row if num) for k in range(count))
+            result[(size, grade)] = {
+                "count": count,
+                "bytes": os.path.getsize(f.path),
+                "avg_clues": clues / count if count else 0,
+            }
+        return result
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+
+def build(corpus, size, grade, count):
+    """往题库中追加 count 道指定等级的新题，返回 (收录数, 重复数)
+    小尺寸的不同题目本来就不多，重复数超过 count 的 10 倍时提前结束
+    """
+    from ShuDu import generate_graded_puzzles
+
+    added = duplicates = 0
+    while added < count and duplicates <= 10 * count:
+        puzzles, solutions = generate_graded_puzzles(size, grade, count - added)
+        for puzzle, solution in zip(puzzles, solutions):
+            if corpus.append(puzzle, solution, size, grade):
+                added += 1
+            else:
+                duplicates += 1
+    return added, duplicates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="数独题库")
+    parser.add_argument("command", choices=["build", "stats"])
+    parser.add_argument("--dir", default="corpus", help="题库目录")
+    parser.add_argument("--size", type=int, choices=[4, 6, 9], default=9)
+    parser.add_argument("--grade", type=int, choices=sorted(grader.GRADES), default=1)
+    parser.add_argument("--count", type=int, default=100)
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        try:
+            grader.check_grade(args.size, args.grade)
+        except ValueError as e:
+            parser.error(str(e))
+
+    corpus = Corpus(args.dir)
+    if args.command == "build":
+        added, duplicates = build(corpus, args.size, args.grade, args.count)
+        print(f"已收录 {added} 道 {args.size}x{args.size} {grader.GRADES[args.grade]}题，跳过重复 {duplicates} 道")
+    else:
+        print(f"{'尺寸':<6}{'等级':<6}{'题数':>8}{'字节':>10}{'平均提示数':>12}")
+        for (size, grade), info in corpus.stats().items():
+            print(f"{size}x{size:<4}{grade:<6}{info['count']:>8}{info['bytes']:>10}{info['avg_clues']:>12.1f}")
+    corpus.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
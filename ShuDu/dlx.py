@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""舞蹈链（DLX）精确覆盖数独引擎
+
+把数独看成精确覆盖问题：每个 (格子, 数字) 是一行，覆盖四列约束——格子有数、行有该数字、
+列有该数字、区域有该数字。区域布局只是数据（见 regions.py），所以同一个引擎可以处理
+4x4~16x16 的标准数独和区域不规则的锯齿数独。
+
+链表用几个平行的整数列表表示（左、右、上、下、所在列），覆盖、恢复一列只改指针；
+搜索时总是选剩余行最少的列。题目给出的数字在搜索前先选中，搜索结束后按相反顺序恢复，
+所以同一个实例可以反复加载不同的棋盘。大尺寸的空棋盘和锯齿数独偶尔会走进很深的死路，
+生成新数独时给搜索设定步数上限，超过就换一个随机顺序重新开始。
+挖空仍用位掩码引擎的 carve_unique（只撤销一个格子的掩码），这里的 count_solutions 用来独立检验唯一解。
+"""
+import random
+
+import regions as region_layouts
+
+# 生成新数独时第一次尝试的搜索步数上限（空格数的倍数），之后每次重新开始乘以 RESTART_GROWTH；
+# 上限小、增长慢时重新开始的次数多，但很少在死路里耗太久（锯齿数独尤其明显）
+RESTART_FACTOR = 2
+RESTART_GROWTH = 1.1
+
+
+class SudokuCover:
+    """一种尺寸和区域布局的数独精确覆盖矩阵"""
+
+    def __init__(self, size, regions=None):
+        regions = region_layouts.get_regions(size, regions)
+        self.size = size
+        self.regions = regions
+        cells = size * size
+        columns = 4 * cells
+        # 节点 0 是根，1..columns 是列头，之后每个 (格子, 数字) 行有 4 个节点
+        count = columns + 1 + 4 * cells * size
+        self.left = left = list(range(-1, count - 1))
+        self.right = right = list(range(1, count + 1))
+        self.up = up = list(range(count))
+        self.down = down = list(range(count))
+        self.column = column = list(range(count))
+        self.row_of = [-1] * count
+        self.length = [0] * (columns + 1)
+        left[0], right[columns] = columns, 0
+
+        self.row_nodes = []  # 行号 -> 第一个节点，行号 = 格子 * size + 数字 - 1
+        node = columns + 1
+        for i in range(cells):
+            r, c = divmod(i, size)
+            for d in range(size):
+                cols = (1 + i, 1 + cells + r * size + d, 1 + 2 * cells + c * size + d,
+                        1 + 3 * cells + regions[i] * size + d)
+                self.row_nodes.append(node)
+                for k, col in enumerate(cols):
+                    n = node + k
+                    left[n] = node + (k - 1) % 4
+                    right[n] = node + (k + 1) % 4
+                    column[n] = col
+                    self.row_of[n] = i * size + d
+                    up[n] = up[col]
+                    down[n] = col
+                    down[up[col]] = n
+                    up[col] = n
+                    self.length[col] += 1
+                node += 4
+
+        self.chosen = []  # 当前选中的行（先是题目给出的，再是搜索中的）
+        self.givens = 0
+        self.nodes = 0  # 搜索中尝试过的分支数
+        self.aborted = False  # 上一次搜索是否因为超过步数上限而中止
+        self.total_nodes = 0  # 上一次 solve_board 各次尝试的分支数之和
+        self.restarts = 0  # 上一次 solve_board 重新开始的次数
+        self.solution = None
+
+    def _cover(self, col):
+        left, right, up, down, column, length = self.left, self.right, self.up, self.down, self.column, self.length
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                length[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, col):
+        left, right, up, down, column, length = self.left, self.right, self.up, self.down, self.column, self.length
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                length[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def _select(self, node):
+        """选中 node 所在的行：覆盖这一行的每一列"""
+        self._cover(self.column[node])
+        j = self.right[node]
+        while j != node:
+            self._cover(self.column[j])
+            j = self.right[j]
+
+    def _deselect(self, node):
+        j = self.left[node]
+        while j != node:
+            self._uncover(self.column[j])
+            j = self.left[j]
+        self._uncover(self.column[node])
+
+    def reset(self):
+        """按相反顺序撤销所有选中的行，恢复成空棋盘"""
+        while self.chosen:
+            self._deselect(self.chosen.pop())
+        self.givens = 0
+
+    def load(self, board):
+        """加载二维棋盘（0 表示空格），已有数字互相冲突时返回 False（此时恢复成空棋盘）"""
+        self.reset()
+        size = self.size
+        for r in range(size):
+            for c in range(size):
+                num = board[r][c]
+                if num:
+                    node = self.row_nodes[(r * size + c) * size + num - 1]
+                    # 这一行的某一列已被覆盖，说明与已有数字冲突
+                    j = node
+                    while True:
+                        col = self.column[j]
+                        if self.left[self.right[col]] != col:
+                            self.reset()
+                            return False
+                        j = self.right[j]
+                        if j == node:
+                            break
+                    self._select(node)
+                    self.chosen.append(node)
+        self.givens = len(self.chosen)
+        return True
+
+    def _search(self, rng, limit, budget):
+        """选剩余行最少的列逐行尝试，返回找到的解的个数（最多 limit 个）；
+        budget 为分支数上限，超过时返回 -1（链表已恢复原状）
+        """
+        right, length = self.right, self.length
+        col = right[0]
+        if col == 0:
+            if self.solution is None:
+                self.solution = list(self.chosen)
+            return 1
+        best, best_length = col, length[col]
+        while col and best_length > 1:
+            if length[col] < best_length:
+                best, best_length = col, length[col]
+            col = right[col]
+        if not best_length:
+            return 0
+
+        rows = []
+        i = self.down[best]
+        while i != best:
+            rows.append(i)
+            i = self.down[i]
+        if rng is not None and len(rows) > 1:
+            rng.shuffle(rows)
+
+        found = 0
+        for node in rows:
+            self.nodes += 1
+            if budget is not None and self.nodes > budget:
+                return -1
+            self._select(node)
+            self.chosen.append(node)
+            result = self._search(rng, limit - found, budget)
+            self.chosen.pop()
+            self._deselect(node)
+            if result < 0:
+                return -1
+            found += result
+            if found >= limit:
+                break
+        return found
+
+    def _board(self, chosen):
+        size = self.size
+        grid = [0] * (size * size)
+        for node in chosen:
+            i, d = divmod(self.row_of[node], size)
+            grid[i] = d + 1
+        return [grid[r * size:(r + 1) * size] for r in range(size)]
+
+    def solve(self, rng=None, budget=None):
+        """求解当前棋盘，返回解（二维列表），无解或超过 budget 时返回 None（后者 aborted 为 True）；
+        传入 rng 时随机尝试顺序
+        """
+        self.nodes = 0
+        self.solution = None
+        result = self._search(rng, 1, budget)
+        self.aborted = result < 0
+        if result <= 0:
+            return None
+        return self._board(self.solution)
+
+    def count_solutions(self, limit=2):
+        """统计当前棋盘解的个数，数到 limit 就停止"""
+        self.nodes = 0
+        self.solution = None
+        self.aborted = False
+        return self._search(None, limit, None)
+
+
+_covers = {}
+
+
+def get_cover(size, regions=None):
+    """按尺寸和区域布局复用链表，避免重复建立"""
+    key = (size, region_layouts.get_regions(size, regions))
+    if key not in _covers:
+        _covers[key] = SudokuCover(size, regions)
+    return _covers[key]
+
+
+def solve_board(board, size, rng=random, regions=None):
+    """与 ShuDu.solve_sudoku 相同的接口：原地填满 board，成功返回 True
+    棋盘几乎全空（生成新数独）时按步数上限重新开始，避免偶尔很深的死路
+    """
+    cover = get_cover(size, regions)
+    cover.total_nodes = cover.restarts = 0
+    if not cover.load(board):
+        return False
+    empty = size * size - cover.givens
+    budget = RESTART_FACTOR * empty if rng is not None and empty > size * size // 2 else None
+    while True:
+        solution = cover.solve(rng, budget)
+        cover.total_nodes += cover.nodes
+        if not cover.aborted:  # 找到了解，或者搜索完了也无解
+            break
+        cover.restarts += 1
+        budget = int(budget * RESTART_GROWTH) + 1  # 每次重新开始都放宽上限，保证最终能搜索完
+    cover.reset()
+    if solution is None:
+        return False
+    for r, row in enumerate(solution):
+        board[r][:] = row
+    return True
+
+
+def count_solutions(board, size, limit=2, regions=None):
+    """棋盘解的个数，数到 limit 就停止；棋盘有冲突时为 0"""
+    cover = get_cover(size, regions)
+    if not cover.load(board):
+        return 0
+    count = cover.count_solutions(limit)
+    cover.reset()
+    return count
+
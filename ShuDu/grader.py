@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""数独难度评级：按人工解题需要用到的技巧评级，并按目标难度挖空
+
+评级时模拟人工解题，每一步都优先使用最简单的技巧：
+1. 唯一候选数：某格只剩一个候选数
+2. 隐性唯一候选数：某数字在某行/列/宫里只剩一个位置
+3. 数对：同一单元里两个格子的候选数是同一对数字，其余格子排除这两个数
+4. 区块摒除：宫内某数字只在一行（列）里，或行（列）内某数字只在一个宫里
+用到的最难技巧就是谜题的等级；以上技巧都推不动时为 5 级，
+此时再记录求解器把剩余部分解完需要尝试的分支数，作为搜索难度。
+"""
+import random
+
+import regions as region_layouts
+import solver
+
+GRADES = {
+    1: "入门",
+    2: "简单",
+    3: "中等",
+    4: "困难",
+    5: "专家",
+}
+
+# 标准数独各尺寸能稳定挖到的最高等级，没有列出的尺寸和锯齿数独 1~5 级都能达到。
+# 实测：4x4 只能到 1 级；6x6 的 2x3 宫里数对、区块摒除和需要试数的局面极少，
+# 每个棋盘挖到 3、4、5 级的概率分别约为 0.2%、0.2%、5%，连续换棋盘重试也经常失败
+MAX_GRADES = {
+    4: 1,
+    6: 2,
+}
+
+TECHNIQUES = {
+    1: "唯一候选数",
+    2: "隐性唯一候选数",
+    3: "数对",
+    4: "区块摒除",
+}
+
+
+def grades_for(size, regions=None):
+    """size x size 数独能达到的等级列表；regions 不为 None（锯齿数独）时不受 MAX_GRADES 限制"""
+    top = MAX_GRADES.get(size, max(GRADES)) if regions is None else max(GRADES)
+    return [grade for grade in GRADES if grade <= top]
+
+
+def check_grade(size, grade, regions=None):
+    """grade 不是 size x size 数独能达到的等级时抛出 ValueError"""
+    if grade not in GRADES:
+        raise ValueError(f"等级必须是{list(GRADES)}之一")
+    grades = grades_for(size, regions)
+    if grade not in grades:
+        raise ValueError(f"{size}x{size}数独达不到等级{grade}（{GRADES[grade]}），可选等级为{grades}")
+
+
+class Grader:
+    """在同一尺寸的棋盘上反复评级，格子间的关系只在创建时计算一次"""
+
+    def __init__(self, size, box_shape=None, regions=None):
+        self.size = size
+        self.solver = solver.BitmaskSolver(size, box_shape, regions)
+        cell_count = size * size
+        rows = [[r * size + c for c in range(size)] for r in range(size)]
+        cols = [[r * size + c for r in range(size)] for c in range(size)]
+        boxes = [[] for _ in range(len(self.solver.box_used))]
+        for i in range(cell_count):
+            boxes[self.solver.cell_box[i]].append(i)
+
+        # 所有单元都要求数字不重复，只有满 size 格的单元才要求每个数字都出现
+        self.units = rows + cols + boxes
+        self.full_units = [unit for unit in self.units if len(unit) == size]
+        self.full_boxes = [box for box in boxes if len(box) == size]
+        self.rows, self.cols, self.boxes = rows, cols, boxes
+        self.lines = rows + cols
+        self.peers = [set() for _ in range(cell_count)]
+        for unit in self.units:
+            for i in unit:
+                self.peers[i].update(unit)
+        for i in range(cell_count):
+            self.peers[i].discard(i)
+            self.peers[i] = tuple(self.peers[i])
+
+    def _load(self, puzzle):
+        size = self.size
+        full = (1 << size) - 1
+        self.grid = [num for row in puzzle for num in row]
+        self.cand = [0 if num else full for num in self.grid]
+        for i, num in enumerate(self.grid):
+            if num:
+                bit = 1 << (num - 1)
+                for p in self.peers[i]:
+                    self.cand[p] &= ~bit
+
+    def _place(self, i, num):
+        bit = 1 << (num - 1)
+        self.grid[i] = num
+        self.cand[i] = 0
+        for p in self.peers[i]:
+            self.cand[p] &= ~bit
+
+    def _naked_single(self):
+        grid, cand = self.grid, self.cand
+        for i, mask in enumerate(cand):
+            if not grid[i]:
+                if not mask:
+                    raise ValueError("谜题无解")
+                if not mask & (mask - 1):
+                    self._place(i, mask.bit_length())
+                    return True
+        return False
+
+    def _hidden_single(self):
+        grid, cand = self.grid, self.cand
+        for unit in self.full_units:
+            once = twice = 0
+            for i in unit:
+                twice |= once & cand[i]
+                once |= cand[i]
+            singles = once & ~twice
+            if singles:
+                bit = singles & -singles
+                for i in unit:
+                    if cand[i] & bit:
+                        self._place(i, bit.bit_length())
+                        return True
+        return False
+
+    def _eliminate(self, cells, mask):
+        """从 cells 中排除 mask 里的候选数，有任何变化时返回 True"""
+        cand = self.cand
+        changed = False
+        for i in cells:
+            if cand[i] & mask:
+                cand[i] &= ~mask
+                changed = True
+        return changed
+
+    def _naked_pair(self):
+        cand = self.cand
+        for unit in self.units:
+            seen = {}
+            for i in unit:
+                mask = cand[i]
+                if mask and mask.bit_count() == 2:
+                    if mask in seen:
+                        pair = (seen[mask], i)
+                        others = [j for j in unit if j not in pair]
+                        if self._eliminate(others, mask):
+                            return True
+                    else:
+                        seen[mask] = i
+        return False
+
+    def _box_line(self):
+        cand = self.cand
+        cell_row, cell_col, cell_box = self.solver.cell_row, self.solver.cell_col, self.solver.cell_box
+        digits = _bits((1 << self.size) - 1)
+        # 宫内某数字只出现在同一行（列），排除该行（列）在宫外的格子
+        for box in self.full_boxes:
+            for bit in digits:
+                cells = [i for i in box if cand[i] & bit]
+                if len(cells) < 2:
+                    continue
+                b = cell_box[cells[0]]
+                for line, index in ((self.rows, cell_row), (self.cols, cell_col)):
+                    if all(index[i] == index[cells[0]] for i in cells):
+                        others = [j for j in line[index[cells[0]]] if cell_box[j] != b]
+                        if self._eliminate(others, bit):
+                            return True
+        # 行（列）内某数字只出现在同一个宫，排除该宫在这行（列）以外的格子
+        full_box_ids = {cell_box[box[0]] for box in self.full_boxes}
+        for line in self.lines:
+            for bit in digits:
+                cells = [i for i in line if cand[i] & bit]
+                if len(cells) < 2:
+                    continue
+                b = cell_box[cells[0]]
+                if b in full_box_ids and all(cell_box[i] == b for i in cells):
+                    line_set = set(line)
+                    others = [j for j in self.boxes[b] if j not in line_set]
+                    if self._eliminate(others, bit):
+                        return True
+        return False
+
+    def grade(self, puzzle):
+        """返回 (等级, 详情)，详情包含每种技巧的使用次数和搜索分支数"""
+        self._load(puzzle)
+        steps = [self._naked_single, self._hidden_single, self._naked_pair, self._box_line]
+        used = dict.fromkeys(TECHNIQUES, 0)
+        level = 1
+        while 0 in self.grid:
+            for technique, step in enumerate(steps, 1):
+                if step():
+                    used[technique] += 1
+                    level = max(level, technique)
+                    break
+            else:
+                break
+
+        search_nodes = 0
+        if 0 in self.grid:
+            level = 5
+            size = self.size
+            self.solver.load([self.grid[r * size:(r + 1) * size] for r in range(size)])
+            self.solver.hidden_singles = True
+            self.solver.count_solutions(2)
+            search_nodes = self.solver.nodes
+        return level, {"techniques": used, "search_nodes": search_nodes}
+
+
+def _bits(mask):
+    """把位掩码拆成单个位的列表"""
+    bits = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        bits.append(bit)
+    return bits
+
+
+_graders = {}
+
+
+def get_grader(size, regions=None):
+    key = (size, region_layouts.get_regions(size, regions))
+    if key not in _graders:
+        _graders[key] = Grader(size, regions=key[1])
+    return _graders[key]
+
+
+def grade_puzzle(puzzle, size, regions=None):
+    """评定谜题等级，返回 (等级, 详情)；regions 为区域布局（见 regions.py），不传时为标准的宫"""
+    return get_grader(size, regions).grade(puzzle)
+
+
+def carve_to_grade(board, size, grade, min_holes, rng=random, regions=None):
+    """朝目标等级逐个挖空：每挖一格都要求仍是唯一解，且等级不超过目标
+    挖到目标等级并且空格数不少于 min_holes 时停止；挖不到目标等级时返回 None
+    """
+    carver = solver.get_solver(size, regions)
+    if not carver.load(board) or carver.grid.count(0):
+        raise ValueError("挖空需要一个完整且合法的数独")
+    carver.hidden_singles = True
+    grader = get_grader(size, regions)
+
+    positions = list(range(size * size))
+    rng.shuffle(positions)
+    holes, current = 0, 1
+    for i in positions:
+        num = carver.grid[i]
+        carver.remove(i)
+        if carver.has_alternative(i, num):
+            carver.place(i, num)
+            continue
+        level, _ = grader.grade(carver.to_board())
+        if level > grade:
+            carver.place(i, num)  # 这一格挖掉就太难了，保留它
+            continue
+        holes, current = holes + 1, level
+        if current == grade and holes >= min_holes:
+            break
+
+    if current != grade:
+        return None
+    return carver.to_board()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""数独的区域布局：每个格子属于哪个区域（宫）
+
+布局是数据而不是代码：一个长度为 size*size 的列表，第 i 个元素是格子 i（按行编号）所在区域的编号。
+标准数独的区域是 BOX_SHAPES 中的矩形宫；锯齿数独的区域是不规则的，
+用字符串画出来（每行一个字符串，同一个字母是同一个区域），见 JIGSAW_LAYOUTS。
+"""
+
+# 各尺寸的宫格形状（宫的行数, 列数）；6x6 的宫是 2 行 3 列
+BOX_SHAPES = {
+    4: (2, 2),
+    6: (2, 3),
+    9: (3, 3),
+    12: (3, 4),
+    16: (4, 4),
+}
+
+SIZES = sorted(BOX_SHAPES)
+
+# 锯齿数独的区域布局：尺寸 -> [布局, ...]，batch.py --jigsaw N 选第 N 个
+JIGSAW_LAYOUTS = {
+    6: [
+        ("cabbbb",
+         "caaabd",
+         "caadbd",
+         "cceddd",
+         "ceefff",
+         "eeefff"),
+    ],
+    9: [
+        ("abbbbbccc",
+         "aabaabccc",
+         "daaabbcfc",
+         "dadeeeefc",
+         "dddeefeff",
+         "gddehffff",
+         "ggdehiiii",
+         "gggghiiii",
+         "gghhhhhhi"),
+    ],
+}
+
+
+def box_regions(size, box_shape=None):
+    """矩形宫的区域布局"""
+    box_rows, box_cols = box_shape or BOX_SHAPES[size]
+    if size % box_rows or size % box_cols or box_rows * box_cols != size:
+        raise ValueError(f"{size}x{size}数独不能分成 {box_rows}x{box_cols} 的宫")
+    boxes_per_band = size // box_cols
+    return [(i // size) // box_rows * boxes_per_band + (i % size) // box_cols for i in range(size * size)]
+
+
+def parse_regions(lines):
+    """把字符串画出的布局转成区域编号列表，区域按第一次出现的顺序编号；
+    每个区域必须恰好有 size 个格子且互相连通，否则抛出 ValueError
+    """
+    size = len(lines)
+    if any(len(line) != size for line in lines):
+        raise ValueError("区域布局必须是正方形")
+    ids = {}
+    regions = [ids.setdefault(char, len(ids)) for line in lines for char in line]
+    if len(ids) != size:
+        raise ValueError(f"{size}x{size}数独需要 {size} 个区域，布局中有 {len(ids)} 个")
+    for region in range(size):
+        cells = [i for i, r in enumerate(regions) if r == region]
+        if len(cells) != size:
+            raise ValueError(f"区域 {region} 有 {len(cells)} 个格子，应为 {size} 个")
+        seen, stack = {cells[0]}, [cells[0]]
+        while stack:
+            i = stack.pop()
+            row, col = divmod(i, size)
+            for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                j = r * size + c
+                if 0 <= r < size and 0 <= c < size and j not in seen and regions[j] == region:
+                    seen.add(j)
+                    stack.append(j)
+        if len(seen) != size:
+            raise ValueError(f"区域 {region} 不连通")
+    return regions
+
+
+def jigsaw_regions(size, index):
+    """第 index 个（从 1 开始）锯齿布局"""
+    layouts = JIGSAW_LAYOUTS.get(size, [])
+    if not 1 <= index <= len(layouts):
+        raise ValueError(f"{size}x{size}锯齿数独只有 {len(layouts)} 种布局")
+    return parse_regions(layouts[index - 1])
+
+
+_boxes = {}
+
+
+def get_regions(size, regions=None):
+    """regions 为 None 时返回标准的宫，否则检查长度后原样返回（转成元组，可以作为缓存键）"""
+    if regions is None:
+        if size not in BOX_SHAPES:
+            raise ValueError(f"尺寸必须是{'、'.join(map(str, SIZES))}之一")
+        if size not in _boxes:
+            _boxes[size] = tuple(box_regions(size))
+        return _boxes[size]
+    if len(regions) != size * size:
+        raise ValueError(f"区域布局的格子数应为 {size * size}")
+    return tuple(regions)
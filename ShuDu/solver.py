@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""位掩码约束传播数独求解引擎
+
+每行、每列、每个宫用一个整数位掩码记录已经用过的数字（第 k 位代表数字 k+1），
+填数和撤销都只改三个掩码，候选数由三者取反直接得到，不再整行整列重新扫描。
+搜索时优先选择候选数最少的空格（MRV），并做唯一候选数、隐性唯一候选数传播。
+"""
+import random
+
+import regions as region_layouts
+
+
+class BitmaskSolver:
+    """增量维护候选数的数独求解器，同一个实例可以反复加载棋盘
+    regions 为区域布局（见 regions.py），不传时按 box_shape（默认 BOX_SHAPES）划分矩形宫
+    """
+
+    def __init__(self, size, box_shape=None, regions=None):
+        self.size = size
+        self.full = (1 << size) - 1
+        self.cell_count = size * size
+
+        self.cell_row = [i // size for i in range(self.cell_count)]
+        self.cell_col = [i % size for i in range(self.cell_count)]
+        if regions is None:
+            regions = region_layouts.box_regions(size, box_shape)
+        self.cell_box = list(regions)
+        box_count = max(self.cell_box) + 1
+
+        # 所有单元（行、列、宫），只有恰好包含 size 个格子的单元才能做隐性唯一候选数
+        units = [[r * size + c for c in range(size)] for r in range(size)]
+        units += [[r * size + c for r in range(size)] for c in range(size)]
+        boxes = [[] for _ in range(box_count)]
+        for i in range(self.cell_count):
+            boxes[self.cell_box[i]].append(i)
+        units += boxes
+        self.units = [unit for unit in units if len(unit) == size]
+        self.cells = list(zip(range(self.cell_count), self.cell_row, self.cell_col, self.cell_box))
+        self.unit_cells = [[self.cells[i] for i in unit] for unit in self.units]
+
+        self.grid = [0] * self.cell_count
+        self.row_used = [0] * size
+        self.col_used = [0] * size
+        self.box_used = [0] * box_count
+        self.hidden_singles = True  # 是否在分支前查找隐性唯一候选数
+        self.nodes = 0  # 搜索中尝试过的分支数
+        self.backtracks = 0  # 回溯次数
+
+    def load(self, board):
+        """加载二维棋盘（0 表示空格），已有数字互相冲突时返回 False
+        几乎全空的棋盘（例如生成新数独时）很少出现隐性唯一候选数，
+        这时关掉隐性唯一候选数查找，它的扫描开销比省下的分支还多
+        """
+        size = self.size
+        self.grid = [0] * self.cell_count
+        self.row_used = [0] * size
+        self.col_used = [0] * size
+        self.box_used = [0] * len(self.box_used)
+        self.nodes = 0
+        self.backtracks = 0
+        for r in range(size):
+            for c in range(size):
+                num = board[r][c]
+                if num:
+                    i = r * size + c
+                    if not self.candidates(i) & (1 << (num - 1)):
+                        return False
+                    self.place(i, num)
+        self.hidden_singles = self.cell_count - self.grid.count(0) >= self.cell_count // 5
+        return True
+
+    def to_board(self):
+        """把当前状态导出为二维列表"""
+        size = self.size
+        return [self.grid[r * size:(r + 1) * size] for r in range(size)]
+
+    def candidates(self, i):
+        """格子 i 的候选数位掩码"""
+        return self.full & ~(self.row_used[self.cell_row[i]] |
+                             self.col_used[self.cell_col[i]] |
+                             self.box_used[self.cell_box[i]])
+
+    def place(self, i, num):
+        bit = 1 << (num - 1)
+        self.grid[i] = num
+        self.row_used[self.cell_row[i]] |= bit
+        self.col_used[self.cell_col[i]] |= bit
+        self.box_used[self.cell_box[i]] |= bit
+
+    def remove(self, i):
+        mask = ~(1 << (self.grid[i] - 1))
+        self.grid[i] = 0
+        self.row_used[self.cell_row[i]] &= mask
+        self.col_used[self.cell_col[i]] &= mask
+        self.box_used[self.cell_box[i]] &= mask
+
+    def _hidden_single(self):
+        """找一个隐性唯一候选数：某数字在某单元中只剩一个格子可放
+        返回 (格子, 候选位)，没有时返回 None，出现矛盾时返回 False
+        """
+        grid = self.grid
+        full = self.full
+        row_used, col_used, box_used = self.row_used, self.col_used, self.box_used
+        for unit in self.unit_cells:
+            once = twice = placed = 0
+            for i, r, c, b in unit:
+                if grid[i]:
+                    placed |= 1 << (grid[i] - 1)
+                else:
+                    cand = full & ~(row_used[r] | col_used[c] | box_used[b])
+                    twice |= once & cand
+                    once |= cand
+            if (once | placed) != full:
+                return False  # 某个数字在这个单元里已经无处可放
+            singles = once & ~twice & ~placed
+            if singles:
+                bit = singles & -singles
+                for i, r, c, b in unit:
+                    if not grid[i] and not (row_used[r] | col_used[c] | box_used[b]) & bit:
+                        return i, bit
+        return None
+
+    def _search(self, rng, limit, keep=False):
+        """深度优先搜索，返回找到的解的个数（最多 limit 个）
+        keep 为 True 时找到解后保留棋盘状态，否则搜索结束后恢复原状
+        """
+        grid = self.grid
+        full = self.full
+        row_used, col_used, box_used = self.row_used, self.col_used, self.box_used
+
+        # 选出候选数最少的空格（MRV），候选数为 0 说明走进了死路
+        best, best_cand, best_count = -1, 0, self.size + 1
+        for i, r, c, b in self.cells:
+            if not grid[i]:
+                cand = full & ~(row_used[r] | col_used[c] | box_used[b])
+                count = cand.bit_count()
+                if count < best_count:
+                    if not count:
+                        return 0
+                    best, best_cand, best_count = i, cand, count
+                    if count == 1:
+                        break
+        if best < 0:
+            return 1
+
+        # 没有唯一候选数时，再看有没有隐性唯一候选数，能少开很多分支
+        if best_count > 1 and self.hidden_singles:
+            hidden = self._hidden_single()
+            if hidden is False:
+                return 0
+            if hidden:
+                best, best_cand = hidden
+
+        digits = []
+        while best_cand:
+            bit = best_cand & -best_cand
+            best_cand ^= bit
+            digits.append(bit.bit_length())
+        if rng is not None and len(digits) > 1:
+            rng.shuffle(digits)
+
+        found = 0
+        for num in digits:
+            self.nodes += 1
+            self.place(best, num)
+            found += self._search(rng, limit - found, keep)
+            if found and keep:
+                return found
+            self.remove(best)
+            if found >= limit:
+                break
+            self.backtracks += 1
+        return found
+
+    def solve(self, rng=None):
+        """求解当前棋盘，成功时解留在 grid 中；传入 rng 时随机尝试数字顺序"""
+        return self._search(rng, 1, keep=True) == 1
+
+    def count_solutions(self, limit=2):
+        """统计解的个数，数到 limit 就停止；棋盘状态保持不变"""
+        return self._search(None, limit)
+
+    def has_alternative(self, i, num):
+        """格子 i 刚被挖空（原来是 num），判断是否存在 i 不填 num 的解
+        原来的解一定还成立，所以找到任何一个别的解就说明已经不唯一，
+        相当于数到 2 就停的解计数器，而且只需搜索 i 的其余候选数
+        """
+        cand = self.candidates(i) & ~(1 << (num - 1))
+        while cand:
+            bit = cand & -cand
+            cand ^= bit
+            self.place(i, bit.bit_length())
+            found = self._search(None, 1)
+            self.remove(i)
+            if found:
+                return True
+        return False
+
+
+_solvers = {}
+
+
+def get_solver(size, regions=None):
+    """按尺寸和区域布局复用求解器实例，避免重复预计算格子索引"""
+    key = (size, region_layouts.get_regions(size, regions))
+    if key not in _solvers:
+        _solvers[key] = BitmaskSolver(size, regions=key[1])
+    return _solvers[key]
+
+
+def solve_board(board, size, rng=random, regions=None):
+    """与 ShuDu.solve_sudoku 相同的接口：原地填满 board，成功返回 True"""
+    solver = get_solver(size, regions)
+    if not solver.load(board) or not solver.solve(rng):
+        return False
+    for r, row in enumerate(solver.to_board()):
+        board[r][:] = row
+    return True
+
+
+def carve_unique(board, size, positions, cells_to_remove, regions=None):
+    """按 positions 的顺序逐个挖空，只保留挖完后仍然只有唯一解的那些格子
+    整个过程复用同一个求解器状态：挖空只撤销一个格子的掩码，不用重新加载棋盘
+    """
+    solver = get_solver(size, regions)
+    if not solver.load(board) or solver.grid.count(0):
+        raise ValueError("挖空需要一个完整且合法的数独")
+    solver.hidden_singles = True
+
+    removed = 0
+    for row, col in positions:
+        if removed >= cells_to_remove:
+            break
+        i = row * size + col
+        num = solver.grid[i]
+        solver.remove(i)
+        if solver.has_alternative(i, num):
+            solver.place(i, num)
+        else:
+            removed += 1
+    return solver.to_board()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""数独的对称变换与标准形
+
+以下变换不改变数独的合法性和解的个数：
+- 数字重新编号
+- 同一横带（宫的行组）内交换行、交换横带
+- 同一竖带（宫的列组）内交换列、交换竖带
+- 宫是正方形时沿主对角线转置
+canonical_form 在所有这些变换中取字典序最小的棋盘作为标准形，
+两个棋盘互相等价当且仅当它们的标准形相同，可以用来去重。
+augment 用随机变换从一道题派生出更多题目，几乎不花计算量。
+非正方形的宫（例如 2x3）只能在横带、竖带内部各自变换，不能转置。
+"""
+import itertools
+import random
+
+import regions
+
+_perm_tables = {}
+
+
+def _block_perms(size, block):
+    """按块分组的下标排列：块的顺序任意，块内顺序也任意，返回 [(排列, 逆排列), ...]"""
+    key = (size, block)
+    if key not in _perm_tables:
+        blocks = [list(range(b * block, (b + 1) * block)) for b in range(size // block)]
+        table = []
+        for order in itertools.permutations(blocks):
+            for inner in itertools.product(*(itertools.permutations(b) for b in order)):
+                perm = [i for part in inner for i in part]
+                inverse = [0] * size
+                for j, i in enumerate(perm):
+                    inverse[i] = j
+                table.append((perm, inverse))
+        _perm_tables[key] = table
+    return _perm_tables[key]
+
+
+def transpose(board):
+    return [list(col) for col in zip(*board)]
+
+
+def random_transform(size, rng=random):
+    """随机选一个对称变换，返回 (行排列, 列排列, 数字映射, 是否转置)"""
+    box_rows, box_cols = regions.BOX_SHAPES[size]
+    rows, _ = rng.choice(_block_perms(size, box_rows))
+    cols, _ = rng.choice(_block_perms(size, box_cols))
+    digits = list(range(1, size + 1))
+    rng.shuffle(digits)
+    flip = box_rows == box_cols and rng.random() < 0.5
+    return rows, cols, [0] + digits, flip
+
+
+def apply_transform(board, transform):
+    """对棋盘做变换，空格（0）保持为空格"""
+    rows, cols, digits, flip = transform
+    result = [[digits[board[r][c]] for c in cols] for r in rows]
+    return transpose(result) if flip else result
+
+
+def augment(puzzle, solution, size, count, rng=random):
+    """从一道题派生出 count 道不同的 (谜题, 解)，第一道就是原题
+    谜题和解用同一个变换，所以提示位置仍然对应，唯一解的性质也保持不变
+    """
+    pairs = [(puzzle, solution)]
+    seen = {tuple(map(tuple, puzzle))}
+    attempts = 0
+    while len(pairs) < count and attempts < count * 20:
+        attempts += 1
+        transform = random_transform(size, rng)
+        new_puzzle = apply_transform(puzzle, transform)
+        key = tuple(map(tuple, new_puzzle))
+        if key in seen:
+            continue
+        seen.add(key)
+        pairs.append((new_puzzle, apply_transform(solution, transform)))
+    return pairs
+
+
+def canonical_form(solution, size, puzzle=None):
+    """返回 (标准形解, 标准形谜题)，没有传 puzzle 时第二项为 None
+
+    先任选一行作为第一行，并把它重新编号成 1..size，这样数字编号由行和列的排列唯一确定；
+    列的排列逐一枚举，行的排列不用枚举：同一横带内的行按字典序排列、横带按整体字典序排列
+    就是最小的。先只比较第一横带剩下的行，大部分候选在这一步就被淘汰。
+    谜题与解使用同一个变换；解有多个最小变换时取谜题最小的那个。
+    """
+    box_rows, box_cols = regions.BOX_SHAPES[size]
+    col_perms = _block_perms(size, box_cols)
+    orientations = [(solution, puzzle)]
+    if box_rows == box_cols:
+        orientations.append((transpose(solution), transpose(puzzle) if puzzle else None))
+
+    best, survivors = None, []
+    for grid, clues in orientations:
+        for r0 in range(size):
+            pos = [0] * (size + 1)
+            for c, num in enumerate(grid[r0]):
+                pos[num] = c
+            # h[r][c]：(r, c) 处的数字在第 r0 行中的列号
+            h = [[pos[num] for num in row] for row in grid]
+            band = r0 // box_rows
+            mates = [h[r] for r in range(band * box_rows, (band + 1) * box_rows) if r != r0]
+            for perm, inverse in col_perms:
+                prefix = sorted([inverse[row[p]] for p in perm] for row in mates)
+                if best is None or prefix < best:
+                    best, survivors = prefix, [(h, clues, r0, perm, inverse)]
+                elif prefix == best:
+                    survivors.append((h, clues, r0, perm, inverse))
+
+    result = None
+    for h, clues, r0, perm, inverse in survivors:
+        relabeled = [[inverse[row[p]] + 1 for p in perm] for row in h]
+        band = r0 // box_rows
+        first = [r0] + sorted((r for r in range(band * box_rows, (band + 1) * box_rows) if r != r0),
+                              key=relabeled.__getitem__)
+        others = []
+        for b in range(size // box_rows):
+            if b != band:
+                others.append(sorted(range(b * box_rows, (b + 1) * box_rows), key=relabeled.__getitem__))
+        others.sort(key=lambda rows: [relabeled[r] for r in rows])
+        order = first + [r for rows in others for r in rows]
+
+        canon = [relabeled[r] for r in order]
+        canon_puzzle = None
+        if clues is not None:
+            canon_puzzle = [[relabeled[r][j] if clues[r][p] else 0 for j, p in enumerate(perm)]
+                            for r in order]
+        candidate = (canon, canon_puzzle)
+        if result is None or (candidate[0], candidate[1] or []) < (result[0], result[1] or []):
+            result = candidate
+    return result
@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+"""批量生成练习纸（不需要交互输入）
+
+用法示例：
+    python batch.py shudu --size 9 --pages 100 --out output --seed 2025
+    python batch.py shudu --size 9 --pages 100 --corpus corpus   # 从预生成题库抽题
+    python batch.py shudu --size 9 --pages 100 --variants 5   # 每道题用对称变换派生 5 道
+    python batch.py shudu --size 16 --pages 20   # 12x12、16x16 数独（DLX 引擎）
+    python batch.py shudu --size 9 --jigsaw 1 --pages 20   # 锯齿数独，使用第 1 种区域布局
+    python batch.py table --op subtract --pages 50
+    python batch.py queue --type 3 --pages 50 --workers 4
+    python batch.py table --op add --pages 50 --format pdf   # 矢量输出（pdf、svg）
+    python batch.py shudu --size 9 --pages 100 --format tif --mode 1   # 黑白位图，CCITT G4 压缩
+    python batch.py shudu --size 9 --pages 500 --document term.pdf   # 写成一份文档，答案在最后
+    python batch.py shudu --size 9 --pages 100 --pipeline   # 生成、绘制、编码三段流水线，打印各阶段统计
+    python batch.py shudu --size 9 --pages 32 --scaling   # 测试 1~N 个进程的加速比
+    python batch.py --regenerate shudu-9-2025-0007   # 按页脚上的页面编号重新生成这一页
+    python batch.py table --op add --pages 20 --verify   # 检查多进程和按编号重新生成的结果完全相同
+
+每一页用 (seed, 页码) 得到这一页专用的随机数生成器（见 common/pageid.py），同样的参数和种子总能生成同样的页面，
+页面编号印在页脚，也是文件名；页面在进程池中并行生成，进程数默认等于 CPU 核数。
+--document 时子进程只生成题目内容，主进程按页码顺序逐页画出并写入同一份文档（PDF、TIFF），
+题目部分在前、答案部分在后，内存中只保留有限几页的内容和当前一页的画布。
+"""
+import argparse
+import collections
+import functools
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for tool in ("ShuDu", "BiaogeGuilv", "PaiDui"):
+    sys.path.insert(0, os.path.join(ROOT, tool))
+
+import BiaogeGuilv  # noqa: E402
+import PaiDui  # noqa: E402
+import ShuDu  # noqa: E402
+from common import instrument, lazy, pageid  # noqa: E402
+
+# 只出题（content_job）时不需要画页面、流水线和进程池，用到时才导入（render 会导入 Pillow）
+cache = lazy.module("common.cache")
+multiprocessing = lazy.module("multiprocessing")
+pipeline = lazy.module("pipeline")
+render = lazy.module("common.render")
+
+
+def render_shudu(size, output_dir, name, options, fmt, mode, rng):
+    puzzles, solutions, regions = shudu_content(size, options, rng)
+    return ShuDu.save_sudoku(puzzles, solutions, size, output_dir, name, verbose=False, fmt=fmt, page_id=name,
+                             regions=regions, mode=mode)
+
+
+def render_table(operation, output_dir, name, options, fmt, mode, rng):
+    return BiaogeGuilv.generate_a4_page(operation, output_dir, f"{name}.{fmt}", rng=rng, page_id=name, mode=mode)
+
+
+def render_queue(choice, output_dir, name, options, fmt, mode, rng):
+    return PaiDui.generate_page(choice, output_dir, f"{name}.{fmt}", rng=rng, page_id=name, mode=mode)
+
+
+# 写成一份文档时分两步：子进程中生成一页的内容（可以序列化传回主进程），
+# 主进程把内容变成 [(文档部分, 绘制函数), ...] 逐页画出
+def shudu_content(size, options, rng):
+    """返回 (题目, 答案, 区域布局)，选项 jigsaw 为锯齿数独的布局序号（见 ShuDu/regions.py）"""
+    options = dict(options)
+    count = options.pop("count", None) or ShuDu.puzzles_per_page(size)  # 每页题数，默认排满一页
+    jigsaw = options.pop("jigsaw", None)
+    regions = ShuDu.region_layouts.jigsaw_regions(size, jigsaw) if jigsaw else None
+    return ShuDu.generate_puzzles(size, count, rng=rng, regions=regions, **options) + (regions,)
+
+
+def shudu_pages(size, content, page_id):
+    puzzles, solutions, regions = content
+    return [("questions", lambda canvas: ShuDu.draw_sudoku_page(canvas, puzzles, size, page_id=page_id,
+                                                                regions=regions)),
+            ("answers", lambda canvas: ShuDu.draw_sudoku_page(canvas, solutions, size, True, puzzles, page_id,
+                                                              regions))]
+
+
+def table_content(operation, options, rng):
+    return BiaogeGuilv.generate_page_tables(operation, rng)
+
+
+def table_pages(operation, tables, page_id):
+    return [("questions", lambda canvas: BiaogeGuilv.draw_a4_page(canvas, operation, tables, page_id=page_id)),
+            ("answers", lambda canvas: BiaogeGuilv.draw_a4_page(canvas, operation, tables, True, page_id))]
+
+
+def queue_content(choice, options, rng):
+    return PaiDui.generate_problems(choice, rng=rng)
+
+
+def queue_pages(choice, problems, page_id):
+    return [("questions", lambda canvas: PaiDui.draw_page(canvas, choice, problems, page_id=page_id)),
+            ("answers", lambda canvas: PaiDui.draw_page(canvas, choice, problems, True, page_id))]
+
+
+# 练习纸类型：(渲染函数, 文件名前缀, 内容生成函数, 页面函数)
+SHEETS = {
+    "shudu": (render_shudu, "shudu", shudu_content, shudu_pages),
+    "table": (render_table, "biaogeguilv", table_content, table_pages),
+    "queue": (render_queue, "paidui", queue_content, queue_pages),
+}
+
+
+# 页面缓存统计的各项（见 common/cache.py）
+CACHE_FIELDS = ("hits", "misses", "writes", "evictions")
+
+
+def job_id(sheet, param, seed, page, options):
+    """页面编号，也是文件名（不含扩展名）"""
+    return pageid.format_id(SHEETS[sheet][1], param, seed, page, options)
+
+
+@instrument.timed("batch.page")
+def render_page(job):
+    """进程池中的任务：用这一页专用的随机数生成器生成并保存一页，返回 (保存的文件路径, 缓存统计)
+    cache_spec 为 (缓存目录, 大小上限) 时先查页面缓存（见 common/cache.py），不用缓存时统计为 None。
+    从题库抽题的页面（内容还取决于题库）不缓存
+    """
+    sheet, param, seed, page, output_dir, options, fmt, mode, cache_spec = job
+    name = job_id(sheet, param, seed, page, options)
+
+    def render_files():
+        return SHEETS[sheet][0](param, output_dir, name, options, fmt, mode, pageid.page_rng(seed, page))
+
+    if cache_spec is None or options.get("corpus_dir"):
+        return render_files(), None
+    store = cache.get_cache(*cache_spec)
+    before = store.stats()
+    paths = store.fetch(store.key(name, fmt, mode=mode), output_dir, render_files)
+    after = store.stats()
+    return paths, {field: after[field] - before[field] for field in CACHE_FIELDS}
+
+
+@instrument.timed("batch.content")
+def content_job(job):
+    """进程池中的任务：用这一页专用的随机数生成器生成一页的内容"""
+    sheet, param, seed, page, options = job
+    return SHEETS[sheet][2](param, options, pageid.page_rng(seed, page))
+
+
+def pool_task(func):
+    """进程池中运行的任务：埋点开启时连同子进程的记录一起返回（见 common/instrument.py）"""
+    return functools.partial(instrument.collected, func) if instrument.enabled else func
+
+
+def pool_result(result):
+    """pool_task 的结果：埋点开启时把子进程的记录合并到本进程"""
+    return instrument.unwrap(result) if instrument.enabled else result
+
+
+def job_pages(job, content):
+    """一页内容对应的 [(文档部分, 绘制函数), ...]，页脚写上页面编号"""
+    sheet, param, seed, page, options = job
+    return SHEETS[sheet][3](param, content, job_id(sheet, param, seed, page, options))
+
+
+def run_document(sheet, param, pages, path, seed, workers, options=None, window=None, mode="RGB"):
+    """把 pages 页写成一份文档（按扩展名选择格式，mode 为位图的颜色模式），返回 (文件路径列表, 每秒页数)
+    子进程最多提前生成 window 页内容（默认为进程数的 2 倍），主进程按页码顺序画出并写入，
+    所以内存占用与总页数无关；生成的文档只由参数和种子决定，与进程数无关
+    """
+    jobs = [(sheet, param, seed, page, options or {}) for page in range(pages)]
+    window = window or 2 * workers
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    start = time.perf_counter()
+    with render.open_document(path, mode) as document:
+        if workers == 1:
+            for job in jobs:
+                for section, draw_page in job_pages(job, content_job(job)):
+                    document.add_page(draw_page, section=section)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                pending = collections.deque()
+                for job in jobs:
+                    pending.append((job, pool.apply_async(pool_task(content_job), (job,))))
+                    if len(pending) >= window:
+                        done, result = pending.popleft()
+                        for section, draw_page in job_pages(done, pool_result(result.get())):
+                            document.add_page(draw_page, section=section)
+                while pending:
+                    done, result = pending.popleft()
+                    for section, draw_page in job_pages(done, pool_result(result.get())):
+                        document.add_page(draw_page, section=section)
+    elapsed = time.perf_counter() - start
+    return document.paths, pages / elapsed
+
+
+def run_batch(sheet, param, pages, output_dir, seed, workers, options=None, fmt="jpg", cache_spec=None, mode="RGB"):
+    """生成 pages 页并返回 (文件路径列表, 每秒页数, 缓存统计)
+    options 是传给具体练习纸生成函数的额外参数，fmt 是输出格式（jpg、png、tif、pdf、svg），mode 是位图的颜色模式，
+    cache_spec 为 (缓存目录, 大小上限) 时使用页面缓存，缓存统计是各进程命中、未命中等次数之和，不用缓存时为 None
+    """
+    jobs = [(sheet, param, seed, page, output_dir, options or {}, fmt, mode, cache_spec) for page in range(pages)]
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    if workers == 1:
+        results = [render_page(job) for job in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = [pool_result(result) for result in pool.imap_unordered(pool_task(render_page), jobs)]
+    elapsed = time.perf_counter() - start
+    paths = sorted(path for result, _ in results for path in result)
+    stats = None
+    if cache_spec is not None:
+        stats = collections.Counter()
+        for _, delta in results:
+            stats.update(delta or {})
+        stats = {field: stats[field] for field in CACHE_FIELDS}
+    return paths, pages / elapsed, stats
+
+
+def draw_raster(draw_page, mode="RGB"):
+    with instrument.span("render.draw"):
+        canvas = render.RasterCanvas(mode=render.canvas_mode(mode))
+        draw_page(canvas)
+    return canvas.image
+
+
+def run_pipelined(sheet, param, pages, output_dir, seed, workers, options=None, fmt="jpg",
+                  draw_threads=2, save_threads=2, queue_size=4, mode="RGB"):
+    """用 pipeline.py 的三段流水线生成 pages 页位图，返回 (文件路径列表, 每秒页数, 各阶段统计)
+    文件名和内容都与 run_batch 相同
+    """
+    params = {"quality": 95} if sheet == "shudu" else {}
+    jobs = [(sheet, param, seed, page, options or {}) for page in range(pages)]
+    os.makedirs(output_dir, exist_ok=True)
+
+    def expand(job, content):
+        content = pool_result(content)
+        path = os.path.join(output_dir, f"{job_id(*job)}.{fmt}")
+        return [(render.section_path(path, section), draw_page) for section, draw_page in job_pages(job, content)]
+
+    def draw(draw_page):
+        return draw_raster(draw_page, mode)
+
+    def save(path, image):
+        with instrument.span("render.encode"):
+            render.to_mode(image, mode).save(path, **params)
+
+    paths, stats, elapsed = pipeline.run_pipeline(jobs, pool_task(content_job), expand, draw, save,
+                                                  workers, draw_threads, save_threads, queue_size)
+    return paths, pages / elapsed, stats
+
+
+def run_scaling(sheet, param, pages, output_dir, seed, max_workers, options=None, fmt="jpg", mode="RGB"):
+    """依次用 1、2、4…max_workers 个进程生成同样的页面，打印吞吐量和加速比"""
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+
+    print(f"{'进程数':<8}{'pages/sec':>12}{'加速比':>10}")
+    base = None
+    for workers in counts:
+        _, rate, _ = run_batch(sheet, param, pages, output_dir, seed, workers, options, fmt, mode=mode)
+        base = base or rate
+        print(f"{workers:<8}{rate:>12.2f}{rate / base:>10.2f}")
+
+
+def parse_page_id(page_id):
+    """把页面编号还原成 (练习纸类型, 参数, 选项, 总种子, 页码)，编号无效时抛出 ValueError"""
+    prefix, param, options, seed, page = pageid.parse_id(page_id)
+    sheets = {entry[1]: sheet for sheet, entry in SHEETS.items()}
+    if prefix not in sheets:
+        raise ValueError(f"未知的练习纸类型：{prefix}")
+    sheet = sheets[prefix]
+    valid = {"shudu": [str(size) for size in ShuDu.region_layouts.SIZES], "table": list(BiaogeGuilv.PRESETS),
+             "queue": [str(choice) for choice in PaiDui.PROBLEM_TYPES]}[sheet]
+    if param not in valid:
+        raise ValueError(f"页面编号中的参数无效：{param}")
+    if options and sheet != "shudu":
+        raise ValueError(f"页面编号中有 {sheet} 不支持的选项：{page_id}")
+    return sheet, param if sheet == "table" else int(param), options, seed, page
+
+
+def regenerate(page_id, output_dir, fmt="jpg", corpus_dir=None, cache_spec=None, mode="RGB"):
+    """按页面编号重新生成这一页（与原来的文件名和内容都相同），返回保存的文件路径
+    从题库抽题的数独页要传入同一个题库目录；cache_spec、mode 同 run_batch"""
+    sheet, param, options, seed, page = parse_page_id(page_id)
+    if sheet == "shudu":
+        options = dict(options, corpus_dir=corpus_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    return render_page((sheet, param, seed, page, output_dir, options, fmt, mode, cache_spec))[0]
+
+
+def _digests(directory):
+    result = {}
+    for name in os.listdir(directory):
+        with open(os.path.join(directory, name), "rb") as f:
+            result[name] = hashlib.sha256(f.read()).hexdigest()
+    return result
+
+
+def verify_determinism(sheet, param, pages, seed, workers, options=None, fmt="jpg", mode="RGB"):
+    """检查生成结果只由页面编号决定，返回内容不一致的文件名列表（为空表示通过）
+    分别用 1 个进程和 workers 个进程（至少 2 个）批量生成、写成一份 PDF 文档，
+    再按编号逐页重新生成、经过页面缓存生成两次（第二次全部命中），比较各份文件的 SHA-256
+    """
+    workers = max(2, workers)
+    with tempfile.TemporaryDirectory() as tmp:
+        dirs = {name: os.path.join(tmp, name) for name in ("serial", "parallel", "regenerated", "cached",
+                                                          "serial-doc", "parallel-doc")}
+        run_batch(sheet, param, pages, dirs["serial"], seed, 1, options, fmt, mode=mode)
+        run_batch(sheet, param, pages, dirs["parallel"], seed, workers, options, fmt, mode=mode)
+        cache_spec = (os.path.join(tmp, "cache"), cache.DEFAULT_MAX_BYTES)
+        run_batch(sheet, param, pages, os.path.join(tmp, "cache-miss"), seed, workers, options, fmt, cache_spec, mode)
+        run_batch(sheet, param, pages, dirs["cached"], seed, workers, options, fmt, cache_spec, mode)
+        for page in range(pages):
+            regenerate(job_id(sheet, param, seed, page, options or {}), dirs["regenerated"], fmt,
+                       (options or {}).get("corpus_dir"), mode=mode)
+        run_document(sheet, param, pages, os.path.join(dirs["serial-doc"], "term.pdf"), seed, 1, options)
+        run_document(sheet, param, pages, os.path.join(dirs["parallel-doc"], "term.pdf"), seed, workers, options)
+
+        mismatches = []
+        for group in (("serial", "parallel", "regenerated", "cached"), ("serial-doc", "parallel-doc")):
+            digests = [_digests(dirs[name]) for name in group]
+            names = sorted(set().union(*digests))
+            mismatches += [name for name in names if len({digest.get(name) for digest in digests}) != 1]
+        return mismatches
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="批量生成练习纸")
+    parser.add_argument("sheet", nargs="?", choices=sorted(SHEETS), help="练习纸类型")
+    parser.add_argument("--size", type=int, choices=ShuDu.region_layouts.SIZES, default=9, help="数独尺寸（shudu）")
+    parser.add_argument("--op", choices=sorted(BiaogeGuilv.PRESETS), default="add", help="运算类型（table）")
+    parser.add_argument("--type", type=int, choices=sorted(PaiDui.PROBLEM_TYPES), default=3,
+                        help="题型（queue）")
+    parser.add_argument("--pages", type=int, default=1, help="页数")
+    parser.add_argument("--out", default="images", help="输出目录")
+    parser.add_argument("--seed", type=int, default=None, help="总随机种子（非负整数），不指定时随机选择")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数")
+    parser.add_argument("--corpus", default=None, help="数独题库目录（shudu），指定时从题库抽题")
+    parser.add_argument("--variants", type=int, default=1,
+                        help="每道数独用对称变换派生的题目数（shudu）")
+    parser.add_argument("--grade", type=int, choices=sorted(ShuDu.grader.GRADES), default=None,
+                        help="数独难度等级（shudu），不指定时随机挖空；4x4 只有 1 级，6x6 最高 2 级")
+    parser.add_argument("--jigsaw", type=int, default=None, metavar="N",
+                        help="锯齿数独（shudu），使用该尺寸的第 N 种区域布局（6x6、9x9）")
+    parser.add_argument("--format", choices=["jpg", "png", "tif", "pdf", "svg"], default="jpg", help="输出格式")
+    parser.add_argument("--mode", choices=render.RASTER_MODES, default="RGB",
+                        help="位图的颜色模式：RGB 彩色、L 灰度、1 黑白（png、tif，tif 用 CCITT G4 压缩）")
+    parser.add_argument("--document", default=None,
+                        help="把所有页面写成一份文档（如 term.pdf、term.tiff），答案在最后")
+    parser.add_argument("--scaling", action="store_true", help="测试 1~workers 个进程的加速比")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="生成（--workers 个进程）、绘制、编码写盘三段流水线并行（jpg、png）")
+    parser.add_argument("--draw-threads", type=int, default=2, help="流水线的绘制线程数")
+    parser.add_argument("--save-threads", type=int, default=2, help="流水线的编码写盘线程数")
+    parser.add_argument("--queue-size", type=int, default=4, help="流水线阶段之间的队列长度")
+    parser.add_argument("--regenerate", default=None, metavar="ID",
+                        help="按页脚上的页面编号重新生成这一页（如 shudu-9-2025-0007），输出到 --out")
+    parser.add_argument("--verify", action="store_true",
+                        help="检查 1 个进程、多个进程和按编号重新生成的结果完全相同")
+    parser.add_argument("--cache", default=None, metavar="DIR",
+                        help="页面缓存目录：同样编号、格式的页面第二次生成时直接复制缓存的文件")
+    parser.add_argument("--cache-size", type=int, default=cache.DEFAULT_MAX_BYTES // 2 ** 20,
+                        help="页面缓存的大小上限（MB），超过时删除最久没用过的页面")
+    parser.add_argument("--profile", default=None, metavar="FILE",
+                        help="记录各阶段耗时和计数（见 common/instrument.py），写到 FILE：.json 为 JSON，其他为火焰图的折叠栈格式")
+    parser.add_argument("--cprofile", default=None, metavar="FILE",
+                        help="对 --regenerate 的这一页做 cProfile 分析，统计写到 FILE")
+    parser.add_argument("--tracemalloc", type=int, default=0, metavar="N",
+                        help="对 --regenerate 的这一页做 tracemalloc 分析，显示占用内存最多的 N 处")
+    args = parser.parse_args(argv)
+    if args.sheet is None and args.regenerate is None:
+        parser.error("需要指定练习纸类型（shudu、table、queue）或 --regenerate 编号")
+    if args.pipeline and args.format not in ("jpg", "png"):
+        parser.error("--pipeline 只支持 jpg、png 格式")
+    if (args.cprofile or args.tracemalloc) and not args.regenerate:
+        parser.error("--cprofile、--tracemalloc 只分析单独一页，需要和 --regenerate 一起使用")
+    if args.seed is not None and args.seed < 0:
+        parser.error("--seed 不能是负数（页面编号中的种子是非负整数）")
+    if args.mode == "1" and args.format == "jpg" and not args.document:
+        parser.error("JPEG 不能保存黑白（1）模式，请加上 --format png 或 tif")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        run(args)
+        return
+    instrument.enable()
+    try:
+        run(args)
+    finally:
+        data = instrument.snapshot()
+        instrument.dump(args.profile, data)
+        print(instrument.format_summary(data))
+        print(f"埋点记录已写入 {args.profile}")
+
+
+def run(args):
+    cache_spec = (args.cache, args.cache_size * 2 ** 20) if args.cache else None
+    if args.regenerate:
+        try:
+            paths, report = instrument.profile_call(
+                lambda: regenerate(args.regenerate, args.out, args.format, args.corpus, cache_spec, args.mode),
+                args.cprofile, args.tracemalloc)
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"已按编号 {args.regenerate} 重新生成：{', '.join(paths)}")
+        if report:
+            print(report)
+        return
+
+    param = {"shudu": args.size, "table": args.op, "queue": args.type}[args.sheet]
+    seed = args.seed if args.seed is not None else random.randrange(10 ** 6)
+    workers = max(1, min(args.workers, args.pages))
+    options = {}
+    if args.sheet == "shudu":
+        options = {"corpus_dir": args.corpus, "variants": args.variants, "grade": args.grade, "jigsaw": args.jigsaw}
+        try:
+            regions = ShuDu.region_layouts.jigsaw_regions(args.size, args.jigsaw) if args.jigsaw is not None else None
+            if args.grade is not None:
+                ShuDu.grader.check_grade(args.size, args.grade, regions)
+        except ValueError as e:
+            sys.exit(str(e))
+
+    if args.verify:
+        mismatches = verify_determinism(args.sheet, param, args.pages, seed, args.workers, options, args.format,
+                                        args.mode)
+        if mismatches:
+            sys.exit(f"种子 {seed}：以下文件内容不一致：{', '.join(mismatches)}")
+        print(f"种子 {seed}：{args.pages} 页在 1 个进程、{max(2, args.workers)} 个进程、按编号重新生成和经过缓存时完全相同")
+        return
+
+    if args.scaling:
+        run_scaling(args.sheet, param, args.pages, args.out, seed, workers, options, args.format, args.mode)
+        return
+
+    if args.pipeline:
+        paths, rate, stats = run_pipelined(args.sheet, param, args.pages, args.out, seed, workers, options,
+                                           args.format, args.draw_threads, args.save_threads, args.queue_size,
+                                           args.mode)
+        print(f"已生成 {args.pages} 页（{len(paths)} 个文件）到 {args.out}，种子 {seed}，{rate:.2f} pages/sec")
+        print(pipeline.format_stats(stats))
+        return
+
+    if args.document:
+        paths, rate = run_document(args.sheet, param, args.pages, args.document, seed, workers, options,
+                                   mode=args.mode)
+        print(f"已生成 {args.pages} 页到 {', '.join(paths)}，种子 {seed}")
+        print(f"{workers} 个进程，{rate:.2f} pages/sec")
+        return
+
+    paths, rate, stats = run_batch(args.sheet, param, args.pages, args.out, seed, workers, options, args.format,
+                                   cache_spec, args.mode)
+    print(f"已生成 {args.pages} 页（{len(paths)} 个文件）到 {args.out}，种子 {seed}")
+    print(f"{workers} 个进程，{rate:.2f} pages/sec")
+    if stats is not None:
+        print(f"页面缓存：命中 {stats['hits']}，未命中 {stats['misses']}，写入 {stats['writes']}，"
+              f"删除 {stats['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
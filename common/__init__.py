@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""三个练习纸生成工具共用的模块"""
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""共用模块的性能测试
+
+用法（在仓库根目录下）：python -m common.benchmark [每项测试秒数]
+"""
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不统计内存
+    resource = None
+
+from PIL import Image, ImageDraw, ImageFont
+
+from common import fonts, glyphs, render
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 练习纸上实际会出现的文字
+TEXTS = [str(n) for n in range(1, 19)] + ["+", "-"]
+CELL = 100
+
+
+def _font(size):
+    try:
+        return fonts.get_font("sans", size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def draw_plain(draw, font, text, x, y):
+    """原来的画法：每次都测量并光栅化"""
+    bbox = draw.textbbox((0, 0), text, font=font)
+    draw.text((x + (CELL - (bbox[2] - bbox[0])) // 2, y + (CELL - (bbox[3] - bbox[1])) // 2),
+              text, fill="black", font=font)
+
+
+def draw_atlas(draw, font, text, x, y):
+    glyphs.draw_centered(draw, (x, y, CELL, CELL), text, font)
+
+
+def glyphs_per_second(draw_func, seconds):
+    image = Image.new("RGB", (2480, 3508), "white")
+    draw = ImageDraw.Draw(image)
+    font = _font(40)
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for k in range(500):
+            x = (k % 24) * CELL
+            y = (k // 24) * CELL
+            draw_func(draw, font, TEXTS[k % len(TEXTS)], x, y)
+        count += 500
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def bench_glyphs(seconds):
+    print("== 画字（glyphs/sec）==")
+    plain = glyphs_per_second(draw_plain, seconds)
+    atlas = glyphs_per_second(draw_atlas, seconds)
+    print(f"{'textbbox + draw.text':<24}{plain:>12.0f}")
+    print(f"{'字形缓存':<20}{atlas:>12.0f}  ({atlas / plain:.1f}x)")
+
+
+def loads_per_second(load, seconds):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for size in (30, 36, 48, 65):
+            load(size)
+        count += 4
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def bench_fonts(seconds):
+    print("== 取字体（fonts/sec）==")
+    try:
+        path = fonts.resolve("sans")
+    except OSError:
+        print("找不到 sans 字体，跳过字体测试")
+        return
+    fonts.clear()
+    plain = loads_per_second(lambda size: ImageFont.truetype(path, size), seconds)
+    cached = loads_per_second(lambda size: fonts.get_font("sans", size), seconds)
+    print(f"{'ImageFont.truetype':<24}{plain:>12.0f}")
+    print(f"{'字体注册表':<19}{cached:>12.0f}  ({cached / plain:.0f}x)")
+    print(f"缓存统计：{fonts.stats()}")
+
+
+def _page_drawers(verbose=True):
+    """三种练习纸各一页的绘制函数（题目固定，只测渲染和编码）"""
+    for tool in ("ShuDu", "BiaogeGuilv", "PaiDui"):
+        sys.path.insert(0, os.path.join(ROOT, tool))
+    import BiaogeGuilv
+    import PaiDui
+    import ShuDu
+
+    random.seed(0)
+    puzzles, _ = ShuDu.generate_puzzles(9, ShuDu.PUZZLES_PER_PAGE)
+    drawers = [("shudu", lambda canvas: ShuDu.draw_sudoku_page(canvas, puzzles, 9), {"quality": 95}),
+               ("table", lambda canvas: BiaogeGuilv.draw_a4_page(canvas, "add"), {})]
+    try:
+        PaiDui.get_font_path()
+        drawers.append(("queue", lambda canvas: PaiDui.draw_page(canvas, 3), {}))
+    except FileNotFoundError:
+        if verbose:
+            print("找不到中文字体，跳过排队问题")
+    return drawers
+
+
+# 位图颜色模式的测试：(名称, 颜色模式, Image.save 的参数)，第一项是原来的 RGB + JPEG
+RASTER_CONFIGS = [
+    ("RGB jpg", "RGB", {"format": "JPEG"}),
+    ("L jpg", "L", {"format": "JPEG"}),
+    ("L png", "L", {"format": "PNG"}),
+    ("1 png", "1", {"format": "PNG"}),
+    ("1 tif G4", "1", {"format": "TIFF", "compression": "group4", "dpi": (render.DPI, render.DPI)}),
+]
+
+
+def _peak_rss():
+    """进程到目前为止的最大常驻内存（MB），不支持时为 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _raster_mode_worker(name, config, seconds):
+    """在新进程中反复画一页并编码，返回 (每页绘制 ms, 每页编码 ms, 每页字节数, 画页面之前和之后的最大常驻内存 MB)"""
+    drawers = {entry[0]: entry for entry in _page_drawers(verbose=False)}
+    if name not in drawers:
+        return None
+    _, draw_page, params = drawers[name]
+    _, mode, save_params = config
+    if save_params["format"] == "JPEG":
+        save_params = dict(save_params, **params)
+    before = _peak_rss()
+    count = draw_time = encode_time = size = 0
+    while draw_time + encode_time < seconds:
+        random.seed(0)
+        start = time.perf_counter()
+        canvas = render.RasterCanvas(mode=render.canvas_mode(mode))
+        draw_page(canvas)
+        drawn = time.perf_counter()
+        output = io.BytesIO()
+        render.to_mode(canvas.image, mode).save(output, **save_params)
+        encode_time += time.perf_counter() - drawn
+        draw_time += drawn - start
+        size = output.tell()
+        count += 1
+        del canvas, output
+    return draw_time * 1000 / count, encode_time * 1000 / count, size, before, _peak_rss()
+
+
+def bench_raster_modes(seconds):
+    """RGB + JPEG 与灰度、黑白位图比较：每页绘制、编码耗时，文件大小和进程的最大常驻内存
+    每一项在新的进程中测试，最大常驻内存互不影响
+    """
+    print("== 位图颜色模式（每页）==")
+    print(f"{'练习纸':<8}{'模式':<12}{'绘制 ms':>10}{'编码 ms':>10}{'KB':>10}{'峰值 MB':>10}{'页面 MB':>10}")
+    context = multiprocessing.get_context("spawn")
+    for name in ("shudu", "table", "queue"):
+        for config in RASTER_CONFIGS:
+            with context.Pool(1) as pool:
+                result = pool.apply(_raster_mode_worker, (name, config, seconds))
+            if result is None:
+                print(f"{name:<10}跳过（找不到中文字体）")
+                break
+            draw_ms, encode_ms, size, before, peak = result
+            memory = ("-", "-") if peak is None else (f"{peak:.0f}", f"{peak - before:.0f}")
+            print(f"{name:<10}{config[0]:<14}{draw_ms:>10.1f}{encode_ms:>10.1f}{size / 1024:>10.1f}"
+                  f"{memory[0]:>10}{memory[1]:>10}")
+
+
+def _document_size(document):
+    return sum(os.path.getsize(path) for path in document.paths)
+
+
+def bench_backends(seconds, pages=20):
+    """每种输出格式生成一份 pages 页的文档：每秒页数、平均每页字节数（SVG 每页内嵌字体子集）"""
+    print(f"== 输出格式（{pages} 页一份文档）==")
+    print(f"{'练习纸':<8}{'格式':<6}{'pages/sec':>12}{'KB/page':>12}")
+    directory = tempfile.mkdtemp()
+    try:
+        for name, draw_page, params in _page_drawers():
+            for ext in ("jpg", "pdf", "svg"):
+                count = size = 0
+                start = time.perf_counter()
+                while True:
+                    path = os.path.join(directory, f"{name}-{count}.{ext}")
+                    with render.open_document(path, **params) as document:
+                        for _ in range(pages):
+                            random.seed(0)
+                            document.add_page(draw_page)
+                    count += 1
+                    size = _document_size(document)
+                    elapsed = time.perf_counter() - start
+                    if elapsed >= seconds:
+                        break
+                print(f"{name:<10}{ext:<8}{count * pages / elapsed:>12.2f}{size / pages / 1024:>12.1f}")
+    finally:
+        shutil.rmtree(directory)
+
+
+# 导入耗时的测试：(名称, 代码, 是否只出题)，只出题的代码不应导入 Pillow
+IMPORT_WORKLOADS = [
+    ("import studenttools", "import studenttools", True),
+    ("出题 shudu", "import studenttools; studenttools.generate('shudu', 9, 1)", True),
+    ("出题 table", "import studenttools; studenttools.generate('table', 'add', 1)", True),
+    ("出题 queue", "import studenttools; studenttools.generate('queue', 3, 1)", True),
+    ("import batch", "import batch", True),
+    ("画页面 shudu", "import studenttools; studenttools.images('shudu', 9, 1)", False),
+]
+
+
+def _import_times(code):
+    """在新的解释器中用 -X importtime 运行 code，返回 (导入总耗时, 导入的模块数, Pillow 各模块自身耗时之和)，
+    单位为微秒，没有导入 Pillow 时最后一项为 None
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    total, modules, pil = 0, 0, None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules += 1
+        if name[1] != " ":  # 模块名前只有一个空格的是顶层导入，累计耗时之和就是导入总耗时
+            total += int(cumulative)
+        if name.strip().split(".")[0] == "PIL":
+            pil = (pil or 0) + int(own)
+    return total, modules, pil
+
+
+def bench_imports(repeat=3):
+    """各种用法的启动开销：导入的模块数、导入总耗时、其中 Pillow 的耗时（每项取 repeat 次中最快的一次）"""
+    print(f"{'模块数':>5}{'导入 ms':>10}{'Pillow ms':>11}  用法")
+    for name, code, generation_only in IMPORT_WORKLOADS:
+        total, modules, pil = min((_import_times(code) for _ in range(repeat)), key=lambda run: run[0])
+        pil_text = f"{'未导入':>8}" if pil is None else f"{pil / 1000:>11.1f}"  # 中文字符占两列
+        print(f"{modules:>8}{total / 1000:>11.1f}{pil_text}  {name}")
+        if generation_only and pil is not None:
+            print(f"  警告：{name} 只出题，却导入了 Pillow")
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    bench_glyphs(seconds)
+    bench_fonts(seconds)
+    bench_backends(seconds)
+    bench_raster_modes(seconds)
+    bench_imports()
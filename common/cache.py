@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""按内容寻址的页面缓存
+
+同样的页面编号（见 common/pageid.py）、输出格式和渲染版本总是生成同样的文件，
+所以把生成好的文件内容按这些参数的 SHA-256 存在缓存目录中，再次请求时只需读一次文件。
+- 一条缓存是一页生成的全部文件（题目、答案），存成一个文件 ab/abcd….page
+- 写入时先写临时文件再 os.replace，多个进程同时写同一条也不会读到半个文件
+- 命中时更新文件的修改时间，总大小超过上限时按修改时间删除最久没用过的缓存（LRU）
+- 每个 RenderCache 统计命中、未命中、写入和删除的次数
+"""
+import hashlib
+import os
+import struct
+import tempfile
+
+from common import render
+
+# 缓存目录的默认大小上限（字节）
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# 超过上限时删除到上限的这个比例，避免每次写入都要清理
+EVICT_RATIO = 0.9
+
+_caches = {}
+
+
+def get_cache(directory, max_bytes=DEFAULT_MAX_BYTES):
+    """每个进程对同一个缓存目录只用一个 RenderCache"""
+    key = (os.path.abspath(directory), max_bytes)
+    if key not in _caches:
+        _caches[key] = RenderCache(directory, max_bytes)
+    return _caches[key]
+
+
+def _pack(files):
+    data = bytearray()
+    for name, content in files:
+        encoded = name.encode("utf-8")
+        data += struct.pack(">HQ", len(encoded), len(content)) + encoded + content
+    return bytes(data)
+
+
+def _unpack(data):
+    files = []
+    pos = 0
+    while pos < len(data):
+        name_length, length = struct.unpack_from(">HQ", data, pos)
+        pos += 10
+        name = data[pos:pos + name_length].decode("utf-8")
+        pos += name_length
+        files.append((name, data[pos:pos + length]))
+        pos += length
+    return files
+
+
+class RenderCache:
+    """缓存目录中的页面文件"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size = None  # 估计的缓存总大小，第一次写入时统计
+
+    @staticmethod
+    def key(page_id, fmt, mode="RGB", section=None):
+        """缓存键：渲染版本、页面编号、输出格式、颜色模式和页面部分（None 为题目、答案全部）的 SHA-256
+        生成的文件取决于的每个参数都要在键中，否则不同的请求会取到同一份缓存
+        """
+        parts = (render.RENDER_VERSION, page_id, fmt, ("mode", mode), ("section", section))
+        return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.page")
+
+    def get(self, key):
+        """返回 [(文件名, 内容), ...]，没有缓存时返回 None"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:  # 没有缓存，或者刚被其他进程删除
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _unpack(data)
+
+    def put(self, key, files):
+        """写入一条缓存：先写同目录下的临时文件，再原子地替换"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = _pack(files)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)  # 覆盖已有的同一条缓存时，总大小只增加两者之差
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.writes += 1
+        if self._size is None:
+            self._size = self._scan()[0]
+        else:
+            self._size += len(data) - replaced
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def fetch(self, key, output_dir, render_files):
+        """把一页的文件放到 output_dir，返回文件路径
+        命中时直接写出缓存的内容；否则调用 render_files() 生成（返回文件路径），再把文件内容存入缓存
+        """
+        files = self.get(key)
+        if files is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            paths = []
+            for name, content in files:
+                paths.append(os.path.join(output_dir, name))
+                with open(paths[-1], "wb") as f:
+                    f.write(content)
+            return tuple(paths)
+
+        paths = render_files()
+        files = []
+        for path in paths:
+            with open(path, "rb") as f:
+                files.append((os.path.basename(path), f.read()))
+        self.put(key, files)
+        return paths
+
+    def _scan(self):
+        """返回 (总大小, [(修改时间, 大小, 路径), ...])"""
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".page"):
+                    path = os.path.join(root, name)
+                    try:
+                        info = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((info.st_mtime, info.st_size, path))
+        return sum(entry[1] for entry in entries), entries
+
+    def _evict(self):
+        """按修改时间从旧到新删除，直到总大小不超过上限的 EVICT_RATIO（其他进程的写入也一并计入）"""
+        total, entries = self._scan()
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes * EVICT_RATIO:
+                    break
+                try:
+                    os.unlink(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+        self._size = total
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""读取 TrueType 字体文件，供矢量输出嵌入字体
+
+只用标准库解析矢量输出需要的几张表：字符到字形编号的映射（cmap）、字形宽度（hmtx）、
+字体度量（head/hhea）和 PostScript 名称（name）。.ttc 字体集合按编号取出其中一个字体。
+subset 只保留用到的字形轮廓、字形编号不变，PDF 中按字形编号引用字形，
+所以一份文档只需嵌入一个很小的子集字体。
+web_subset 生成可以单独使用的子集字体（SVG 的 @font-face 内嵌）：字形重新编号，
+带有只包含用到的字符的 cmap，以及浏览器要求的 name、OS/2、post 表。
+只支持 TrueType 轮廓（glyf 表）的字体，CFF 轮廓的 .otf 字体不能嵌入。
+"""
+import struct
+
+# PDF 嵌入 TrueType 字体（FontFile2）需要的表
+SUBSET_TABLES = ("head", "hhea", "hmtx", "maxp", "cvt ", "fpgm", "prep")
+
+# 单独使用的子集字体另外原样保留的表（cmap、post 重新生成）
+WEB_TABLES = ("cvt ", "fpgm", "prep", "name", "OS/2")
+
+
+def _checksum(data):
+    data += b"\0" * (-len(data) % 4)
+    return sum(struct.unpack(f">{len(data) // 4}I", data)) & 0xFFFFFFFF
+
+
+def build_sfnt(tables, version=b"\x00\x01\x00\x00"):
+    """把 {表名: 数据} 拼成一个完整的字体文件"""
+    tags = sorted(tables)
+    count = len(tags)
+    entry_selector = max(count.bit_length() - 1, 0)
+    search_range = (1 << entry_selector) * 16
+    header = version + struct.pack(">HHHH", count, search_range, entry_selector, count * 16 - search_range)
+    offset = 12 + 16 * count
+    directory, body = b"", b""
+    for tag in tags:
+        data = tables[tag]
+        directory += struct.pack(">4sIII", tag.encode("latin-1"), _checksum(data), offset + len(body), len(data))
+        body += data + b"\0" * (-len(data) % 4)
+    return header + directory + body
+
+
+def _components(glyph):
+    """复合字形引用的字形编号"""
+    if len(glyph) < 10 or struct.unpack_from(">h", glyph, 0)[0] >= 0:
+        return []
+    result = []
+    pos = 10
+    while True:
+        flags, gid = struct.unpack_from(">HH", glyph, pos)
+        result.append(gid)
+        pos += 4 + (4 if flags & 0x0001 else 2)
+        if flags & 0x0008:
+            pos += 2
+        elif flags & 0x0040:
+            pos += 4
+        elif flags & 0x0080:
+            pos += 8
+        if not flags & 0x0020:
+            return result
+
+
+def _remap_components(glyph, mapping):
+    """把复合字形引用的字形编号按 mapping 改成新的编号"""
+    glyph = bytearray(glyph)
+    pos = 10
+    while True:
+        flags, gid = struct.unpack_from(">HH", glyph, pos)
+        struct.pack_into(">H", glyph, pos + 2, mapping[gid])
+        pos += 4 + (4 if flags & 0x0001 else 2)
+        if flags & 0x0008:
+            pos += 2
+        elif flags & 0x0040:
+            pos += 4
+        elif flags & 0x0080:
+            pos += 8
+        if not flags & 0x0020:
+            return bytes(glyph)
+
+
+def _build_cmap(codes):
+    """{字符编码: 字形编号} 的 cmap 表：格式 4（BMP 字符，每个字符一段），有 BMP 以外的字符时另加格式 12"""
+    bmp = sorted(code for code in codes if code < 0xFFFF)
+    seg = len(bmp) + 1
+    entry_selector = seg.bit_length() - 1
+    search_range = 2 << entry_selector
+    ends = bmp + [0xFFFF]
+    deltas = [(codes[code] - code) & 0xFFFF for code in bmp] + [1]
+    body = struct.pack(f">{seg}HH{seg}H{seg}H{seg}H", *ends, 0, *ends, *deltas, *[0] * seg)
+    header = struct.pack(">7H", 4, 14 + len(body), 0, 2 * seg, search_range, entry_selector, 2 * seg - search_range)
+    subtables = [((3, 1), header + body)]
+    wide = sorted(code for code in codes if code > 0xFFFF)
+    if wide:
+        groups = b"".join(struct.pack(">III", code, code, codes[code]) for code in wide)
+        subtables.append(((3, 10), struct.pack(">HHIII", 12, 0, 16 + len(groups), 0, len(wide)) + groups))
+    data = struct.pack(">HH", 0, len(subtables))
+    offset = 4 + 8 * len(subtables)
+    for (platform, encoding), sub in subtables:
+        data += struct.pack(">HHI", platform, encoding, offset)
+        offset += len(sub)
+    return data + b"".join(sub for _, sub in subtables)
+
+
+class FontFile:
+    """一个 TrueType 字体的表和度量"""
+
+    def __init__(self, path, index=0):
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        if data[:4] == b"ttcf":
+            offset = struct.unpack_from(">I", data, 12 + 4 * index)[0]
+        self.version = data[offset:offset + 4]
+        self.tables = {}
+        for k in range(struct.unpack_from(">H", data, offset + 4)[0]):
+            tag, _, start, length = struct.unpack_from(">4sIII", data, offset + 12 + 16 * k)
+            self.tables[tag.decode("latin-1")] = data[start:start + length]
+
+        head = self.tables["head"]
+        self.units_per_em = struct.unpack_from(">H", head, 18)[0]
+        self.bbox = struct.unpack_from(">hhhh", head, 36)
+        self.ascent, self.descent = struct.unpack_from(">hh", self.tables["hhea"], 4)
+        num_metrics = struct.unpack_from(">H", self.tables["hhea"], 34)[0]
+        self.advances = struct.unpack_from(f">{num_metrics * 2}H", self.tables["hmtx"])[::2]
+        self.num_glyphs = struct.unpack_from(">H", self.tables["maxp"], 4)[0]
+        self.cmap = self._read_cmap()
+        self.name = self._read_name()
+
+    @property
+    def truetype(self):
+        return "glyf" in self.tables
+
+    def glyph_id(self, ch):
+        return self.cmap.get(ord(ch), 0)
+
+    def advance(self, gid):
+        """字形宽度，以 1/1000 em 为单位（PDF 的单位）"""
+        return round(self.advances[min(gid, len(self.advances) - 1)] * 1000 / self.units_per_em)
+
+    def _read_cmap(self):
+        cmap = self.tables["cmap"]
+        subtables = {}
+        for k in range(struct.unpack_from(">H", cmap, 2)[0]):
+            platform, encoding, offset = struct.unpack_from(">HHI", cmap, 4 + 8 * k)
+            subtables[(platform, encoding)] = offset
+        for key in ((3, 10), (0, 4), (3, 1), (0, 3), (0, 1)):
+            if key in subtables:
+                sub = cmap[subtables[key]:]
+                fmt = struct.unpack_from(">H", sub, 0)[0]
+                if fmt == 12:
+                    return self._cmap12(sub)
+                if fmt == 4:
+                    return self._cmap4(sub)
+        return {}
+
+    @staticmethod
+    def _cmap4(sub):
+        result = {}
+        seg = struct.unpack_from(">H", sub, 6)[0] // 2
+        ends = struct.unpack_from(f">{seg}H", sub, 14)
+        starts = struct.unpack_from(f">{seg}H", sub, 16 + 2 * seg)
+        deltas = struct.unpack_from(f">{seg}H", sub, 16 + 4 * seg)
+        range_base = 16 + 6 * seg
+        ranges = struct.unpack_from(f">{seg}H", sub, range_base)
+        for i in range(seg):
+            for code in range(starts[i], ends[i] + 1):
+                if code == 0xFFFF:
+                    continue
+                if ranges[i] == 0:
+                    gid = (code + deltas[i]) & 0xFFFF
+                else:
+                    addr = range_base + 2 * i + ranges[i] + 2 * (code - starts[i])
+                    gid = struct.unpack_from(">H", sub, addr)[0]
+                    if gid:
+                        gid = (gid + deltas[i]) & 0xFFFF
+                if gid:
+                    result[code] = gid
+        return result
+
+    @staticmethod
+    def _cmap12(sub):
+        result = {}
+        for k in range(struct.unpack_from(">I", sub, 12)[0]):
+            start, end, gid = struct.unpack_from(">III", sub, 16 + 12 * k)
+            for code in range(start, end + 1):
+                result[code] = gid + code - start
+        return result
+
+    def _read_name(self):
+        name = self.tables.get("name")
+        if name:
+            count, strings = struct.unpack_from(">HH", name, 2)
+            for k in range(count):
+                platform, _, _, name_id, length, offset = struct.unpack_from(">6H", name, 6 + 12 * k)
+                if name_id == 6:
+                    raw = name[strings + offset:strings + offset + length]
+                    text = raw.decode("utf-16-be" if platform in (0, 3) else "latin-1", "ignore")
+                    text = "".join(ch for ch in text if ch.isascii() and ch.isalnum() or ch in "-_")
+                    if text:
+                        return text
+        return "Font"
+
+    def sfnt(self):
+        """完整的单个字体文件（从 .ttc 中取出时会重建表目录）"""
+        return build_sfnt(self.tables, self.version)
+
+    def subset(self, gids):
+        """只保留 gids（以及复合字形引用到的字形）轮廓的字体文件，字形编号不变"""
+        if not self.truetype:
+            raise ValueError(f"{self.name} 不是 TrueType 轮廓字体，不能生成子集")
+        head = bytearray(self.tables["head"])
+        short = struct.unpack_from(">h", head, 50)[0] == 0
+        loca = self.tables["loca"]
+        if short:
+            offsets = [2 * n for n in struct.unpack_from(f">{self.num_glyphs + 1}H", loca)]
+        else:
+            offsets = struct.unpack_from(f">{self.num_glyphs + 1}I", loca)
+        glyf = self.tables["glyf"]
+
+        keep = {0} | set(gids)
+        stack = list(keep)
+        while stack:
+            gid = stack.pop()
+            for component in _components(glyf[offsets[gid]:offsets[gid + 1]]):
+                if component not in keep:
+                    keep.add(component)
+                    stack.append(component)
+
+        new_glyf = bytearray()
+        new_loca = []
+        for gid in range(self.num_glyphs):
+            new_loca.append(len(new_glyf))
+            if gid in keep:
+                new_glyf += glyf[offsets[gid]:offsets[gid + 1]]
+                new_glyf += b"\0" * (-len(new_glyf) % 4)
+        new_loca.append(len(new_glyf))
+
+        # 改用长格式的 loca，校验和调整值清零
+        struct.pack_into(">I", head, 8, 0)
+        struct.pack_into(">h", head, 50, 1)
+        tables = {tag: self.tables[tag] for tag in SUBSET_TABLES if tag in self.tables}
+        tables["head"] = bytes(head)
+        tables["glyf"] = bytes(new_glyf)
+        tables["loca"] = struct.pack(f">{len(new_loca)}I", *new_loca)
+        return build_sfnt(tables)
+
+    def web_subset(self, chars):
+        """只包含 chars 中这些字符的字体文件，可以单独使用（例如 SVG 中以 data: URI 内嵌）"""
+        if not self.truetype:
+            raise ValueError(f"{self.name} 不是 TrueType 轮廓字体，不能生成子集")
+        head = bytearray(self.tables["head"])
+        short = struct.unpack_from(">h", head, 50)[0] == 0
+        loca = self.tables["loca"]
+        if short:
+            offsets = [2 * n for n in struct.unpack_from(f">{self.num_glyphs + 1}H", loca)]
+        else:
+            offsets = struct.unpack_from(f">{self.num_glyphs + 1}I", loca)
+        glyf = self.tables["glyf"]
+
+        codes = {ord(ch): self.glyph_id(ch) for ch in chars if self.glyph_id(ch)}
+        keep = {0} | set(codes.values())
+        stack = list(keep)
+        while stack:
+            gid = stack.pop()
+            for component in _components(glyf[offsets[gid]:offsets[gid + 1]]):
+                if component not in keep:
+                    keep.add(component)
+                    stack.append(component)
+        order = sorted(keep)
+        mapping = {gid: k for k, gid in enumerate(order)}
+
+        # 字形按新编号排列，hmtx 每个字形都写出宽度和左边距
+        num_metrics = len(self.advances)
+        hmtx = self.tables["hmtx"]
+        new_glyf, new_loca, new_hmtx = bytearray(), [], b""
+        for gid in order:
+            new_loca.append(len(new_glyf))
+            glyph = glyf[offsets[gid]:offsets[gid + 1]]
+            new_glyf += _remap_components(glyph, mapping) if _components(glyph) else glyph
+            new_glyf += b"\0" * (-len(new_glyf) % 4)
+            lsb_offset = 4 * gid + 2 if gid < num_metrics else 4 * num_metrics + 2 * (gid - num_metrics)
+            new_hmtx += struct.pack(">H", self.advances[min(gid, num_metrics - 1)]) + hmtx[lsb_offset:lsb_offset + 2]
+        new_loca.append(len(new_glyf))
+
+        struct.pack_into(">I", head, 8, 0)
+        struct.pack_into(">h", head, 50, 1)
+        hhea = bytearray(self.tables["hhea"])
+        struct.pack_into(">H", hhea, 34, len(order))
+        maxp = bytearray(self.tables["maxp"])
+        struct.pack_into(">H", maxp, 4, len(order))
+        post = bytearray(self.tables.get("post", b"")[:32].ljust(32, b"\0"))
+        struct.pack_into(">I", post, 0, 0x00030000)  # 3.0 版：不带字形名称
+
+        tables = {tag: self.tables[tag] for tag in WEB_TABLES if tag in self.tables}
+        tables.update(head=bytes(head), hhea=bytes(hhea), maxp=bytes(maxp), hmtx=new_hmtx, post=bytes(post),
+                      glyf=bytes(new_glyf), loca=struct.pack(f">{len(new_loca)}I", *new_loca),
+                      cmap=_build_cmap({code: mapping[gid] for code, gid in codes.items()}))
+        return build_sfnt(tables)
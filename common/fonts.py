@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""字体注册表：按字体族查找字体文件，并在进程内缓存已加载的字体
+
+原来每画一个表格、每缩小一次字号都要调用 ImageFont.truetype 重新读取字体文件。
+这里按 (路径, 字号) 缓存 FreeTypeFont 对象，同一进程内每种字体只读一次文件。
+字体族按顺序尝试各系统的字体路径（当前系统的路径排在最前面），第一个能加载的生效。
+
+进程池中的每个子进程各有一份缓存；可以在进程池的 initializer 中调用 preload 预先加载。
+"""
+import platform
+import threading
+
+from PIL import ImageFont
+
+# 各字体族在不同系统上的候选路径
+FAMILIES = {
+    "sans": {
+        "Windows": ["arial.ttf", "C:/Windows/Fonts/arial.ttf"],
+        "Linux": ["/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+                  "/usr/share/fonts/dejavu/DejaVuSans.ttf"],
+        "Darwin": ["/Library/Fonts/Arial.ttf", "/System/Library/Fonts/Supplemental/Arial.ttf"],
+    },
+    "sans-bold": {
+        "Windows": ["arialbd.ttf", "C:/Windows/Fonts/arialbd.ttf"],
+        "Linux": ["/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+                  "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"],
+        "Darwin": ["/Library/Fonts/Arial Bold.ttf", "/System/Library/Fonts/Supplemental/Arial Bold.ttf"],
+    },
+    # 排队问题的中文字体
+    "cjk": {
+        "Windows": ["C:/Windows/Fonts/simhei.ttf"],
+        "Linux": ["/usr/share/fonts/wqy-microhei/wqy-microhei.ttc",
+                  "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+                  "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"],
+        "Darwin": ["/System/Library/Fonts/PingFang.ttc"],
+    },
+}
+
+_lock = threading.Lock()
+_fonts = {}
+_paths = {}
+_stats = {"hits": 0, "misses": 0}
+
+
+def candidates(family):
+    """字体族的候选路径，当前系统的排在前面"""
+    system_name = platform.system()
+    chain = list(FAMILIES[family].get(system_name, []))
+    for name, paths in FAMILIES[family].items():
+        if name != system_name:
+            chain += paths
+    return chain
+
+
+def _load(path, size):
+    key = (path, size)
+    with _lock:
+        font = _fonts.get(key)
+        if font is not None:
+            _stats["hits"] += 1
+            return font
+        _stats["misses"] += 1
+    font = ImageFont.truetype(path, size)
+    with _lock:
+        return _fonts.setdefault(key, font)
+
+
+def resolve(family):
+    """返回字体族在本机上第一个能加载的字体文件路径，结果会被缓存"""
+    if family not in _paths:
+        for path in candidates(family):
+            try:
+                _load(path, 10)
+            except OSError:
+                continue
+            _paths[family] = path
+            break
+        else:
+            raise FileNotFoundError(f"找不到 {family} 字体，已尝试：{', '.join(candidates(family))}")
+    return _paths[family]
+
+
+def get_font(name, size):
+    """按字体族名（见 FAMILIES）或字体文件路径取得指定字号的字体"""
+    path = resolve(name) if name in FAMILIES else name
+    return _load(path, size)
+
+
+def preload(specs):
+    """预先加载 [(字体族或路径, 字号), ...]，适合作为进程池的 initializer"""
+    for name, size in specs:
+        get_font(name, size)
+
+
+def stats():
+    """缓存统计：命中次数、加载次数、缓存的字体数"""
+    with _lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"], "fonts": len(_fonts),
+                "families": dict(_paths)}
+
+
+def clear():
+    with _lock:
+        _fonts.clear()
+        _paths.clear()
+        _stats["hits"] = _stats["misses"] = 0
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""字形缓存（glyph atlas）
+
+练习纸上反复出现的只是 1~18 这些数字、"+"、"-" 和少量固定的句子，
+原来每个格子都要重新测量（textbbox/getbbox）并光栅化（draw.text）一遍。
+这里把每个 (字体, 字号, 文字) 只光栅化一次，得到一张 "L" 模式的遮罩和它的包围盒，
+放进 LRU 缓存；之后画字只需要用 ImageDraw.bitmap 把遮罩按填充色贴上去，
+这和 draw.text 内部的绘制方式相同，输出的像素也相同。
+"""
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw
+
+
+def font_key(font):
+    """字体的缓存键：同一个字体文件、同一字号的不同 FreeTypeFont 对象共用缓存
+    没有文件路径的字体（例如 load_default 的内置字体）以字体对象本身为键，
+    缓存持有对象引用，不会因为对象被回收、id 被复用而取到别的字体的字形
+    """
+    path = getattr(font, "path", None)
+    if not isinstance(path, str):
+        return font
+    return path, font.size, getattr(font, "index", 0)
+
+
+class GlyphAtlas:
+    """按 (字体, 文字) 缓存光栅化结果的 LRU 缓存，可以在多个线程中同时使用"""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._scratch = ImageDraw.Draw(Image.new("L", (1, 1)))
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, font, text):
+        """返回 (遮罩, 包围盒)，包围盒是文字画在 (0, 0) 时的 (left, top, right, bottom)"""
+        key = (font_key(font), text)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return entry
+            self.misses += 1
+
+        left, top, right, bottom = self._scratch.textbbox((0, 0), text, font=font)
+        mask = None
+        if right > left and bottom > top:
+            mask = Image.new("L", (right - left, bottom - top), 0)
+            ImageDraw.Draw(mask).text((-left, -top), text, fill=255, font=font)
+        entry = (mask, (left, top, right, bottom))
+        with self._lock:
+            self._cache[key] = entry
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return entry
+
+    def text_size(self, font, text):
+        """文字的宽和高，与 textbbox 计算的结果相同"""
+        left, top, right, bottom = self.get(font, text)[1]
+        return right - left, bottom - top
+
+    def draw_text(self, draw, xy, text, font, fill="black"):
+        """与 draw.text(xy, text, fill=fill, font=font) 效果相同，坐标取整"""
+        mask, (left, top, _, _) = self.get(font, text)
+        if mask is not None:
+            draw.bitmap((round(xy[0]) + left, round(xy[1]) + top), mask, fill=fill)
+
+    def draw_centered(self, draw, box, text, font, fill="black"):
+        """在 box=(x, y, 宽, 高) 内居中画字，居中方式与原来按 textbbox 宽高计算的方式相同"""
+        mask, (left, top, right, bottom) = self.get(font, text)
+        if mask is not None:
+            x = box[0] + (box[2] - (right - left)) // 2
+            y = box[1] + (box[3] - (bottom - top)) // 2
+            draw.bitmap((x + left, y + top), mask, fill=fill)
+
+    def stats(self):
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+# 进程内共用的字形缓存
+atlas = GlyphAtlas()
+text_size = atlas.text_size
+draw_text = atlas.draw_text
+draw_centered = atlas.draw_centered
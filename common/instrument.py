@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""可选的性能埋点
+
+批量生成变慢时，用埋点看时间花在哪个阶段：出题（求解、挖空、评级）、画页面、排版、编码写盘等。
+各阶段用 timed 装饰器或 with span("名称") 标出，可以嵌套，每个线程分别记录调用栈；
+count 记录计数（求解器的分支数、回溯次数等），字体注册表和字形缓存的命中、未命中次数在取出记录时一起加上。
+
+默认关闭：关闭时 timed 包装的函数只多一次全局变量判断，span 返回同一个空的上下文管理器，count 直接返回。
+开启方式：
+- 环境变量 STUDENTTOOLS_PROFILE=1 只记录，=文件名 时程序退出时写出记录；
+- batch.py --profile 文件名。
+文件名以 .json 结尾时写成 JSON（每个调用栈的调用次数、总耗时、自身耗时和各计数器），
+否则写成火焰图工具（flamegraph.pl、speedscope 等）使用的折叠栈格式：每行 "阶段;子阶段 自身耗时微秒数"。
+
+进程池中的任务用 collected 包装，任务结果和子进程的记录一起返回，由主进程 merge 合并。
+profile_call 对单次调用（例如按编号重新生成一页）做 cProfile 和 tracemalloc 分析。
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_VAR = "STUDENTTOOLS_PROFILE"
+
+enabled = False
+
+_lock = threading.Lock()
+_local = threading.local()
+_stacks = {}  # 调用栈（阶段名的元组）-> [调用次数, 总耗时, 自身耗时]，耗时单位为秒
+_counters = {}
+_cache_seen = {}  # 上次取出记录时各缓存计数器的值，记录的是增量
+
+
+class _Span:
+    __slots__ = ("name", "start", "child")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.child = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].child += elapsed
+        key = tuple(span.name for span in stack) + (self.name,)
+        with _lock:
+            entry = _stacks.get(key)
+            if entry is None:
+                entry = _stacks[key] = [0, 0.0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] += elapsed - self.child
+        return False
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """with span("阶段名"): 记录这一段的耗时"""
+    return _Span(name) if enabled else _NULL_SPAN
+
+
+def timed(name):
+    """装饰器：记录函数每次调用的耗时"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    """计数器 name 加 n"""
+    if enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def _cache_counters():
+    """字体注册表、字形缓存的累计命中、未命中次数（只读计数，不加锁，fork 之后也可以调用）"""
+    counters = {}
+    fonts = sys.modules.get("common.fonts")
+    if fonts is not None:
+        counters["fonts.hits"], counters["fonts.misses"] = fonts._stats["hits"], fonts._stats["misses"]
+    glyphs = sys.modules.get("common.glyphs")
+    if glyphs is not None:
+        counters["glyphs.hits"], counters["glyphs.misses"] = glyphs.atlas.hits, glyphs.atlas.misses
+    return counters
+
+
+def _add_cache_counters():
+    """把上次以来各缓存计数器的增量加进记录（调用时已持有 _lock）"""
+    for name, value in _cache_counters().items():
+        delta = value - _cache_seen.get(name, 0)
+        _cache_seen[name] = value
+        if delta:
+            _counters[name] = _counters.get(name, 0) + delta
+
+
+def enable():
+    """开启埋点；同时设置环境变量，之后启动的子进程（包括 spawn 方式）也会开启"""
+    global enabled
+    enabled = True
+    os.environ.setdefault(ENV_VAR, "1")
+
+
+def _after_fork():
+    """fork 出的子进程不带上父进程的记录，也不继承可能正被别的线程持有的锁"""
+    global _lock
+    _lock = threading.Lock()
+    _local.__dict__.clear()
+    _stacks.clear()
+    _counters.clear()
+    _cache_seen.update(_cache_counters())
+
+
+def snapshot():
+    """本进程目前的记录（可以序列化）：{"stacks": {调用栈: [次数, 总耗时, 自身耗时]}, "counters": {...}}"""
+    with _lock:
+        _add_cache_counters()
+        return {"stacks": {key: list(entry) for key, entry in _stacks.items()}, "counters": dict(_counters)}
+
+
+def drain():
+    """取出并清空本进程的记录"""
+    data = snapshot()
+    with _lock:
+        _stacks.clear()
+        _counters.clear()
+    return data
+
+
+def merge(data):
+    """把子进程 drain 出的记录合并到本进程"""
+    with _lock:
+        for key, (calls, total, own) in data["stacks"].items():
+            entry = _stacks.get(key)
+            if entry is None:
+                entry = _stacks[key] = [0, 0.0, 0.0]
+            entry[0] += calls
+            entry[1] += total
+            entry[2] += own
+        for name, value in data["counters"].items():
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def collected(func, *args):
+    """在进程池中代替 func(*args)：返回 (结果, 这次任务的记录)，用 functools.partial(collected, func) 提交"""
+    result = func(*args)
+    return result, drain()
+
+
+def unwrap(pair):
+    """合并 collected 返回的记录，返回任务结果"""
+    result, data = pair
+    merge(data)
+    return result
+
+
+def stage_totals(data):
+    """按阶段名汇总（同一阶段出现在不同调用栈中时合并）：{阶段: (调用次数, 总耗时)}
+    嵌套调用自己的阶段只计最外层的耗时
+    """
+    totals = {}
+    for key, (calls, total, _) in data["stacks"].items():
+        if key[-1] in key[:-1]:
+            continue
+        entry = totals.setdefault(key[-1], [0, 0.0])
+        entry[0] += calls
+        entry[1] += total
+    return {name: tuple(entry) for name, entry in totals.items()}
+
+
+def format_summary(data):
+    """打印用的汇总表：各阶段调用次数、总耗时、平均耗时，以及各计数器"""
+    lines = [f"{'阶段':<22}{'次数':>8}{'总 ms':>11}{'平均 ms':>10}"]
+    for name, (calls, total) in sorted(stage_totals(data).items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<24}{calls:>10}{total * 1000:>12.1f}{total * 1000 / calls:>12.2f}")
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"{name:<24}{value:>10}")
+    return "\n".join(lines)
+
+
+def dump(path, data=None):
+    """写出记录：.json 为 JSON，其他为折叠栈格式"""
+    data = data or snapshot()
+    with open(path, "w", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            stacks = {";".join(key): {"calls": calls, "total_ms": total * 1000, "self_ms": own * 1000}
+                      for key, (calls, total, own) in sorted(data["stacks"].items())}
+            stages = {name: {"calls": calls, "total_ms": total * 1000}
+                      for name, (calls, total) in sorted(stage_totals(data).items())}
+            json.dump({"stages": stages, "stacks": stacks, "counters": data["counters"]}, f,
+                      ensure_ascii=False, indent=2)
+        else:
+            for key, (_, _, own) in sorted(data["stacks"].items()):
+                f.write(f"{';'.join(key)} {round(own * 1e6)}\n")
+
+
+def profile_call(func, cprofile_path=None, memory_top=0):
+    """对 func() 做 cProfile（统计写到 cprofile_path，可以用 pstats、snakeviz 查看）
+    和 tracemalloc（memory_top 为显示的分配位置数）分析，返回 (结果, 报告文字)
+    Pillow 图片的像素内存不经过 Python 的分配器，tracemalloc 统计不到
+    """
+    # 分析工具只在这里用到，不在导入时加载，导入本模块要尽量快
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile() if cprofile_path else None
+    if memory_top:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        result = func()
+    finally:
+        if profiler:
+            profiler.disable()
+        if memory_top:
+            memory = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    report = []
+    if profiler:
+        profiler.dump_stats(cprofile_path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(15)
+        report.append(f"cProfile 统计已写入 {cprofile_path}，累计耗时最多的函数：")
+        report.append(stream.getvalue().strip())
+    if memory_top:
+        report.append(f"tracemalloc：Python 对象内存峰值 {peak / 2 ** 20:.1f} MB，仍占用内存最多的 {memory_top} 处：")
+        report += [f"  {stat}" for stat in memory.statistics("lineno")[:memory_top]]
+    return result, "\n".join(report)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+# 环境变量开启时：只在主进程中登记退出时写出记录，进程池的子进程由主进程合并
+_env = os.environ.get(ENV_VAR)
+if _env:
+    enabled = True
+    import multiprocessing
+    if _env != "1" and multiprocessing.parent_process() is None:
+        atexit.register(dump, _env)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""文字排版：按实际字宽折行，并用二分查找确定能放下的最大字号
+
+原来的排队问题按字母 "A" 的宽度估算每行字数，中文字比 "A" 宽得多，估算不准；
+放不下时每次把字号减 5 重新折行、重新测量。这里：
+- 折行按每个字的实际宽度计算，中文可以在任意两个字之间断开，连续的字母数字不拆开，
+  逗号、句号等标点不放在行首；每个 (字体, 片段) 的宽度只测量一次
+- 在 [最小字号, 最大字号] 之间二分查找所有文字都能放下的最大字号，字体来自字体注册表
+- 排版结果（Block）只是文字、坐标和字体，测量不需要画布，画的时候直接照着结果画
+- 测量只用字体的 getlength、getbbox，不光栅化：二分查找试过的字号、折出的行大多不会画出来，
+  不放进字形缓存，缓存只留给真正画出的文字
+"""
+from collections import namedtuple
+
+from common import fonts, glyphs, instrument
+
+# 不能放在行首的标点
+NO_LINE_START = set("，。、：；！？）》」』”’,.:;!?)")
+
+# 排好版的一段文字：字体、[(相对块顶部的纵坐标, 这一行的文字), ...]、总高度
+Block = namedtuple("Block", "font lines height")
+
+_widths = {}
+
+
+def _tokens(text):
+    """把文字切成不可拆分的片段：连续的字母数字为一段，其余每个字符各为一段"""
+    tokens = []
+    for ch in text:
+        if tokens and ch.isascii() and ch.isalnum() and tokens[-1][-1].isascii() and tokens[-1][-1].isalnum():
+            tokens[-1] += ch
+        else:
+            tokens.append(ch)
+    return tokens
+
+
+def _width(font, token):
+    key = (glyphs.font_key(font), token)
+    if key not in _widths:
+        _widths[key] = font.getlength(token)
+    return _widths[key]
+
+
+def wrap(text, font, max_width):
+    """按实际字宽把一段文字折成多行"""
+    lines = []
+    line, line_width = "", 0
+    for token in _tokens(text):
+        width = _width(font, token)
+        if line and line_width + width > max_width and token not in NO_LINE_START:
+            lines.append(line)
+            line, line_width = "", 0
+        line += token
+        line_width += width
+    lines.append(line)
+    return lines
+
+
+def layout_block(text, font, max_width):
+    """排版一段文字（可以包含换行符），每行的高度按文字的实际包围盒计算"""
+    lines = []
+    y = 0
+    for part in text.split("\n"):
+        for line in wrap(part, font, max_width):
+            lines.append((y, line))
+            # 与 glyphs.text_size 相同（灰度画布上 textbbox 的高度），但不光栅化这一行
+            _, top, _, bottom = font.getbbox(line, "L")
+            y += bottom - top
+    return Block(font, lines, y)
+
+
+@instrument.timed("layout.fit")
+def fit_blocks(texts, font_name, max_size, max_width, max_height, min_size=10):
+    """找出能把所有文字放进 max_height 的最大字号（不超过 max_size），返回排好版的 Block 列表
+    最小字号也放不下时按最小字号排版
+    """
+    def layout_at(size):
+        instrument.count("layout.attempts")
+        font = fonts.get_font(font_name, size)
+        return [layout_block(text, font, max_width) for text in texts]
+
+    blocks = layout_at(max_size)
+    if sum(block.height for block in blocks) <= max_height:
+        return blocks
+
+    best = None
+    low, high = min_size, max_size - 1
+    while low <= high:
+        size = (low + high) // 2
+        candidate = layout_at(size)
+        if sum(block.height for block in candidate) <= max_height:
+            best, low = candidate, size + 1
+        else:
+            high = size - 1
+    return best or layout_at(min_size)
+
+
+def draw_block(canvas, block, x, y, fill="black"):
+    """在画布（见 common/render.py）的 (x, y) 处画出排好版的文字"""
+    for dy, line in block.lines:
+        canvas.text((x, y + dy), line, block.font, fill)
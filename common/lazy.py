@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""延迟导入：第一次访问模块的属性时才真正导入模块
+
+画页面的模块（common.render、common.fonts 等）会导入 Pillow，导入要几十毫秒；
+只出题（生成数独、表格数据、排队题目）的程序用不到它们。
+出题和绘制写在同一个模块里时，用 module("common.render") 代替 from common import render，
+只出题时就不会导入 Pillow。
+
+没有用 importlib.util.LazyLoader：它把还没执行的模块放进 sys.modules，Python 3.12 之前多个线程
+（例如流水线的绘制线程）同时第一次访问时，会看到执行到一半的模块。这里的代理对象每次访问属性都交给
+importlib.import_module，已导入时只是查一次 sys.modules，导入时由导入系统的模块锁保证只执行一次。
+"""
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """代替还没导入的模块，访问属性时导入真正的模块并返回它的属性"""
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.__name__), attr)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def module(name):
+    """返回名为 name 的模块；还没有导入时返回延迟导入的代理，模块不存在时立即抛出 ModuleNotFoundError"""
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"找不到模块 {name}", name=name)
+    return _LazyModule(name)
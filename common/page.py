@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""页面几何常量（不依赖 Pillow，出题时也可以直接使用）
+
+页面坐标都是 300dpi 的像素坐标。
+"""
+
+# A4 纸（300dpi）的像素尺寸
+A4_WIDTH = 2480
+A4_HEIGHT = 3508
+DPI = 300
+
+# 页脚高度（页面编号写在页面底部这一条中）
+FOOTER_HEIGHT = 100
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""页面编号：按编号重新生成完全相同的页面
+
+一页练习纸只由 (类型, 参数, 选项, 总种子, 页码) 决定：page_rng 给出这一页专用的随机数生成器，
+出题函数都从传入的 rng 取随机数，不使用全局的 random，
+所以同样的编号在任何进程、任何时候都生成同样的题目，只需保存编号，不必保存图片。
+编号形如 shudu-9-2025-0007、biaogeguilv-subtract-2025-0007，带选项时如 shudu-9-g3v5-2025-0007，
+批量生成时就是文件名（不含扩展名），并印在页脚。
+"""
+import random
+import re
+
+# 编号中的选项：选项名 -> 一个字母（选项值都是正整数）
+OPTION_CODES = {
+    "count": "n",
+    "grade": "g",
+    "jigsaw": "j",
+    "variants": "v",
+}
+
+# 选项为这些值时不写入编号
+OPTION_DEFAULTS = {
+    "count": None,
+    "grade": None,
+    "jigsaw": None,
+    "variants": 1,
+}
+
+_ID_PATTERN = re.compile(r"^([a-z]+)-([a-z0-9]+)(?:-((?:[a-z]\d+)+))?-(\d+)-(\d+)$")
+
+
+def page_seed(seed, page):
+    """每页的随机种子只由总种子和页码决定，与由哪个进程生成无关"""
+    return f"{seed}:{page}"
+
+
+def page_rng(seed, page):
+    """这一页专用的随机数生成器（字符串种子按 SHA-512 展开，与 PYTHONHASHSEED 无关）"""
+    return random.Random(page_seed(seed, page))
+
+
+def format_id(prefix, param, seed, page, options=None):
+    """页面编号；options 中只有 OPTION_CODES 里不是默认值的选项写入编号
+    种子和页码必须是非负整数（编号中不能有负号），否则抛出 ValueError
+    """
+    if seed < 0 or page < 0:
+        raise ValueError(f"种子和页码不能是负数：{seed}、{page}")
+    codes = "".join(f"{code}{options[name]}" for name, code in OPTION_CODES.items()
+                    if options and options.get(name, OPTION_DEFAULTS[name]) != OPTION_DEFAULTS[name])
+    middle = f"-{codes}" if codes else ""
+    return f"{prefix}-{param}{middle}-{seed}-{page:04d}"
+
+
+def parse_id(page_id):
+    """解析页面编号，返回 (前缀, 参数字符串, 选项, 总种子, 页码)；格式不对时抛出 ValueError"""
+    match = _ID_PATTERN.match(page_id.strip())
+    if not match:
+        raise ValueError(f"无效的页面编号：{page_id}")
+    prefix, param, codes, seed, page = match.groups()
+    names = {code: name for name, code in OPTION_CODES.items()}
+    options = {}
+    for code, value in re.findall(r"([a-z])(\d+)", codes or ""):
+        if code not in names:
+            raise ValueError(f"页面编号中有未知的选项 {code}：{page_id}")
+        options[names[code]] = int(value)
+    return prefix, param, options, int(seed), int(page)
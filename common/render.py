@@ -0,0 +1,616 @@
+# -*- coding: utf-8 -*-
+"""页面渲染后端
+
+三个工具都把一页画在画布（canvas）上，画布只提供几种操作：
+- line(points, width)、rectangle(box, width)：画线、画矩形边框
+- text(xy, text, font)、text_centered(box, text, font)：画字，坐标与 draw.text 相同
+- stamp(key, size, draw_func, xy)：画一个可重复使用的图块（例如数独的空网格），
+  同一个 key 只画一次，之后直接引用
+
+RasterCanvas 画在 PIL 图片上，结果与原来直接用 ImageDraw 画的像素相同；
+VectorCanvas 只记录绘图操作，由 PdfDocument / SvgDocument 写成矢量文件：
+字体在每份文档中只嵌入一次（PDF 嵌入用到的字形子集），图块在 PDF 中是 Form XObject，
+在 SVG 中是 <use> 引用的 <g>。页面坐标都是 300dpi 的像素坐标，A4 为 2480x3508。
+
+open_document(path) 按扩展名选择后端：.pdf、.svg 为矢量，.tif/.tiff 为多页 TIFF，
+其他（.jpg、.png 等）为每页一张位图。
+位图可以选择颜色模式（RASTER_MODES）：RGB（默认）、L 灰度或 1 黑白。练习纸只有黑白两色，
+灰度画布每个像素 1 字节，Pillow 的 RGB 画布是 4 字节；黑白页面也画在灰度画布上
+（字形遮罩按灰度贴上，直接画在 "1" 图片上会留下中间值），保存时按 BILEVEL_THRESHOLD 转成 1 位，
+PNG 存为 1 位图，TIFF 默认使用传真的 CCITT G4 压缩，文件小得多，线条也没有 JPEG 的噪点。
+
+文档分为题目、答案两部分（SECTIONS），add_page 时指定页面属于哪一部分，页面可以按任意顺序加入：
+PDF 每页画完就写入文件，只在页面目录中把答案排在题目后面，并加上书签；
+TIFF 的答案页先写入临时文件，close 时逐页接到题目后面；
+每页一个文件的格式中，答案页的文件名加上 -answer。
+无论哪种格式，内存中同时只有正在画的一页。
+"""
+import base64
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageColor, ImageDraw, ImageSequence, TiffImagePlugin
+
+from common import fonts, glyphs, instrument
+from common.fontfile import FontFile
+from common.page import A4_HEIGHT, A4_WIDTH, DPI, FOOTER_HEIGHT  # noqa: F401  页面几何常量见 common/page.py
+
+# 渲染版本：页面的画法或编码参数改变、同样的编号会生成不同的文件时加 1，
+# 页面缓存（common/cache.py）中旧版本的文件就不会再被使用
+RENDER_VERSION = 4  # 2：6x6 的宫改为 2 行 3 列，网格线不再超出棋盘；3：12x12 数独改用位掩码引擎生成；4：表格练习纸也保存答案页
+
+# 位图的颜色模式：RGB 彩色、L 灰度、1 黑白
+RASTER_MODES = ("RGB", "L", "1")
+
+# 黑白模式的阈值：灰度低于它的像素为黑色（页脚的灰色小字也保留下来）
+BILEVEL_THRESHOLD = 192
+_BILEVEL_TABLE = [255 if value >= BILEVEL_THRESHOLD else 0 for value in range(256)]
+
+# 文档的各部分按此顺序排列：部分名 -> (书签标题, 每页一个文件时的文件名后缀)
+SECTIONS = {
+    "questions": ("题目", ""),
+    "answers": ("答案", "-answer"),
+}
+
+# 位图图块缓存
+_tiles = OrderedDict()
+_tiles_lock = threading.Lock()
+_TILE_CACHE_SIZE = 32
+
+
+def canvas_mode(mode):
+    """画布的颜色模式：黑白页面画在灰度画布上"""
+    return "L" if mode == "1" else mode
+
+
+def to_mode(image, mode):
+    """把画好的页面转成保存用的颜色模式：黑白模式按阈值转成 1 位图片，其他模式原样返回"""
+    if mode == "1" and image.mode == "L":
+        return image.point(_BILEVEL_TABLE, "1")
+    return image
+
+
+class RasterCanvas:
+    """PIL 位图画布"""
+
+    def __init__(self, width=A4_WIDTH, height=A4_HEIGHT, mode="RGB", background="white"):
+        self.image = Image.new(mode, (width, height), background)
+        self.draw = ImageDraw.Draw(self.image)
+
+    @classmethod
+    def wrap(cls, draw):
+        """包装已有的 ImageDraw，兼容直接传入 draw 的旧接口"""
+        canvas = cls.__new__(cls)
+        canvas.image = getattr(draw, "_image", None)
+        canvas.draw = draw
+        return canvas
+
+    def line(self, points, width=1, fill="black"):
+        self.draw.line(points, fill=fill, width=width)
+
+    def rectangle(self, box, width=1, outline="black"):
+        self.draw.rectangle(box, outline=outline, width=width)
+
+    def text(self, xy, text, font, fill="black"):
+        glyphs.draw_text(self.draw, xy, text, font, fill)
+
+    def text_centered(self, box, text, font, fill="black"):
+        glyphs.draw_centered(self.draw, box, text, font, fill)
+
+    def stamp(self, key, size, draw_func, xy):
+        """贴上白底图块：图块按 (颜色模式, key) 缓存，只画一次，之后整块复制"""
+        key = (self.image.mode, key)
+        with _tiles_lock:
+            tile = _tiles.get(key)
+            if tile is not None:
+                _tiles.move_to_end(key)
+        if tile is None:
+            canvas = RasterCanvas(size[0], size[1], self.image.mode)
+            draw_func(canvas)
+            tile = canvas.image
+            with _tiles_lock:
+                _tiles[key] = tile
+                if len(_tiles) > _TILE_CACHE_SIZE:
+                    _tiles.popitem(last=False)
+        self.image.paste(tile, xy)
+
+
+class VectorCanvas:
+    """记录绘图操作的画布，由矢量文档写出"""
+
+    def __init__(self, document, width=A4_WIDTH, height=A4_HEIGHT):
+        self.document = document
+        self.width = width
+        self.height = height
+        self.ops = []
+
+    def line(self, points, width=1, fill="black"):
+        self.ops.append(("line", points, width, fill))
+
+    def rectangle(self, box, width=1, outline="black"):
+        self.ops.append(("rect", box, width, outline))
+
+    def text(self, xy, text, font, fill="black"):
+        self.ops.append(("text", round(xy[0]), round(xy[1]), text, font, fill))
+
+    def text_centered(self, box, text, font, fill="black"):
+        # 与 glyphs.draw_centered 相同的居中方式，矢量输出和位图输出的文字位置一致
+        width, height = glyphs.text_size(font, text)
+        self.ops.append(("text", box[0] + (box[2] - width) // 2, box[1] + (box[3] - height) // 2, text, font, fill))
+
+    def stamp(self, key, size, draw_func, xy):
+        self.document.define_stamp(key, size, draw_func)
+        self.ops.append(("stamp", key, xy[0], xy[1]))
+
+
+def draw_footer(canvas, text, size=30):
+    """在页面底部居中写一行小字（页面编号）"""
+    font = fonts.get_font("sans", size)
+    canvas.text_centered((0, A4_HEIGHT - FOOTER_HEIGHT, A4_WIDTH, FOOTER_HEIGHT), text, font, fill="gray")
+
+
+def _rgb(color):
+    return ImageColor.getrgb(color)[:3]
+
+
+def _paged_path(path, page):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}-{page:04d}{ext}"
+
+
+def section_path(path, section):
+    """某一部分的文件路径：答案为 name-answer.ext"""
+    stem, ext = os.path.splitext(path)
+    return stem + SECTIONS[section][1] + ext
+
+
+def unique_path(directory, prefix, ext, mode="RGB"):
+    """按 前缀-时间.ext 命名并立即创建空文件占住这个文件名，返回路径
+    同一秒内已有同名文件（例如多个进程同时生成）时依次改用 前缀-时间-2.ext、-3…，不会互相覆盖；
+    先检查 ext 能否保存 mode 颜色模式（见 check_mode），不能保存时不创建文件
+    """
+    check_mode("." + ext, mode)
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    n = 1
+    while True:
+        name = f"{prefix}-{stamp}.{ext}" if n == 1 else f"{prefix}-{stamp}-{n}.{ext}"
+        path = os.path.join(directory, name)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+            return path
+        except FileExistsError:
+            n += 1
+
+
+@contextmanager
+def discard_on_error(path, reserved=True):
+    """reserved 为 True 时（path 是 unique_path 占住的文件名），其中的代码出错就删掉 path，不留下空文件"""
+    try:
+        yield
+    except BaseException:
+        if reserved:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        raise
+
+
+class _Document:
+    """逐页写出的文档：add_page 画完一页就写出，不在内存中保留已完成的页面
+    输出为多个文件时，每部分只有一页则直接写到 path（答案为 name-answer.ext），
+    有多页时按 name-0001.ext 编号
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.paths = []
+        self.pages = 0
+        self.section_pages = {}
+
+    def _page_path(self, section):
+        self.pages += 1
+        count = self.section_pages[section] = self.section_pages.get(section, 0) + 1
+        base = section_path(self.path, section)
+        if count == 1:
+            return base
+        if count == 2:
+            first = _paged_path(base, 1)
+            os.replace(base, first)
+            self.paths[self.paths.index(base)] = first
+        return _paged_path(base, count)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RasterDocument(_Document):
+    """每页保存为一张位图（JPEG、PNG 等），mode 为颜色模式，params 传给 Image.save"""
+
+    def __init__(self, path, mode="RGB", **params):
+        super().__init__(path)
+        self.mode = mode
+        self.params = params
+
+    def add_page(self, draw_page, width=A4_WIDTH, height=A4_HEIGHT, section="questions"):
+        with instrument.span("render.draw"):
+            canvas = RasterCanvas(width, height, canvas_mode(self.mode))
+            draw_page(canvas)
+        path = self._page_path(section)
+        with instrument.span("render.encode"):
+            to_mode(canvas.image, self.mode).save(path, **self.params)
+        self.paths.append(path)
+
+
+class TiffDocument(_Document):
+    """多页 TIFF：每页画完即压缩追加到文件中；答案页先写入临时文件，close 时接到题目后面
+    quality 是 JPEG 的参数，这里忽略，方便与位图输出使用同样的参数；
+    不指定 compression 时黑白模式用 CCITT G4（group4），其他模式用 deflate
+    """
+
+    def __init__(self, path, compression=None, quality=None, mode="RGB", **params):
+        super().__init__(path)
+        self.mode = mode
+        compression = compression or ("group4" if mode == "1" else "tiff_deflate")
+        self.params = dict(params, compression=compression, dpi=(DPI, DPI))
+        self.writers = {}
+        self.paths.append(path)
+
+    def _writer(self, section):
+        if section not in self.writers:
+            path = self.path if section == "questions" else f"{self.path}.{section}.tmp"
+            self.writers[section] = (path, TiffImagePlugin.AppendingTiffWriter(path, True))
+        return self.writers[section][1]
+
+    def add_page(self, draw_page, width=A4_WIDTH, height=A4_HEIGHT, section="questions"):
+        with instrument.span("render.draw"):
+            canvas = RasterCanvas(width, height, canvas_mode(self.mode))
+            draw_page(canvas)
+        writer = self._writer(section)
+        with instrument.span("render.encode"):
+            to_mode(canvas.image, self.mode).save(writer, format="TIFF", **self.params)
+        writer.newFrame()
+        self.pages += 1
+
+    def close(self):
+        if not self.writers:
+            return
+        main = self._writer("questions")
+        for section in SECTIONS:
+            if section == "questions" or section not in self.writers:
+                continue
+            path, writer = self.writers[section]
+            writer.close()
+            with Image.open(path) as frames:
+                for frame in ImageSequence.Iterator(frames):
+                    frame.save(main, format="TIFF", **self.params)
+                    main.newFrame()
+            os.remove(path)
+        main.close()
+        self.writers = {}
+
+
+@lru_cache(maxsize=16)
+def _font_file(path, index):
+    return FontFile(path, index)
+
+
+class _Font:
+    """文档中嵌入的一个字体：用到的字形编号 -> 字符"""
+
+    def __init__(self, font, name):
+        self.file = _font_file(font.path, getattr(font, "index", 0))
+        self.name = name
+        self.used = {}
+
+    def encode(self, text):
+        gids = []
+        for ch in text:
+            gid = self.file.glyph_id(ch)
+            self.used.setdefault(gid, ch)
+            gids.append(gid)
+        return gids
+
+
+class _VectorDocument(_Document):
+    def __init__(self, path):
+        super().__init__(path)
+        self.fonts = {}
+        self.stamps = {}
+
+    def font(self, font):
+        """文档中的字体，同一个字体文件只嵌入一次"""
+        if not isinstance(getattr(font, "path", None), str):
+            raise ValueError("矢量输出需要字体文件，不能使用内置默认字体")
+        key = (font.path, getattr(font, "index", 0))
+        if key not in self.fonts:
+            self.fonts[key] = _Font(font, f"F{len(self.fonts)}")
+        return self.fonts[key]
+
+    def define_stamp(self, key, size, draw_func):
+        if key not in self.stamps:
+            canvas = VectorCanvas(self, *size)
+            draw_func(canvas)
+            self.stamps[key] = self._write_stamp(f"S{len(self.stamps)}", canvas)
+        return self.stamps[key]
+
+    def add_page(self, draw_page, width=A4_WIDTH, height=A4_HEIGHT, section="questions"):
+        with instrument.span("render.draw"):
+            canvas = VectorCanvas(self, width, height)
+            draw_page(canvas)
+        with instrument.span("render.encode"):
+            self._write_page(canvas, section)
+
+
+class PdfDocument(_VectorDocument):
+    """多页 PDF：每页画完即压缩写入文件，字体、图块和页面目录在 close 时补上"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(path, "wb")
+        self.file.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        self.offsets = {}
+        # 1 目录、2 页面树、3 所有页面和图块共用的资源字典，在 close 时写出
+        self.next_id = 4
+        self.page_ids = {section: [] for section in SECTIONS}
+        self.xobjects = {}
+        self.paths.append(path)
+
+    def _reserve(self):
+        self.next_id += 1
+        return self.next_id - 1
+
+    def _write_object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.file.tell()
+        if stream is None:
+            self.file.write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode())
+        else:
+            self.file.write(f"{obj_id} 0 obj\n<< {body} /Length {len(stream)} >>\nstream\n".encode())
+            self.file.write(stream + b"\nendstream\nendobj\n")
+
+    def _write_stream(self, body, data):
+        obj_id = self._reserve()
+        self._write_object(obj_id, f"{body} /Filter /FlateDecode".strip(), zlib.compress(data))
+        return obj_id
+
+    def _content(self, ops):
+        out = []
+        for op in ops:
+            kind = op[0]
+            if kind == "line":
+                _, ((x1, y1), (x2, y2)), width, fill = op
+                out.append(f"{width} w {_pdf_color(fill)} RG {x1} {y1} m {x2} {y2} l S")
+            elif kind == "rect":
+                _, (x1, y1, x2, y2), width, outline = op
+                # 位图中的边框占据 [x1, x2] 这些像素，线的中心向内偏半个线宽
+                half = width / 2
+                out.append(f"{width} w {_pdf_color(outline)} RG {x1 + half:g} {y1 + half:g} "
+                           f"{x2 - x1 + 1 - width:g} {y2 - y1 + 1 - width:g} re S")
+            elif kind == "text":
+                _, x, y, text, font, fill = op
+                entry = self.font(font)
+                gids = "".join(f"{gid:04X}" for gid in entry.encode(text))
+                # 页面 y 轴向下，文字矩阵再翻转一次；基线在 y + 字体上沿（与 draw.text 的定位相同）
+                baseline = y + font.getmetrics()[0]
+                out.append(f"BT {_pdf_color(fill)} rg /{entry.name} {font.size} Tf "
+                           f"1 0 0 -1 {x} {baseline} Tm <{gids}> Tj ET")
+            elif kind == "stamp":
+                _, key, x, y = op
+                out.append(f"q 1 0 0 1 {x} {y} cm /{self.stamps[key]} Do Q")
+        return "\n".join(out).encode()
+
+    def _write_stamp(self, name, canvas):
+        self.xobjects[name] = self._write_stream(
+            f"/Type /XObject /Subtype /Form /BBox [0 0 {canvas.width} {canvas.height}] /Resources 3 0 R",
+            self._content(canvas.ops))
+        return name
+
+    def _write_page(self, canvas, section):
+        # 1 像素 = 72/300 点；把原点移到左上角、y 轴朝下，之后都用像素坐标
+        scale = 72 / DPI
+        width, height = canvas.width * scale, canvas.height * scale
+        head = f"2 J {scale:g} 0 0 {-scale:g} 0 {height:g} cm\n".encode()
+        content_id = self._write_stream("", head + self._content(canvas.ops))
+        page_id = self._reserve()
+        self._write_object(page_id, f"<< /Type /Page /Parent 2 0 R /Resources 3 0 R "
+                                    f"/MediaBox [0 0 {width:g} {height:g}] /Contents {content_id} 0 R >>")
+        self.page_ids[section].append(page_id)
+        self.pages += 1
+
+    def _write_font(self, entry):
+        """嵌入字形子集，字形编号直接作为 CID（Identity-H）"""
+        font = entry.file
+        gids = sorted(entry.used)
+        # 子集字体名前缀：6 个大写字母，由用到的字形决定
+        digest = hashlib.md5(repr(gids).encode()).digest()
+        base = "".join(chr(65 + b % 26) for b in digest[:6]) + "+" + font.name
+        scale = 1000 / font.units_per_em
+        bbox = " ".join(str(round(v * scale)) for v in font.bbox)
+
+        data = font.subset(gids)
+        file_id = self._write_stream(f"/Length1 {len(data)}", data)
+        descriptor_id = self._reserve()
+        self._write_object(descriptor_id, f"<< /Type /FontDescriptor /FontName /{base} /Flags 4 "
+                                          f"/FontBBox [{bbox}] /ItalicAngle 0 /Ascent {round(font.ascent * scale)} "
+                                          f"/Descent {round(font.descent * scale)} /CapHeight {round(font.ascent * scale)} "
+                                          f"/StemV 80 /FontFile2 {file_id} 0 R >>")
+        widths = " ".join(f"{gid} [{font.advance(gid)}]" for gid in gids)
+        cid_id = self._reserve()
+        self._write_object(cid_id, f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{base} "
+                                   f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+                                   f"/FontDescriptor {descriptor_id} 0 R /CIDToGIDMap /Identity /W [{widths}] >>")
+        to_unicode_id = self._write_stream("", _to_unicode(entry.used))
+        font_id = self._reserve()
+        self._write_object(font_id, f"<< /Type /Font /Subtype /Type0 /BaseFont /{base} /Encoding /Identity-H "
+                                    f"/DescendantFonts [{cid_id} 0 R] /ToUnicode {to_unicode_id} 0 R >>")
+        return font_id
+
+    def _write_outlines(self):
+        """每部分一个书签，指向这部分的第一页；只有题目时不加书签"""
+        sections = [section for section in SECTIONS if self.page_ids[section]]
+        if sections == ["questions"] or not sections:
+            return ""
+        root_id = self._reserve()
+        item_ids = [self._reserve() for _ in sections]
+        for k, section in enumerate(sections):
+            title = SECTIONS[section][0].encode("utf-16-be").hex().upper()
+            links = f"/Prev {item_ids[k - 1]} 0 R " if k > 0 else ""
+            links += f"/Next {item_ids[k + 1]} 0 R " if k + 1 < len(sections) else ""
+            self._write_object(item_ids[k], f"<< /Title <FEFF{title}> /Parent {root_id} 0 R {links}"
+                                            f"/Dest [{self.page_ids[section][0]} 0 R /Fit] >>")
+        self._write_object(root_id, f"<< /Type /Outlines /First {item_ids[0]} 0 R /Last {item_ids[-1]} 0 R "
+                                    f"/Count {len(sections)} >>")
+        return f"/Outlines {root_id} 0 R /PageMode /UseOutlines"
+
+    def close(self):
+        if self.file.closed:
+            return
+        fonts = " ".join(f"/{entry.name} {self._write_font(entry)} 0 R" for entry in self.fonts.values())
+        xobjects = " ".join(f"/{name} {obj_id} 0 R" for name, obj_id in self.xobjects.items())
+        self._write_object(3, f"<< /Font << {fonts} >> /XObject << {xobjects} >> >>")
+        pages = [page_id for section in SECTIONS for page_id in self.page_ids[section]]
+        kids = " ".join(f"{page_id} 0 R" for page_id in pages)
+        self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+        self._write_object(1, f"<< /Type /Catalog /Pages 2 0 R {self._write_outlines()} >>")
+
+        xref = self.file.tell()
+        lines = [f"xref\n0 {self.next_id}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets[obj_id]:010d} 00000 n \n" for obj_id in range(1, self.next_id)]
+        lines.append(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n")
+        self.file.write("".join(lines).encode())
+        self.file.close()
+
+
+def _pdf_color(color):
+    return " ".join(f"{c / 255:g}" for c in _rgb(color))
+
+
+def _to_unicode(used):
+    """字形编号 -> Unicode 的对照表，复制 PDF 中的文字时使用"""
+    pairs = [(gid, ch) for gid, ch in sorted(used.items()) if gid]
+    lines = ["/CIDInit /ProcSet findresource begin", "12 dict begin", "begincmap",
+             "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+             "/CMapName /Adobe-Identity-UCS def", "/CMapType 2 def",
+             "1 begincodespacerange", "<0000> <FFFF>", "endcodespacerange"]
+    for start in range(0, len(pairs), 100):
+        chunk = pairs[start:start + 100]
+        lines.append(f"{len(chunk)} beginbfchar")
+        lines += [f"<{gid:04X}> <{ch.encode('utf-16-be').hex().upper()}>" for gid, ch in chunk]
+        lines.append("endbfchar")
+    lines += ["endcmap", "CMapName currentdict /CMapResource defineresource pop", "end", "end"]
+    return "\n".join(lines).encode()
+
+
+class SvgDocument(_VectorDocument):
+    """每页一个 SVG 文件，不依赖其他文件：每页用到的字符做成子集字体，以 data: URI 内嵌在 @font-face 中"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.font_data = {}  # (字体名, 字符) -> base64 编码的子集字体；题目页、答案页用到的字符常常相同
+
+    def _font_face(self, entry, chars):
+        key = (entry.name, frozenset(chars))
+        if key not in self.font_data:
+            self.font_data[key] = base64.b64encode(entry.file.web_subset(chars)).decode("ascii")
+        return (f'@font-face{{font-family:"{entry.name}";'
+                f'src:url("data:font/ttf;base64,{self.font_data[key]}") format("truetype")}}')
+
+    def _elements(self, ops, fonts, stamps):
+        out = []
+        for op in ops:
+            kind = op[0]
+            if kind == "line":
+                _, ((x1, y1), (x2, y2)), width, fill = op
+                out.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{fill}" stroke-width="{width}"/>')
+            elif kind == "rect":
+                _, (x1, y1, x2, y2), width, outline = op
+                half = width / 2
+                out.append(f'<rect x="{x1 + half:g}" y="{y1 + half:g}" width="{x2 - x1 + 1 - width:g}" '
+                           f'height="{y2 - y1 + 1 - width:g}" fill="none" stroke="{outline}" stroke-width="{width}"/>')
+            elif kind == "text":
+                _, x, y, text, font, fill = op
+                entry = self.font(font)
+                fonts.setdefault(entry.name, set()).update(text)
+                out.append(f'<text x="{x}" y="{y + font.getmetrics()[0]}" font-family="{entry.name}" '
+                           f'font-size="{font.size}" fill="{fill}">{escape(text)}</text>')
+            elif kind == "stamp":
+                _, key, x, y = op
+                stamps.add(key)
+                # 同时写 xlink:href，SVG 1.1 的阅读器（较旧的浏览器、librsvg、打印软件）只认这个属性
+                name = self.stamps[key][0]
+                out.append(f'<use href="#{name}" xlink:href="#{name}" x="{x}" y="{y}"/>')
+        return out
+
+    def _write_stamp(self, name, canvas):
+        fonts = {}
+        body = self._elements(canvas.ops, fonts, set())
+        return name, body, fonts
+
+    def _write_page(self, canvas, section):
+        path = self._page_path(section)
+        fonts, stamps = {}, set()
+        body = self._elements(canvas.ops, fonts, stamps)
+        defs = []
+        for key in stamps:
+            name, elements, stamp_fonts = self.stamps[key]
+            for font_name, chars in stamp_fonts.items():
+                fonts.setdefault(font_name, set()).update(chars)
+            defs.append(f'<g id="{name}">' + "".join(elements) + "</g>")
+        entries = {entry.name: entry for entry in self.fonts.values()}
+        faces = [self._font_face(entries[name], chars) for name, chars in sorted(fonts.items())]
+        width_mm = canvas.width * 25.4 / DPI
+        height_mm = canvas.height * 25.4 / DPI
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                    f'width="{width_mm:g}mm" height="{height_mm:g}mm" '
+                    f'viewBox="0 0 {canvas.width} {canvas.height}" xml:space="preserve">\n')
+            f.write(f'<defs><style>{"".join(faces)}line{{stroke-linecap:square}}</style>{"".join(defs)}</defs>\n')
+            f.write('<rect width="100%" height="100%" fill="white"/>\n')
+            f.write("\n".join(body))
+            f.write("\n</svg>\n")
+        self.paths.append(path)
+
+
+def check_mode(ext, mode):
+    """检查扩展名为 ext（例如 .jpg）的文件能否保存 mode 颜色模式，不能时抛出 ValueError；返回小写的扩展名"""
+    if mode not in RASTER_MODES:
+        raise ValueError(f"颜色模式必须是{'、'.join(RASTER_MODES)}之一")
+    ext = ext.lower()
+    if mode == "1" and ext in (".jpg", ".jpeg"):
+        raise ValueError("JPEG 不能保存黑白（1）模式，请用 png 或 tif")
+    return ext
+
+
+def open_document(path, mode="RGB", **params):
+    """按扩展名打开文档：.pdf、.svg 为矢量输出，.tif/.tiff 为多页 TIFF，其他为每页一张位图
+    mode 为位图的颜色模式（RASTER_MODES），params 传给 Image.save（矢量输出都忽略）
+    """
+    ext = check_mode(os.path.splitext(path)[1], mode)
+    if ext == ".pdf":
+        return PdfDocument(path)
+    if ext == ".svg":
+        return SvgDocument(path)
+    if ext in (".tif", ".tiff"):
+        return TiffDocument(path, mode=mode, **params)
+    return RasterDocument(path, mode, **params)
+
+
+def save_page(path, draw_page, **params):
+    """把 draw_page(canvas) 画出的一页保存到 path，返回保存的文件路径"""
+    with open_document(path, **params) as document:
+        document.add_page(draw_page)
+    return document.paths[0]
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""练习纸 HTTP 服务（server.py）的压力测试
+
+用法：
+    python loadtest.py --start --workers 2 --requests 200 --concurrency 8
+    python loadtest.py --url http://127.0.0.1:8000 --paths "/sudoku?size=9" "/table?op=subtract"
+
+--concurrency 个线程不断发出请求，共 --requests 个，打印每秒请求数和延迟的 p50/p90/p99。
+路径中没有 seed 时依次加上 --seeds 个不同的种子：种子少时同样的请求会同时到达，可以看到合并请求（和缓存）的效果。
+--start 时在本进程中启动一个服务（随机端口），测完后关闭。--json 输出机器可读的结果。
+连接被拒绝、超时、连接被重置等没有收到响应的请求算作失败（状态 failed），按原因分别计数，
+不计入延迟；每秒请求数只算收到响应的请求。
+"""
+import argparse
+import collections
+import itertools
+import json
+import sys
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+DEFAULT_PATHS = ["/sudoku?size=9", "/table?op=subtract", "/queue?type=3"]
+
+
+def percentile(values, fraction):
+    """最近秩百分位数"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+
+def expand_paths(paths, seeds):
+    """没有 seed 的路径按 seeds 个种子展开"""
+    result = []
+    for path in paths:
+        if "seed=" in path or seeds <= 0:
+            result.append(path)
+        else:
+            separator = "&" if "?" in path else "?"
+            result += [f"{path}{separator}seed={seed}" for seed in range(seeds)]
+    return result
+
+
+def run_load(base_url, paths, total, concurrency, timeout=120):
+    """并发请求 total 次，返回统计结果"""
+    urls = [base_url.rstrip("/") + path for path in paths]
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    statuses = collections.Counter()
+    sources = collections.Counter()
+    failures = collections.Counter()  # 没有收到响应的请求：原因 -> 次数
+    received = [0]
+
+    def worker():
+        while True:
+            index = next(counter)
+            if index >= total:
+                return
+            start = time.perf_counter()
+            try:
+                with urlopen(urls[index % len(urls)], timeout=timeout) as response:
+                    body = response.read()
+                    status, source = response.status, response.headers.get("X-Source", "")
+            except HTTPError as e:
+                body, status, source = e.read(), e.code, "error"
+            except (URLError, OSError) as e:  # 连接被拒绝、超时、连接被重置等（socket.timeout 是 OSError）
+                reason = e.reason if isinstance(e, URLError) else e
+                with lock:
+                    statuses["failed"] += 1
+                    failures[type(reason).__name__ if isinstance(reason, BaseException) else str(reason)] += 1
+                continue
+            seconds = time.perf_counter() - start
+            with lock:
+                latencies.append(seconds)
+                statuses[status] += 1
+                sources[source] += 1
+                received[0] += len(body)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    completed = len(latencies)
+    latency = None  # 一个响应都没有收到时没有延迟统计
+    if completed:
+        latency = {
+            "mean": sum(latencies) / completed * 1000,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p90": percentile(latencies, 0.90) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": max(latencies) * 1000,
+        }
+    return {
+        "requests": total,
+        "completed": completed,
+        "failed": sum(failures.values()),
+        "concurrency": concurrency,
+        "distinct_urls": len(urls),
+        "seconds": elapsed,
+        "requests_per_second": completed / elapsed,
+        "latency_ms": latency,
+        "status": {str(status): count for status, count in statuses.items()},
+        "failures": dict(failures),
+        "source": dict(sources),
+        "megabytes": received[0] / 2 ** 20,
+    }
+
+
+def format_result(result):
+    latency = result["latency_ms"]
+    lines = [
+        f"{result['requests']} 个请求，{result['concurrency']} 个并发，{result['distinct_urls']} 种不同的请求，"
+        f"{result['seconds']:.2f} 秒，{result['megabytes']:.1f} MB",
+        f"requests/sec {result['requests_per_second']:.2f}（收到响应 {result['completed']} 个）",
+        f"延迟（ms） 平均 {latency['mean']:.1f}  p50 {latency['p50']:.1f}  p90 {latency['p90']:.1f}  "
+        f"p99 {latency['p99']:.1f}  最大 {latency['max']:.1f}" if latency else "延迟（ms） 没有收到任何响应",
+        "状态码 " + "  ".join(f"{status}: {count}" for status, count in sorted(result["status"].items())),
+        "来源 " + "  ".join(f"{source}: {count}" for source, count in sorted(result["source"].items())),
+    ]
+    if result["failed"]:
+        lines.append(f"失败 {result['failed']} 个（没有收到响应）："
+                     + "  ".join(f"{reason}: {count}" for reason, count in sorted(result["failures"].items())))
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="练习纸 HTTP 服务的压力测试")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="服务地址")
+    parser.add_argument("--start", action="store_true", help="在本进程中启动服务（随机端口）")
+    parser.add_argument("--workers", type=int, default=2, help="--start 时服务的进程数")
+    parser.add_argument("--cache", default=None, metavar="DIR", help="--start 时服务的页面缓存目录")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS, help="请求的路径，轮流使用")
+    parser.add_argument("--seeds", type=int, default=8, help="每个没有 seed 的路径展开成几个种子")
+    parser.add_argument("--requests", type=int, default=100, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发数")
+    parser.add_argument("--warmup", type=int, default=0, help="正式测试前先发出的请求数（不计入结果）")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None
+    base_url = args.url
+    if args.start:
+        import server as worksheet_server
+        from common import cache
+        cache_spec = (args.cache, cache.DEFAULT_MAX_BYTES) if args.cache else None
+        server = worksheet_server.WorksheetServer(("127.0.0.1", 0), args.workers, cache_spec)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        paths = expand_paths(args.paths, args.seeds)
+        if args.warmup:
+            run_load(base_url, paths, args.warmup, args.concurrency)
+        result = run_load(base_url, paths, args.requests, args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(format_result(result))
+
+
+if __name__ == "__main__":
+    main()
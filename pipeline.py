@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""生成 → 绘制 → 编码写盘 三段流水线
+
+batch.py 默认每个子进程依次生成题目、画页面、编码保存，一页做完才开始下一页。
+这里把三步拆成三个阶段同时进行，阶段之间用有界队列连接：
+- 生成：在进程池中运行（纯 Python 计算，受 GIL 限制）
+- 绘制：在线程池中把内容画到画布上
+- 编码写盘：在线程池中运行，Pillow 编码 JPEG/PNG 和写文件时会释放 GIL
+队列满时上游阶段等待（背压），同时存在的页面图片最多为
+绘制线程数 + 队列长度 + 编码线程数，与总页数无关。
+每个阶段统计处理数量、忙碌时间、吞吐量和输入队列的平均/最大长度，用来找出瓶颈。
+"""
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# 采样队列长度的间隔（秒）
+SAMPLE_INTERVAL = 0.01
+
+
+class StageStats:
+    """一个阶段的统计：处理数量、忙碌时间（各任务耗时之和）、输入队列长度"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.depth_total = 0
+        self.depth_max = 0
+        self.samples = 0
+
+    def record(self, seconds):
+        self.items += 1
+        self.busy += seconds
+
+    def sample(self, depth):
+        self.samples += 1
+        self.depth_total += depth
+        self.depth_max = max(self.depth_max, depth)
+
+    def summary(self, elapsed):
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "busy": self.busy,
+            # 忙碌时间占全部工作者时间的比例，接近 1 的阶段就是瓶颈
+            "utilization": self.busy / (elapsed * self.workers) if elapsed else 0.0,
+            "per_second": self.items / elapsed if elapsed else 0.0,
+            "queue_avg": self.depth_total / self.samples if self.samples else 0.0,
+            "queue_max": self.depth_max,
+        }
+
+
+def format_stats(stats):
+    lines = [f"{'阶段':<10}{'工作者':>6}{'数量':>8}{'items/sec':>12}{'利用率':>8}{'队列均值':>10}{'队列最大':>8}"]
+    for row in stats:
+        lines.append(f"{row['stage']:<12}{row['workers']:>6}{row['items']:>10}{row['per_second']:>12.2f}"
+                     f"{row['utilization']:>10.0%}{row['queue_avg']:>12.2f}{row['queue_max']:>10}")
+    return "\n".join(lines)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+async def _run(items, generate, expand, draw, save, workers, draw_threads, save_threads, queue_size):
+    loop = asyncio.get_running_loop()
+    draw_queue = asyncio.Queue(queue_size)
+    save_queue = asyncio.Queue(queue_size)
+    stats = {
+        "generate": StageStats("generate", workers),
+        "draw": StageStats("draw", draw_threads),
+        "save": StageStats("save", save_threads),
+    }
+    paths = []
+    pending = iter(items)
+
+    with ProcessPoolExecutor(workers) as processes, \
+            ThreadPoolExecutor(draw_threads) as drawers, ThreadPoolExecutor(save_threads) as savers:
+
+        async def generator():
+            # 各生成任务从同一个迭代器取任务；draw_queue 满时在 put 处等待
+            for item in pending:
+                content, seconds = await loop.run_in_executor(processes, _timed, generate, item)
+                stats["generate"].record(seconds)
+                await draw_queue.put((item, content))
+
+        async def drawer():
+            while True:
+                entry = await draw_queue.get()
+                if entry is None:
+                    return
+                for path, draw_page in expand(*entry):
+                    image, seconds = await loop.run_in_executor(drawers, _timed, draw, draw_page)
+                    stats["draw"].record(seconds)
+                    await save_queue.put((path, image))
+
+        async def saver():
+            while True:
+                entry = await save_queue.get()
+                if entry is None:
+                    return
+                _, seconds = await loop.run_in_executor(savers, _timed, save, *entry)
+                stats["save"].record(seconds)
+                paths.append(entry[0])
+
+        async def monitor():
+            while True:
+                stats["draw"].sample(draw_queue.qsize())
+                stats["save"].sample(save_queue.qsize())
+                await asyncio.sleep(SAMPLE_INTERVAL)
+
+        start = time.perf_counter()
+        watcher = asyncio.create_task(monitor())
+        drawer_tasks = [asyncio.create_task(drawer()) for _ in range(draw_threads)]
+        saver_tasks = [asyncio.create_task(saver()) for _ in range(save_threads)]
+        await asyncio.gather(*(generator() for _ in range(workers)))
+        for _ in drawer_tasks:
+            await draw_queue.put(None)
+        await asyncio.gather(*drawer_tasks)
+        for _ in saver_tasks:
+            await save_queue.put(None)
+        await asyncio.gather(*saver_tasks)
+        elapsed = time.perf_counter() - start
+        watcher.cancel()
+
+    return sorted(paths), [stage.summary(elapsed) for stage in stats.values()], elapsed
+
+
+def run_pipeline(items, generate, expand, draw, save, workers=2, draw_threads=2, save_threads=2, queue_size=4):
+    """按流水线处理 items，返回 (保存的文件路径, 各阶段统计, 总耗时)
+    generate(item) -> 内容，在进程池中运行，必须是可以序列化的模块级函数
+    expand(item, content) -> [(文件路径, 绘制参数), ...]，在事件循环中运行，应当很快
+    draw(绘制参数) -> 图片，save(文件路径, 图片)，分别在两个线程池中运行
+    """
+    return asyncio.run(_run(items, generate, expand, draw, save, workers, draw_threads, save_threads, queue_size))
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""性能回归测试：用固定的种子测量主要环节的耗时，与保存的基准比较，并检查页面图片没有变化
+
+用法（在仓库根目录下）：
+    python regression.py --update            # 测量并保存为基准（regression_baseline.json）
+    python regression.py                     # 测量并与基准比较，变慢超过 --threshold 或页面变化时返回 1
+    python regression.py --json results.json --threshold 0.1 --only shudu
+    python regression.py --no-bench --save-images golden   # 只检查页面图片，并把图片存成 PNG
+    python regression.py --no-bench --no-golden            # 只检查按编号重新生成
+
+每项测试每轮用同一个种子重新开始，所以每轮做完全相同的工作；先按 --min-time 确定每轮次数，
+再测 --rounds 轮，取各轮中每次耗时（ms）的最小值（受机器上其他程序的干扰最小），同时记下中位数。
+按编号重新生成：每种页面用 render_page 保存一页，把文件名中的页面编号解析回来，
+在新的进程中用 batch.py --regenerate 重新生成，文件必须逐字节相同（与基准无关，每次都检查）。
+页面图片：用固定的页面编号画出各种练习纸的题目页和答案页，记录像素的 SHA-256；
+加速后的画法必须画出完全相同的像素，否则报告变化（确实要改变画法时用 --update 更新基准，
+并把 common/render.py 的 RENDER_VERSION 加 1）。
+像素取决于字体文件和 Pillow 版本，结果中记下了这些环境信息，环境不同时页面变化只作为提示。
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import PIL
+
+import batch
+from batch import BiaogeGuilv, PaiDui, ShuDu
+from common import fonts, render
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(ROOT, "regression_baseline.json")
+
+# 结果文件格式的版本
+FORMAT_VERSION = 1
+
+# 测试用的种子
+SEED = 2025
+
+# 检查像素的页面：(练习纸类型, 参数[, 选项])，用页面编号 类型-参数-SEED-0000 生成
+GOLDEN_PAGES = [
+    ("shudu", 4),
+    ("shudu", 6),
+    ("shudu", 9),
+    ("shudu", 12),
+    ("shudu", 16),
+    ("shudu", 9, {"jigsaw": 1}),
+    ("table", "add"),
+    ("table", "subtract"),
+    ("table", "mixed"),
+    ("queue", 3),
+]
+
+# 检查按编号重新生成时用的页码（不是 0，页码也要经过编号还原）
+ROUNDTRIP_PAGE = 7
+
+
+def _cjk_font():
+    """排队问题的排版测试用中文字体，本机没有时用 sans 字体代替（只影响字形）"""
+    try:
+        return PaiDui.get_font_path()
+    except FileNotFoundError:
+        return "sans"
+
+
+# 每项测试：setup(rng) 做准备工作（不计时），返回每次调用都做同样工作的函数
+def bench_generate_sudoku(size):
+    def setup(rng):
+        return lambda: ShuDu.generate_sudoku(size, rng=rng)
+    return setup
+
+
+def bench_create_puzzle(size):
+    def setup(rng):
+        boards = [ShuDu.generate_sudoku(size, rng=rng) for _ in range(20)]
+        index = iter(range(10 ** 9))
+        return lambda: ShuDu.create_puzzle(boards[next(index) % len(boards)], size, rng=rng)
+    return setup
+
+
+def bench_sudoku_image(size, is_answer):
+    def setup(rng):
+        puzzles, solutions = ShuDu.generate_puzzles(size, ShuDu.PUZZLES_PER_PAGE, rng=rng)
+        if is_answer:
+            return lambda: ShuDu.create_sudoku_image(solutions, size, True, puzzles)
+        return lambda: ShuDu.create_sudoku_image(puzzles, size)
+    return setup
+
+
+def bench_table_data(operation):
+    def setup(rng):
+        return lambda: BiaogeGuilv.generate_table_data(operation, rng)
+    return setup
+
+
+def bench_draw_table(operation):
+    def setup(rng):
+        first_row, first_col = BiaogeGuilv.generate_table_data(operation, rng)
+        canvas = render.RasterCanvas()
+        return lambda: BiaogeGuilv.draw_table(canvas, 100, 100, first_row, first_col, operation)
+    return setup
+
+
+def bench_queue_layout(choice):
+    def setup(rng):
+        texts = [problem.text for problem in PaiDui.generate_problems(choice, rng=rng)]
+        font_path = _cjk_font()
+        max_height = render.A4_HEIGHT - render.FOOTER_HEIGHT
+        return lambda: PaiDui.layout_problems(texts, font_path, 75, 50, 200, render.A4_WIDTH - 100, max_height)
+    return setup
+
+
+def bench_jpeg_save(size):
+    def setup(rng):
+        puzzles, solutions = ShuDu.generate_puzzles(size, ShuDu.PUZZLES_PER_PAGE, rng=rng)
+        image = ShuDu.create_sudoku_image(solutions, size, True, puzzles)
+        return lambda: image.save(io.BytesIO(), format="JPEG", quality=95)
+    return setup
+
+
+BENCHMARKS = {
+    "generate_sudoku-4": bench_generate_sudoku(4),
+    "generate_sudoku-6": bench_generate_sudoku(6),
+    "generate_sudoku-9": bench_generate_sudoku(9),
+    "create_puzzle-9": bench_create_puzzle(9),
+    "create_sudoku_image-9": bench_sudoku_image(9, False),
+    "create_sudoku_image-9-answers": bench_sudoku_image(9, True),
+    "generate_table_data-subtract": bench_table_data("subtract"),
+    "generate_table_data-mixed": bench_table_data("mixed"),
+    "draw_table-subtract": bench_draw_table("subtract"),
+    "queue_layout-3": bench_queue_layout(3),
+    "jpeg_save-9": bench_jpeg_save(9),
+}
+
+
+def measure(name, setup, rounds=5, min_time=0.2):
+    """返回 {"ms": 各轮每次耗时的最小值, "median_ms", "number": 每轮次数, "rounds"}"""
+    def run_round(number):
+        step = setup(random.Random(f"{name}:{SEED}"))
+        start = time.perf_counter()
+        for _ in range(number):
+            step()
+        return time.perf_counter() - start
+
+    # 第一轮同时预热（字体、字形缓存、网格图块、表格索引）并确定每轮次数
+    number = 1
+    while True:
+        elapsed = run_round(number)
+        if elapsed >= min_time or number >= 10 ** 6:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    times = [run_round(number) * 1000 / number for _ in range(rounds)]
+    return {"ms": min(times), "median_ms": statistics.median(times), "number": number, "rounds": rounds}
+
+
+def golden_images():
+    """[(名称, 图片)]：固定页面编号的题目页和答案页"""
+    for sheet, param, *options in GOLDEN_PAGES:
+        job = (sheet, param, SEED, 0, dict(*options))
+        name = batch.job_id(*job)
+        try:
+            pages = batch.job_pages(job, batch.content_job(job))
+            for section, draw_page in pages:
+                canvas = render.RasterCanvas()
+                draw_page(canvas)
+                yield f"{name}-{section}", canvas.image
+        except FileNotFoundError as e:  # 没有中文字体时不能画排队问题
+            yield name, e
+
+
+def check_roundtrip(verbose=True):
+    """{页面编号: 结果}：GOLDEN_PAGES 的每种页面保存一页，再按编号在新的进程中重新生成，
+    结果为 same（文件逐字节相同）、unparsed（编号不能还原成同样的参数）、different，没有中文字体时为 {"skipped": 原因}
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for sheet, param, *options in GOLDEN_PAGES:
+            options = dict(*options)
+            name = batch.job_id(sheet, param, SEED, ROUNDTRIP_PAGE, options)
+            direct, again = os.path.join(tmp, "direct"), os.path.join(tmp, "regenerated")
+            os.makedirs(direct, exist_ok=True)
+            try:
+                paths = batch.render_page((sheet, param, SEED, ROUNDTRIP_PAGE, direct, options, "jpg", "RGB", None))[0]
+            except FileNotFoundError as e:  # 没有中文字体时不能画排队问题
+                results[name] = {"skipped": str(e)}
+                continue
+            if batch.parse_page_id(name) != (sheet, param, options, SEED, ROUNDTRIP_PAGE):
+                results[name] = "unparsed"
+                continue
+            subprocess.run([sys.executable, os.path.join(ROOT, "batch.py"), "--regenerate", name, "--out", again],
+                           check=True, capture_output=True)
+            same = sorted(os.listdir(direct)) == sorted(os.listdir(again)) and all(
+                _file_bytes(path) == _file_bytes(os.path.join(again, os.path.basename(path))) for path in paths)
+            results[name] = "same" if same else "different"
+            for directory in (direct, again):
+                for file_name in os.listdir(directory):
+                    os.remove(os.path.join(directory, file_name))
+            if verbose:
+                print(f"  {name:<32}{results[name]:>12}", file=sys.stderr)
+    return results
+
+
+def _file_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def roundtrip_failures(results):
+    return [name for name, status in results.get("roundtrip", {}).items() if status in ("unparsed", "different")]
+
+
+def image_digest(image):
+    return hashlib.sha256(f"{image.mode}:{image.size}:".encode() + image.tobytes()).hexdigest()
+
+
+def environment():
+    """影响结果的环境：计时取决于机器，像素取决于字体文件和 Pillow 版本"""
+    font_paths = {}
+    for family in fonts.FAMILIES:
+        try:
+            font_paths[family] = fonts.resolve(family)
+        except FileNotFoundError:
+            font_paths[family] = None
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "machine": f"{platform.system()} {platform.machine()} {platform.node()}",
+        "fonts": font_paths,
+    }
+
+
+def run(names, rounds, min_time, golden=True, image_dir=None, verbose=True, roundtrip=True):
+    results = {"version": FORMAT_VERSION, "seed": SEED, "environment": environment(),
+               "benchmarks": {}, "golden": {}, "roundtrip": {}}
+    for name in names:
+        results["benchmarks"][name] = measure(name, BENCHMARKS[name], rounds, min_time)
+        if verbose:
+            print(f"  {name:<32}{results['benchmarks'][name]['ms']:>12.3f} ms", file=sys.stderr)
+    if golden:
+        if image_dir:
+            os.makedirs(image_dir, exist_ok=True)
+        for name, image in golden_images():
+            if isinstance(image, Exception):
+                results["golden"][name] = {"skipped": str(image)}
+                continue
+            results["golden"][name] = image_digest(image)
+            if image_dir:
+                image.save(os.path.join(image_dir, f"{name}.png"))
+    if roundtrip:
+        results["roundtrip"] = check_roundtrip(verbose)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """与基准比较，返回 {"benchmarks": {名称: {...}}, "golden": {名称: 状态}, "regressions": [...], "changed": [...]}
+    耗时比基准多 threshold（比例）以上算变慢；像素的 SHA-256 不同算页面变化
+    """
+    report = {"threshold": threshold, "benchmarks": {}, "golden": {}, "regressions": [], "changed": [],
+              "same_environment": {key: results["environment"][key] == baseline["environment"].get(key)
+                                   for key in ("machine", "pillow", "fonts")}}
+    for name, current in results["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            report["benchmarks"][name] = {"status": "new", "ms": current["ms"]}
+            continue
+        ratio = current["ms"] / base["ms"]
+        status = "slower" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "ok")
+        report["benchmarks"][name] = {"status": status, "ms": current["ms"], "baseline_ms": base["ms"],
+                                      "ratio": ratio}
+        if status == "slower":
+            report["regressions"].append(name)
+    for name, digest in results["golden"].items():
+        base = baseline["golden"].get(name)
+        if isinstance(digest, dict) or isinstance(base, dict):
+            status = "skipped"
+        elif base is None:
+            status = "new"
+        elif base == digest:
+            status = "same"
+        else:
+            status = "changed"
+            report["changed"].append(name)
+        report["golden"][name] = status
+    return report
+
+
+def format_report(results, report):
+    lines = []
+    if report is None:
+        lines.append(f"{'测试':<32}{'ms':>12}")
+        for name, result in results["benchmarks"].items():
+            lines.append(f"{name:<32}{result['ms']:>12.3f}")
+        for name, digest in results["golden"].items():
+            lines.append(f"{name:<48}{'跳过' if isinstance(digest, dict) else digest[:16]}")
+        lines += _roundtrip_lines(results)
+        return "\n".join(lines)
+
+    if results["benchmarks"]:
+        lines.append(f"{'测试':<32}{'基准 ms':>12}{'当前 ms':>12}{'变化':>10}  结果")
+        for name, item in report["benchmarks"].items():
+            if item["status"] == "new":
+                lines.append(f"{name:<32}{'-':>12}{item['ms']:>12.3f}{'-':>10}  new")
+            else:
+                lines.append(f"{name:<32}{item['baseline_ms']:>12.3f}{item['ms']:>12.3f}"
+                             f"{item['ratio'] - 1:>+10.1%}  {item['status']}")
+    for name, status in report["golden"].items():
+        lines.append(f"{name:<48}{status}")
+    if not report["same_environment"]["machine"]:
+        lines.append("注意：基准是在另一台机器上测的，耗时不能直接比较")
+    if report["changed"] and not (report["same_environment"]["pillow"] and report["same_environment"]["fonts"]):
+        lines.append("注意：基准的字体或 Pillow 版本与本机不同，页面变化可能只是环境不同")
+    lines.append(f"变慢超过 {report['threshold']:.0%}：{', '.join(report['regressions']) or '无'}")
+    lines.append(f"页面变化：{', '.join(report['changed']) or '无'}")
+    lines += _roundtrip_lines(results)
+    return "\n".join(lines)
+
+
+def _roundtrip_lines(results):
+    if not results.get("roundtrip"):
+        return []
+    lines = [f"{name + ' 重新生成':<48}{'跳过' if isinstance(status, dict) else status}"
+             for name, status in results["roundtrip"].items()]
+    lines.append(f"按编号重新生成不同：{', '.join(roundtrip_failures(results)) or '无'}")
+    return lines
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="性能回归测试和页面图片检查")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基准文件")
+    parser.add_argument("--update", action="store_true", help="把这次的结果保存为基准")
+    parser.add_argument("--threshold", type=float, default=0.25, help="耗时超过基准的这个比例算变慢")
+    parser.add_argument("--rounds", type=int, default=5, help="每项测几轮")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮至少多少秒")
+    parser.add_argument("--only", nargs="+", default=None, metavar="NAME", help="只测名称中含有这些文字的项")
+    parser.add_argument("--no-bench", action="store_true", help="不计时，只检查页面图片")
+    parser.add_argument("--no-golden", action="store_true", help="不检查页面图片")
+    parser.add_argument("--no-roundtrip", action="store_true", help="不检查按编号重新生成")
+    parser.add_argument("--save-images", default=None, metavar="DIR", help="把检查的页面存成 PNG")
+    parser.add_argument("--json", default=None, metavar="PATH", help="把结果和比较写成 JSON（- 为标准输出）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [] if args.no_bench else [name for name in BENCHMARKS
+                                      if not args.only or any(part in name for part in args.only)]
+    results = run(names, args.rounds, args.min_time, not args.no_golden, args.save_images,
+                  roundtrip=not args.no_roundtrip)
+
+    report = None
+    if args.update:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"已保存基准：{args.baseline}", file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("version") != FORMAT_VERSION:
+            sys.exit(f"基准文件的格式版本不同：{args.baseline}，请用 --update 重新生成")
+        report = compare(results, baseline, args.threshold)
+    else:
+        print(f"没有基准文件 {args.baseline}，只打印结果（用 --update 保存为基准）", file=sys.stderr)
+
+    if args.json:
+        output = json.dumps({"results": results, "comparison": report}, ensure_ascii=False, indent=2)
+        if args.json == "-":
+            print(output)
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+    if args.json != "-":
+        print(format_report(results, report))
+    if (report is not None and (report["regressions"] or report["changed"])) or roundtrip_failures(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""本地练习纸 HTTP 服务
+
+用法：
+    python server.py --port 8000 --workers 4 [--cache cache]
+    curl -o s.jpg "http://127.0.0.1:8000/sudoku?size=9&count=15&seed=2025"
+    curl -o j.jpg "http://127.0.0.1:8000/sudoku?size=9&jigsaw=1"
+    curl -o t.pdf "http://127.0.0.1:8000/table?op=subtract&format=pdf"
+    curl -o q.jpg "http://127.0.0.1:8000/queue?type=3&answers=1"
+    curl -o g.png "http://127.0.0.1:8000/sudoku?size=9&format=png&mode=1"
+    curl "http://127.0.0.1:8000/stats"
+
+启动时预先创建进程池，每个子进程先加载字体、画一遍各种页面（字形缓存、网格图块、求解器、
+表格索引、排队题目表都已准备好），之后的请求不再有这些开销。
+页面用 batch.py 相同的函数生成：seed 相同时 /sudoku?seed=2025 与 batch.py --regenerate shudu-9-2025-0000 内容相同，
+响应头 X-Page-Id 是页面编号。不传 seed 时随机选择。
+参数完全相同的请求同时到达时只生成一次，结果同时返回给所有请求（合并请求）。
+指定 --cache 时生成的页面存入页面缓存（见 common/cache.py），再次请求时直接读文件。
+"""
+import argparse
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Pool
+from urllib.parse import parse_qs, urlparse
+
+import batch
+from common import cache, render
+
+# 请求路径 -> 练习纸类型
+ENDPOINTS = {
+    "/sudoku": "shudu",
+    "/table": "table",
+    "/queue": "queue",
+}
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "pdf": "application/pdf",
+}
+
+# 等待子进程生成一页的最长时间（秒）
+RENDER_TIMEOUT = 60
+
+
+def parse_request(path, query):
+    """把请求解析成 (练习纸类型, 参数, 选项, 种子, 格式, 颜色模式, 是否答案页)，参数无效时抛出 ValueError"""
+    if path not in ENDPOINTS:
+        raise LookupError(path)
+    sheet = ENDPOINTS[path]
+    query = {key: values[-1] for key, values in parse_qs(query).items()}
+
+    def integer(name, default, choices=None):
+        value = query.get(name)
+        if value is None:
+            return default
+        if not value.isdigit() or (choices is not None and int(value) not in choices):
+            raise ValueError(f"参数 {name} 无效：{value}")
+        return int(value)
+
+    options = {}
+    if sheet == "shudu":
+        param = integer("size", 9, batch.ShuDu.region_layouts.SIZES)
+        per_page = batch.ShuDu.puzzles_per_page(param)
+        count = integer("count", per_page, range(1, per_page + 1))
+        if count != per_page:
+            options["count"] = count
+        jigsaw = integer("jigsaw", None, range(1, len(batch.ShuDu.region_layouts.JIGSAW_LAYOUTS.get(param, [])) + 1))
+        if jigsaw is not None:
+            options["jigsaw"] = jigsaw
+        grade = integer("grade", None, batch.ShuDu.grader.GRADES)
+        if grade is not None:
+            regions = batch.ShuDu.region_layouts.jigsaw_regions(param, jigsaw) if jigsaw is not None else None
+            batch.ShuDu.grader.check_grade(param, grade, regions)
+            options["grade"] = grade
+    elif sheet == "table":
+        param = query.get("op", "add")
+        if param not in batch.BiaogeGuilv.PRESETS:
+            raise ValueError(f"参数 op 无效：{param}")
+    else:
+        param = integer("type", 3, batch.PaiDui.PROBLEM_TYPES)
+
+    fmt = query.get("format", "jpg")
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"参数 format 无效：{fmt}（可选 {', '.join(CONTENT_TYPES)}）")
+    mode = query.get("mode", "RGB")
+    if mode not in render.RASTER_MODES:
+        raise ValueError(f"参数 mode 无效：{mode}（可选 {', '.join(render.RASTER_MODES)}）")
+    if mode == "1" and fmt == "jpg":
+        raise ValueError("JPEG 不能保存黑白（1）模式，请加上 format=png")
+    seed = integer("seed", None)
+    if seed is None:
+        seed = random.randrange(10 ** 6)
+    answers = integer("answers", 0, (0, 1)) == 1
+    return sheet, param, tuple(sorted(options.items())), seed, fmt, mode, answers
+
+
+def render_request(request):
+    """子进程中生成一页，返回文件内容
+    jpg、png 只返回题目页或答案页（answers），pdf 返回题目、答案两页的文档；编码参数与 batch.py 相同
+    mode 为位图的颜色模式（RGB、L、1，见 common/render.py）
+    """
+    sheet, param, options, seed, fmt, mode, answers = request
+    job = (sheet, param, seed, 0, dict(options))
+    pages = batch.job_pages(job, batch.content_job(job))
+    if fmt == "pdf":
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.pdf")
+            with render.open_document(path, mode) as document:
+                for section, draw_page in pages:
+                    document.add_page(draw_page, section=section)
+            with open(path, "rb") as f:
+                return f.read()
+
+    draw_page = dict(pages)["answers" if answers else "questions"]
+    canvas = render.RasterCanvas(mode=render.canvas_mode(mode))
+    draw_page(canvas)
+    output = io.BytesIO()
+    params = {"quality": 95} if sheet == "shudu" and fmt == "jpg" else {}
+    render.to_mode(canvas.image, mode).save(output, format="JPEG" if fmt == "jpg" else "PNG", **params)
+    return output.getvalue()
+
+
+def warm_worker():
+    """子进程启动时画一遍各种页面，加载字体、字形缓存、网格图块和出题用的表"""
+    for sheet, param in (("shudu", 4), ("shudu", 6), ("shudu", 9), ("queue", 3)) + \
+            tuple(("table", op) for op in batch.BiaogeGuilv.PRESETS):
+        try:
+            render_request((sheet, param, (), 0, "jpg", "RGB", False))
+        except FileNotFoundError:  # 没有中文字体时排队问题不能生成，请求时再报错
+            pass
+
+
+class Coalescer:
+    """合并参数相同、同时进行的请求：第一个请求提交给进程池，之后的请求等待同一个结果"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    def _done(self, key):
+        with self.lock:
+            self.pending.pop(key, None)
+
+    def submit(self, key, func, args):
+        """返回 (结果, 是否与其他请求合并)"""
+        with self.lock:
+            result = self.pending.get(key)
+            coalesced = result is not None
+            if not coalesced:
+                result = self.pending[key] = self.pool.apply_async(
+                    func, args, callback=lambda _: self._done(key), error_callback=lambda _: self._done(key))
+        return result.get(RENDER_TIMEOUT), coalesced
+
+
+class WorksheetServer(ThreadingHTTPServer):
+    """每个请求一个线程，生成页面交给预先启动的进程池"""
+
+    daemon_threads = True
+
+    def __init__(self, address, workers=2, cache_spec=None):
+        self.pool = Pool(workers, initializer=warm_worker)
+        self.coalescer = Coalescer(self.pool)
+        self.cache = cache.get_cache(*cache_spec) if cache_spec else None
+        self.stats_lock = threading.Lock()
+        self.counts = {"requests": 0, "rendered": 0, "coalesced": 0, "cached": 0, "errors": 0}
+        self.started = time.time()
+        self.verbose = False
+        super().__init__(address, WorksheetHandler)
+
+    def count(self, name):
+        with self.stats_lock:
+            self.counts[name] += 1
+
+    def page(self, request):
+        """返回 (页面编号, 文件内容, 来源)，来源为 rendered、coalesced 或 cached"""
+        sheet, param, options, seed, fmt, mode, answers = request
+        page_id = batch.job_id(sheet, param, seed, 0, dict(options))
+        key = None
+        if self.cache is not None:
+            # pdf 总是题目、答案两页；jpg、png 只有一页，部分也要在键中
+            section = None if fmt == "pdf" else ("answers" if answers else "questions")
+            key = self.cache.key(page_id, fmt, mode=mode, section=section)
+            files = self.cache.get(key)
+            if files is not None:
+                return page_id, files[0][1], "cached"
+        data, coalesced = self.coalescer.submit(request, render_request, (request,))
+        if coalesced:
+            return page_id, data, "coalesced"
+        if key is not None:
+            self.cache.put(key, [(f"{page_id}.{fmt}", data)])
+        return page_id, data, "rendered"
+
+    def stats(self):
+        with self.stats_lock:
+            result = dict(self.counts)
+        result["uptime"] = time.time() - self.started
+        if self.cache is not None:
+            result["cache"] = self.cache.stats()
+        return result
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+        self.pool.join()
+
+
+class WorksheetHandler(BaseHTTPRequestHandler):
+
+    def _send(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self.server.count("errors")
+        self._send(status, (message + "\n").encode("utf-8"), "text/plain; charset=utf-8")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            body = json.dumps(self.server.stats(), ensure_ascii=False, indent=2).encode("utf-8")
+            self._send(200, body, "application/json; charset=utf-8")
+            return
+
+        self.server.count("requests")
+        try:
+            request = parse_request(url.path, url.query)
+        except LookupError:
+            self._error(404, f"未知的路径：{url.path}（可用 {', '.join(ENDPOINTS)}、/stats）")
+            return
+        except ValueError as e:
+            self._error(400, str(e))
+            return
+        try:
+            page_id, data, source = self.server.page(request)
+        except FileNotFoundError as e:  # 例如没有中文字体
+            self._error(503, str(e))
+            return
+        except Exception as e:  # noqa: BLE001  子进程中的异常，返回给客户端而不让服务退出
+            self._error(500, f"生成失败：{e}")
+            return
+        self.server.count(source)
+        fmt = request[4]
+        self._send(200, data, CONTENT_TYPES[fmt], [("X-Page-Id", page_id), ("X-Source", source)])
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="本地练习纸 HTTP 服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="端口")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="生成页面的进程数")
+    parser.add_argument("--cache", default=None, metavar="DIR", help="页面缓存目录")
+    parser.add_argument("--cache-size", type=int, default=cache.DEFAULT_MAX_BYTES // 2 ** 20,
+                        help="页面缓存的大小上限（MB）")
+    parser.add_argument("--verbose", action="store_true", help="打印每个请求")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache_spec = (args.cache, args.cache_size * 2 ** 20) if args.cache else None
+    server = WorksheetServer((args.host, args.port), args.workers, cache_spec)
+    server.verbose = args.verbose
+    print(f"练习纸服务已启动：http://{args.host}:{server.server_port}/ （{args.workers} 个进程）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
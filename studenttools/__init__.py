@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""练习纸生成的程序接口（代替三个工具的 input() 交互）
+
+    import studenttools
+    studenttools.page_id("shudu", 9, 2025)              # 'shudu-9-2025-0000'
+    studenttools.generate("shudu", 9, 2025, page=7)     # 只出题：(题目, 答案, 区域布局)，不导入 Pillow
+    studenttools.images("table", "add", 2025)           # {"questions": 图片, ...}（PIL.Image）
+    studenttools.save("queue", 3, 2025, output_dir="out", fmt="pdf")   # 保存一页，返回文件路径
+    studenttools.regenerate("shudu-9-2025-0007", "out")  # 按页脚上的页面编号重新生成
+
+sheet 为 "shudu"（param 为尺寸）、"table"（param 为运算，见 BiaogeGuilv.PRESETS）或 "queue"（param 为题型），
+其余关键字参数是练习纸的选项（例如数独的 count、grade、jigsaw）。
+同样的参数、种子和页码总是生成同样的内容，与 batch.py 生成的页面相同（见 common/pageid.py）。
+导入本包不导入任何工具模块，也不创建目录；出题只导入出题用的模块，画页面、保存时才导入 Pillow 和字体（见 common/lazy.py）。
+"""
+import os
+
+__all__ = ["SHEETS", "page_id", "generate", "images", "save", "regenerate"]
+
+SHEETS = ("shudu", "table", "queue")
+
+
+def _batch():
+    import batch
+    return batch
+
+
+def _check(sheet):
+    if sheet not in SHEETS:
+        raise ValueError(f"未知的练习纸类型：{sheet}（可选 {', '.join(SHEETS)}）")
+
+
+def page_id(sheet, param, seed, page=0, **options):
+    """页面编号（印在页脚，也是文件名）"""
+    _check(sheet)
+    return _batch().job_id(sheet, param, seed, page, options)
+
+
+def generate(sheet, param, seed, page=0, **options):
+    """生成一页的内容（可以序列化），不画页面"""
+    _check(sheet)
+    return _batch().content_job((sheet, param, seed, page, options))
+
+
+def images(sheet, param, seed, page=0, mode="RGB", **options):
+    """画出一页，返回 {文档部分: PIL 图片}，文档部分为 questions、answers；mode 为颜色模式（RGB、L、1）"""
+    _check(sheet)
+    batch = _batch()
+    job = (sheet, param, seed, page, options)
+    return {section: batch.render.to_mode(batch.draw_raster(draw_page, mode), mode)
+            for section, draw_page in batch.job_pages(job, batch.content_job(job))}
+
+
+def save(sheet, param, seed, page=0, output_dir="images", fmt="jpg", mode="RGB", **options):
+    """生成并保存一页（fmt 为 jpg、png、tif、pdf、svg），返回保存的文件路径"""
+    _check(sheet)
+    batch = _batch()
+    os.makedirs(output_dir, exist_ok=True)
+    return batch.render_page((sheet, param, seed, page, output_dir, options, fmt, mode, None))[0]
+
+
+def regenerate(page_id, output_dir="images", fmt="jpg", mode="RGB", corpus_dir=None):
+    """按页面编号重新生成这一页，返回保存的文件路径；编号无效时抛出 ValueError"""
+    return _batch().regenerate(page_id, output_dir, fmt, corpus_dir=corpus_dir, mode=mode)